@@ -0,0 +1,58 @@
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "www"))
+from widgets.network.analysis import NetworkAnalysis
+from widgets.network.entries import NetworkEntries
+from widgets.network.tail import LogTail
+
+
+def log_line(epoch, ip="10.0.0.1"):
+    stamp = datetime.fromtimestamp(epoch).strftime("%b %e %H:%M:%S")
+    return f"{stamp} host ddclient[42]: WARNING: detected IPv4 address {ip}\n"
+
+
+def drain(subscriber):
+    events = []
+    while not subscriber.empty():
+        lines = subscriber.get_nowait().splitlines()
+        event = lines[1].partition(": ")[2]
+        events.append((event, json.loads(lines[2].partition(": ")[2])))
+    return events
+
+
+def test_tail_publishes_entries_a_summary_request_already_folded(tmp_path):
+    now = time.time()
+    log = tmp_path / "network.log"
+    log.write_text(log_line(now - 1500) + log_line(now - 1200))
+    analysis = NetworkAnalysis(
+        NetworkEntries(lambda: log, lambda: tmp_path / "network_entries.csv")
+    )
+    tail = LogTail(analysis, lambda: log, lambda: 8)
+    subscriber = tail.subscribe()
+
+    tail.check(now)
+    events = drain(subscriber)
+    assert [event for event, _ in events] == ["entries", "gap"]
+    assert events[0][1]["reset"]
+    assert events[1][1]["state"] == "open"
+
+    # The dashboard's summary reload updates the shared analysis first
+    with log.open("a") as f:
+        f.write(log_line(now))
+    analysis.update()
+    tail.check(now)
+
+    events = drain(subscriber)
+    assert [event for event, _ in events] == ["entries", "gap"]
+    assert not events[0][1]["reset"]
+    assert len(events[0][1]["entries"]) == 1
+    assert events[0][1]["cursor"] == analysis.cursor
+    assert events[1][1]["state"] == "close"
+    assert events[1][1]["gap"]["missed"] == 3
+
+    tail.check(now)
+    assert drain(subscriber) == []
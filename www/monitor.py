@@ -5,12 +5,16 @@ from urllib.request import urlretrieve
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 from datetime import datetime, timedelta, timezone
 import threading
+import hashlib
 import importlib
+import json
 import confuse
 from apprise import Apprise, common as apprise_common
 import logging
+import math
+import os
 import time
-from typing import Callable, List, Optional
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
 from pytimeparse import parse as parse_duration
 
 app = Flask(__name__)
@@ -388,6 +392,17 @@ def resolve_period_cutoff(period_str: Optional[str], now: Optional[datetime] = N
         return None
 
 
+def percentile(ordered: Sequence[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile of sorted values (NumPy's default)."""
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    fraction = position - lower
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+
+
 def parse_iso_timestamp(value: Optional[str]):
     """Parse ISO timestamps with optional trailing Z and normalize to naive UTC."""
     if not value:
@@ -402,6 +417,93 @@ def parse_iso_timestamp(value: Optional[str]):
         return None
 
 
+def stream_json(
+    key: str,
+    items: Iterable,
+    fields: Optional[dict] = None,
+    chunk_size: int = 64 * 1024,
+) -> Iterator[str]:
+    """Encode ``{**fields, key: [items...]}`` incrementally for a streamed response.
+
+    Items are pulled lazily and flushed in roughly ``chunk_size`` pieces, so
+    memory stays bounded and the first bytes go out before the source is
+    exhausted.
+    """
+    head = json.dumps(fields or {})[:-1]
+    buffer = [head + (", " if fields else "") + json.dumps(key) + ": ["]
+    size = len(buffer[0])
+    separator = ""
+    try:
+        for item in items:
+            encoded = separator + json.dumps(item)
+            separator = ", "
+            buffer.append(encoded)
+            size += len(encoded)
+            if size >= chunk_size:
+                yield "".join(buffer)
+                buffer, size = [], 0
+    except Exception as exc:
+        # Headers are already sent, so report the failure inside the document
+        logging.getLogger(__name__).error(f"Error streaming {key}: {exc}")
+        buffer.append("], " + json.dumps({"error": str(exc)})[1:])
+    else:
+        buffer.append("]}")
+    yield "".join(buffer)
+
+
+def tail_lines(
+    path: Path, count: int, header: bool = True, block_size: int = 64 * 1024
+) -> List[str]:
+    """Return the last ``count`` complete lines of a text file, oldest first.
+
+    The file is read backwards from the end in blocks, so the cost depends on
+    ``count`` and not on how much history the file holds. A final line with
+    no newline is still being written and is skipped. With ``header`` the
+    file's first line is never returned.
+    """
+    if count <= 0:
+        return []
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        blocks = []
+        newlines = 0
+        while position > 0 and newlines <= count:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            block = f.read(step)
+            blocks.append(block)
+            newlines += block.count(b"\n")
+
+    lines = b"".join(reversed(blocks)).split(b"\n")
+    lines.pop()  # after the last newline: empty, or a partial record
+    if position > 0 or header:
+        # Either a partial line cut by the block boundary, or the header
+        lines = lines[1:]
+    lines = [line.rstrip(b"\r") for line in lines if line.strip()]
+    return [line.decode("utf-8", "replace") for line in lines[-count:]]
+
+
+def make_etag(version: Iterable) -> str:
+    """Short opaque ETag for a version token such as file size and mtime."""
+    return hashlib.blake2b(repr(tuple(version)).encode(), digest_size=8).hexdigest()
+
+
+def conditional_response(
+    response, version: Iterable, last_modified: Optional[float] = None
+):
+    """Attach validators and turn the response into a 304 when nothing changed.
+
+    The query string is part of the ETag, since the same data version renders
+    differently for each period, limit or cursor.
+    """
+    response.set_etag(make_etag((*version, request.query_string)))
+    if last_modified:
+        response.last_modified = datetime.fromtimestamp(last_modified, timezone.utc)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
 VENDOR_URLS = {
     "github-markdown.min.css": "https://cdn.jsdelivr.net/npm/github-markdown-css@5.6.1/github-markdown.min.css",
     "markdown-it.min.js": "https://cdn.jsdelivr.net/npm/markdown-it/dist/markdown-it.min.js",
@@ -534,6 +636,21 @@ def api_services():
 def api_services_status():
     try:
         services_module = importlib.import_module("widgets.services.api")
+        if hasattr(services_module, "get_status_snapshot"):
+            snapshot = services_module.get_status_snapshot()
+            if request.args.get("details"):
+                response = jsonify(
+                    {
+                        **snapshot.report,
+                        "collected": snapshot.collected.isoformat(),
+                        "age": round(snapshot.age, 1),
+                        "transitions": services_module.get_transitions(),
+                    }
+                )
+            else:
+                response = jsonify(snapshot.status)
+            response.headers["Age"] = str(int(snapshot.age))
+            return response
         if hasattr(services_module, "get_service_status"):
             status = services_module.get_service_status()
         else:
@@ -543,6 +660,38 @@ def api_services_status():
         return jsonify(error=str(exc)), 500
 
 
+@app.route("/api/services/uptime", methods=["GET"])
+def api_services_uptime():
+    """Uptime percentage and outages for a period or an explicit window"""
+    now = datetime.now()
+    period = request.args.get("period", default="30 days", type=str)
+    start_arg = request.args.get("start")
+    end_arg = request.args.get("end")
+    try:
+        if start_arg:
+            start = datetime.fromisoformat(start_arg)
+        else:
+            start = resolve_period_cutoff(period, now=now) or datetime.fromtimestamp(0)
+        end = datetime.fromisoformat(end_arg) if end_arg else now
+    except ValueError as exc:
+        return jsonify(error=f"Invalid window: {exc}"), 400
+    if end <= start:
+        return jsonify(error="Window end must be after its start"), 400
+
+    try:
+        services_module = importlib.import_module("widgets.services.api")
+        services = services_module.get_uptime(
+            start, end, service=request.args.get("service")
+        )
+        return jsonify(
+            start=start.isoformat(timespec="seconds"),
+            end=end.isoformat(timespec="seconds"),
+            services=services,
+        )
+    except Exception as exc:
+        return jsonify(error=str(exc)), 500
+
+
 @app.route("/favicon.ico")
 def favicon():
     default_favicon = WWW / "favicon.ico"
@@ -598,6 +747,8 @@ try:
     if hasattr(network_module, "register_routes"):
         network_module.register_routes(app)
         logger.info("Loaded network widget API")
+    if hasattr(network_module, "start_log_tail"):
+        network_module.start_log_tail()
 
     # Register metrics widget routes
     metrics_module = importlib.import_module("widgets.metrics.api")
@@ -618,6 +769,18 @@ try:
         if hasattr(reminders_module, "on_config_reloaded"):
             register_config_listener(reminders_module.on_config_reloaded)
 
+    # Start background service status polling
+    services_module = importlib.import_module("widgets.services.api")
+    if hasattr(services_module, "start_docker_watcher"):
+        services_module.start_docker_watcher()
+    if hasattr(services_module, "start_status_poller"):
+        services_module.start_status_poller()
+
+    # Start scheduled speedtests
+    speedtest_scheduler = importlib.import_module("widgets.speedtest.scheduler")
+    speedtest_scheduler.start_schedule_daemon()
+    register_config_listener(speedtest_scheduler.on_config_reloaded)
+
 except Exception as e:
     logger = logging.getLogger(__name__)
     logger.error(f"Error loading widget APIs: {e}")
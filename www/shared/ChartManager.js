@@ -87,9 +87,9 @@ class ChartManager {
       Object.entries(this.dataParams).forEach(([key, value]) => {
         params.set(key, value)
       })
-      params.set('ts', Date.now())
 
-      const response = await fetch(`${this.dataUrl}?${params.toString()}`, { cache: 'no-store' })
+      // Revalidate with the ETag; an unchanged chart comes back as a 304
+      const response = await fetch(`${this.dataUrl}?${params.toString()}`, { cache: 'no-cache' })
       if (!response.ok) throw new Error(`HTTP ${response.status}`)
 
       const chartData = await response.json()
@@ -114,75 +114,57 @@ class ChartManager {
     return !!this.chart
   }
 
-  static calculateDeltas (data, readField, writeField) {
-    const result = { read: [], write: [] }
-    let prevRead = null; let prevWrite = null; let prevTime = null
-
-    for (const row of data) {
-      const currentRead = parseFloat(row[readField])
-      const currentWrite = parseFloat(row[writeField])
-      const currentTime = new Date(row.timestamp)
-
-      if (prevRead !== null && prevTime !== null) {
-        const timeDelta = (currentTime - prevTime) / 60000
-        const readRate = timeDelta > 0 ? Math.max(0, (currentRead - prevRead) / timeDelta) : 0
-        const writeRate = timeDelta > 0 ? Math.max(0, (currentWrite - prevWrite) / timeDelta) : 0
-
-        result.read.push(Math.min(readRate, 100))
-        result.write.push(Math.min(writeRate, 100))
-      } else {
-        result.read.push(0)
-        result.write.push(0)
+  // History URL; once a full load has returned a cursor, only rows after it
+  static historyUrl (path, params = {}, cursor = null) {
+    const url = new URL(path, window.location)
+    Object.entries(params).forEach(([key, value]) => {
+      if (value !== null && typeof value !== 'undefined') {
+        url.searchParams.set(key, value)
       }
-
-      prevRead = currentRead
-      prevWrite = currentWrite
-      prevTime = currentTime
+    })
+    if (cursor) {
+      url.searchParams.set('since', cursor)
     }
-
-    return result
+    return url
   }
 
-  static calculateTableDeltas (data) {
-    const result = []
-    let prevRow = null
-
-    for (const row of data) {
-      const entry = {
-        timestamp: row.timestamp,
-        cpu_percent: parseFloat(row.cpu_percent),
-        memory_percent: parseFloat(row.memory_percent),
-        load_1min: parseFloat(row.load_1min),
-        temp_c: parseFloat(row.temp_c),
-        source: row.source || ''
-      }
-
-      if (prevRow) {
-        const timeDelta = (new Date(row.timestamp) - new Date(prevRow.timestamp)) / 60000
-
-        if (timeDelta > 0) {
-          entry.disk_read_rate = Math.max(0, (parseFloat(row.disk_read_mb) - parseFloat(prevRow.disk_read_mb)) / timeDelta)
-          entry.disk_write_rate = Math.max(0, (parseFloat(row.disk_write_mb) - parseFloat(prevRow.disk_write_mb)) / timeDelta)
-          entry.net_rx_rate = Math.max(0, (parseFloat(row.net_rx_mb) - parseFloat(prevRow.net_rx_mb)) / timeDelta)
-          entry.net_tx_rate = Math.max(0, (parseFloat(row.net_tx_mb) - parseFloat(prevRow.net_tx_mb)) / timeDelta)
-        } else {
-          entry.disk_read_rate = 0
-          entry.disk_write_rate = 0
-          entry.net_rx_rate = 0
-          entry.net_tx_rate = 0
-        }
-      } else {
-        entry.disk_read_rate = 0
-        entry.disk_write_rate = 0
-        entry.net_rx_rate = 0
-        entry.net_tx_rate = 0
-      }
+  // Fold in rows fetched with since=: they replace any loaded rows from the
+  // first one on (the bucket holding the cursor comes back complete), and
+  // rows older than the window start are dropped
+  static mergeHistory (entries, rows, start = null) {
+    let merged = entries
+    if (rows.length) {
+      const first = Date.parse(rows[0].timestamp)
+      const kept = entries.findIndex(row => Date.parse(row.timestamp) >= first)
+      merged = (kept === -1 ? entries : entries.slice(0, kept)).concat(rows)
+    }
+    if (!start) return merged
+    const cutoff = Date.parse(start)
+    const index = merged.findIndex(row => Date.parse(row.timestamp) >= cutoff)
+    return index === -1 ? [] : index === 0 ? merged : merged.slice(index)
+  }
 
-      result.push(entry)
-      prevRow = row
+  // I/O rates (MB/min) are computed server-side from the cumulative counters
+  static rateSeries (data, readField, writeField) {
+    return {
+      read: data.map(row => parseFloat(row[readField]) || 0),
+      write: data.map(row => parseFloat(row[writeField]) || 0)
     }
+  }
 
-    return result
+  static calculateTableEntries (data) {
+    return data.map(row => ({
+      timestamp: row.timestamp,
+      cpu_percent: parseFloat(row.cpu_percent),
+      memory_percent: parseFloat(row.memory_percent),
+      disk_read_rate: parseFloat(row.disk_read_rate) || 0,
+      disk_write_rate: parseFloat(row.disk_write_rate) || 0,
+      net_rx_rate: parseFloat(row.net_rx_rate) || 0,
+      net_tx_rate: parseFloat(row.net_tx_rate) || 0,
+      load_1min: parseFloat(row.load_1min),
+      temp_c: parseFloat(row.temp_c),
+      source: row.source || ''
+    }))
   }
 
   static withAlpha (color, alpha) {
@@ -318,7 +300,7 @@ class ChartManager {
       }
 
       case 'disk_io': {
-        const diskDeltas = this.calculateDeltas(chronological, 'disk_read_mb', 'disk_write_mb')
+        const diskDeltas = this.rateSeries(chronological, 'disk_read_rate', 'disk_write_rate')
         datasets = [
           ...this.buildGhostedDatasets({
             label: 'Read MB/min',
@@ -336,7 +318,7 @@ class ChartManager {
       }
 
       case 'net_io': {
-        const netDeltas = this.calculateDeltas(chronological, 'net_rx_mb', 'net_tx_mb')
+        const netDeltas = this.rateSeries(chronological, 'net_rx_rate', 'net_tx_rate')
         datasets = [
           ...this.buildGhostedDatasets({
             label: 'RX MB/min',
@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 
-import csv
 import json
 import os
 import psutil
@@ -10,8 +9,29 @@ import logging
 from pathlib import Path
 from datetime import datetime
 
-from monitor import config, get_data_path, parse_iso_timestamp, resolve_period_cutoff
+from monitor import (
+    conditional_response,
+    config,
+    get_data_path,
+    resolve_period_cutoff,
+    stream_json,
+    tail_lines,
+)
 from flask import request, send_file
+from pytimeparse import parse as parse_duration
+from widgets.metrics.cpu import CpuSampler
+from widgets.metrics.downsample import DOWNSAMPLE_MODES, downsample
+from widgets.metrics.retention import (
+    chained_rows,
+    compact,
+    parse_retention,
+    select_tier,
+    tier_path,
+)
+from widgets.metrics.rates import CounterRates, fill_rates, is_whole_disk
+from widgets.metrics.sample import MetricSample
+from widgets.metrics.sampler import MetricsSampler
+from widgets.metrics.storage import METRIC_COLUMNS, CsvMetricsStore, open_store
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +49,33 @@ def get_collection_interval():
     return interval if interval > 0 else 60
 
 
+def get_snapshot_ttl():
+    ttl = metrics_config()["sampler"]["ttl_seconds"].as_number()
+    return ttl if ttl >= 0 else 5
+
+
 def get_history_file():
     return metrics_config()["history"]["file"].get(str)
 
 
+def get_history_engine():
+    return metrics_config()["history"]["engine"].get(str)
+
+
+def get_history_capacity():
+    return metrics_config()["history"]["capacity"].get(int)
+
+
+def get_retention_tiers():
+    return parse_retention(metrics_config()["history"]["retention"].get(list))
+
+
+def get_compact_interval():
+    text = metrics_config()["history"]["compact_interval"].get(str)
+    seconds = parse_duration(text) if text else None
+    return int(seconds) if seconds and seconds > 0 else 3600
+
+
 def get_history_max_rows():
     limit = metrics_config()["history"]["max_rows"].get(int)
     return limit if limit > 0 else 1000
@@ -46,24 +89,13 @@ def get_threshold_settings():
     return metrics_config()["thresholds"].get(dict)
 
 
-def get_uptime():
-    """Get system uptime as formatted string"""
+def get_uptime_seconds():
+    """Get system uptime in seconds, or None when unavailable"""
     try:
         with open("/proc/uptime", "r") as f:
-            uptime_seconds = float(f.read().split()[0])
-
-        days = int(uptime_seconds // 86400)
-        hours = int((uptime_seconds % 86400) // 3600)
-        minutes = int((uptime_seconds % 3600) // 60)
-
-        if days > 0:
-            return f"{days}d {hours}h {minutes}m"
-        elif hours > 0:
-            return f"{hours}h {minutes}m"
-        else:
-            return f"{minutes}m"
+            return float(f.read().split()[0])
     except Exception:
-        return "Unknown"
+        return None
 
 
 def get_load_average():
@@ -103,177 +135,170 @@ def get_metrics_csv_path():
     return get_data_path() / path
 
 
-def log_metrics_to_csv(metrics_data, source="refresh"):
-    """Log metrics data to CSV file"""
+def get_metrics_store_path():
+    """Get path to the metrics history file for the configured engine"""
     csv_path = get_metrics_csv_path()
+    if get_history_engine() == "ring":
+        return csv_path.with_suffix(".ring")
+    return csv_path
 
-    # Ensure directory exists
-    csv_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # Extract numeric values from metrics
-    load_parts = metrics_data["load"].split()
-    load_1min = float(load_parts[0]) if load_parts else 0.0
-
-    # Parse memory usage
-    memory_parts = metrics_data["memory"].split("/")
-    memory_used_gb = (
-        float(memory_parts[0].replace("GB", "").strip()) if memory_parts else 0.0
-    )
-    memory_total_gb = (
-        float(memory_parts[1].replace("GB", "").strip())
-        if len(memory_parts) > 1
-        else 0.0
-    )
-    memory_percent = (
-        (memory_used_gb / memory_total_gb * 100) if memory_total_gb > 0 else 0.0
-    )
-
-    # Parse temperature
-    temp_c = (
-        float(metrics_data["temp"].replace("°C", "").strip())
-        if "Unknown" not in metrics_data["temp"]
-        else 0.0
-    )
-
-    # Get I/O counters
-    try:
-        disk_io = psutil.disk_io_counters()
-        disk_read_mb = disk_io.read_bytes / (1024**2) if disk_io else 0.0
-        disk_write_mb = disk_io.write_bytes / (1024**2) if disk_io else 0.0
 
-        net_io = psutil.net_io_counters()
-        net_rx_mb = net_io.bytes_recv / (1024**2) if net_io else 0.0
-        net_tx_mb = net_io.bytes_sent / (1024**2) if net_io else 0.0
-    except Exception:
-        disk_read_mb = disk_write_mb = net_rx_mb = net_tx_mb = 0.0
-
-    # CPU percentage
-    cpu_percent = psutil.cpu_percent(interval=0.1)
-
-    row = [
-        datetime.now().isoformat(),
-        f"{cpu_percent:.1f}",
-        f"{memory_percent:.1f}",
-        f"{disk_read_mb:.1f}",
-        f"{disk_write_mb:.1f}",
-        f"{net_rx_mb:.1f}",
-        f"{net_tx_mb:.1f}",
-        f"{load_1min:.2f}",
-        f"{temp_c:.1f}",
-        source,
-    ]
-
-    # Write header if file doesn't exist
-    file_exists = csv_path.exists()
-    with open(csv_path, "a", newline="") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(
-                [
-                    "timestamp",
-                    "cpu_percent",
-                    "memory_percent",
-                    "disk_read_mb",
-                    "disk_write_mb",
-                    "net_rx_mb",
-                    "net_tx_mb",
-                    "load_1min",
-                    "temp_c",
-                    "source",
-                ]
-            )
-        writer.writerow(row)
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _cached_store(path):
+    engine = get_history_engine()
+    key = (engine, str(path))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = open_store(engine, path, capacity=get_history_capacity())
+            store.ensure_columns(METRIC_COLUMNS)
+            _stores[key] = store
+    return store
+
+
+def get_metrics_store():
+    """Return the shared raw metrics store for the configured engine and path"""
+    return _cached_store(get_metrics_store_path())
+
+
+def get_tier_stores(tiers):
+    """Return one store per retention tier, raw history first"""
+    base = get_metrics_store_path()
+    return [_cached_store(tier_path(base, tier)) for tier in tiers]
+
+
+def log_metrics_history(sample, source="refresh"):
+    """Append a metrics sample to the history store"""
+    get_metrics_store().append(sample.timestamp, sample.history_values(), source)
 
 
 def resolve_storage_usage():
-    mounts = get_storage_mounts()
-    for path in mounts:
+    """Return disk usage of the first mounted storage path, or None"""
+    for path in get_storage_mounts():
         try:
             if os.path.exists(path):
-                usage = psutil.disk_usage(path)
-                text = (
-                    f"{usage.used / (1024**4):.1f}TB / "
-                    f"{usage.total / (1024**4):.1f}TB ({usage.percent:.0f}%)"
-                )
-                return text, usage.percent
+                return psutil.disk_usage(path)
         except Exception:
             continue
-    return "Not mounted", 0.0
+    return None
 
 
-def get_system_metrics():
-    """Get all system metrics and their statuses"""
+def get_temperature():
+    """Get the hottest CPU sensor reading in °C, or None when unavailable"""
     try:
-        # Get basic metrics
-        uptime = get_uptime()
-        load = get_load_average()
-        load_str = f"{load[0]:.2f} {load[1]:.2f} {load[2]:.2f}"
+        sensors = psutil.sensors_temperatures()
+        temp = 0
+        if "coretemp" in sensors:
+            temps = [s.current for s in sensors["coretemp"]]
+            temp = max(temps) if temps else 0
+        elif "cpu_thermal" in sensors:
+            temp = sensors["cpu_thermal"][0].current
+        elif "k10temp" in sensors:
+            temps = [s.current for s in sensors["k10temp"]]
+            temp = max(temps) if temps else 0
+        else:
+            # fallback: first available sensor group with plausible temps
+            for entries in sensors.values():
+                for s in entries:
+                    if 10 < s.current < 120:
+                        temp = s.current
+                        break
+                if temp:
+                    break
+        return float(temp)
+    except Exception:
+        return None
 
-        # Memory info
-        memory = psutil.virtual_memory()
-        memory_str = (
-            f"{memory.used / (1024**3):.1f}GB / {memory.total / (1024**3):.1f}GB"
-        )
 
-        # Temperature
-        try:
-            sensors = psutil.sensors_temperatures()
-            temp = 0
-            if "coretemp" in sensors:
-                temps = [s.current for s in sensors["coretemp"]]
-                temp = max(temps) if temps else 0
-            elif "cpu_thermal" in sensors:
-                temp = sensors["cpu_thermal"][0].current
-            elif "k10temp" in sensors:
-                temps = [s.current for s in sensors["k10temp"]]
-                temp = max(temps) if temps else 0
-            else:
-                # fallback: first available sensor group with plausible temps
-                for entries in sensors.values():
-                    for s in entries:
-                        if 10 < s.current < 120:
-                            temp = s.current
-                            break
-                    if temp:
-                        break
+# Previous per-device counters, so each sample carries reset-aware rates
+_disk_rates = CounterRates()
+_net_rates = CounterRates()
 
-            temp_str = f"{temp:.1f}°C"
-        except Exception:
-            temp = 0
-            temp_str = "Unknown"
 
-        # Disk usage
-        disk = psutil.disk_usage("/")
-        disk_str = f"{disk.used / (1024**3):.1f}GB / {disk.total / (1024**3):.1f}GB ({disk.percent:.0f}%)"
-
-        storage_str, storage_percent = resolve_storage_usage()
-
-        metrics = {
-            "uptime": uptime,
-            "load": load_str,
-            "memory": memory_str,
-            "temp": temp_str,
-            "disk": disk_str,
-            "storage": storage_str,
-            "status": "Running",
-            "lastUpdated": datetime.now().isoformat(),
+def get_io_counters():
+    """Get cumulative disk and network byte counters and per-device rates"""
+    now = time.monotonic()
+    try:
+        disks = {
+            name: (counters.read_bytes, counters.write_bytes)
+            for name, counters in psutil.disk_io_counters(perdisk=True).items()
+            if is_whole_disk(name)
+        }
+        interfaces = {
+            name: (counters.bytes_recv, counters.bytes_sent)
+            for name, counters in psutil.net_io_counters(pernic=True).items()
         }
+    except Exception:
+        return {}
+    return {
+        "disk_read_bytes": sum(read for read, _ in disks.values()),
+        "disk_write_bytes": sum(write for _, write in disks.values()),
+        "net_rx_bytes": sum(rx for rx, _ in interfaces.values()),
+        "net_tx_bytes": sum(tx for _, tx in interfaces.values()),
+        "disk_rates": _disk_rates.update(disks, now),
+        "net_rates": _net_rates.update(interfaces, now),
+    }
+
+
+# Keeps the previous /proc/stat reading so CPU load is a delta between samples
+_cpu_sampler = CpuSampler()
+
+
+def get_system_metrics():
+    """Collect one typed metrics sample and its statuses"""
+    try:
+        load = get_load_average()
+        memory = psutil.virtual_memory()
+        temp = get_temperature()
+        disk = psutil.disk_usage("/")
+        storage = resolve_storage_usage()
+
+        sample = MetricSample(
+            timestamp=datetime.now(),
+            uptime_seconds=get_uptime_seconds(),
+            load=load,
+            cpu=_cpu_sampler.sample(),
+            memory_used=memory.used,
+            memory_total=memory.total,
+            memory_percent=memory.percent,
+            temp_c=temp,
+            disk_used=disk.used,
+            disk_total=disk.total,
+            disk_percent=disk.percent,
+            storage_used=storage.used if storage else None,
+            storage_total=storage.total if storage else None,
+            storage_percent=storage.percent if storage else None,
+            **get_io_counters(),
+        )
 
         thresholds = get_threshold_settings()
         statuses = {
             "load": get_metric_status("load", load[0], thresholds),
             "memory": get_metric_status("memory", memory.percent, thresholds),
-            "temp": get_metric_status("temp", temp, thresholds),
+            "temp": get_metric_status("temp", temp or 0, thresholds),
             "disk": get_metric_status("disk", disk.percent, thresholds),
-            "storage": get_metric_status("storage", storage_percent, thresholds),
+            "storage": get_metric_status(
+                "storage", sample.storage_percent or 0.0, thresholds
+            ),
         }
 
-        return metrics, statuses
+        return sample, statuses
 
     except Exception as e:
         logger.error(f"Error getting system metrics: {e}")
-        return {}, {}
+        return None, {}
+
 
+def _record_sample(snapshot, source):
+    """Log each new sampler snapshot to history exactly once"""
+    log_metrics_history(snapshot.sample, source=source)
+
+
+# Single owner of metrics collection; the daemon and HTTP readers share it
+_sampler = MetricsSampler(get_system_metrics, on_sample=_record_sample)
 
 _metrics_thread = None
 
@@ -302,61 +327,49 @@ def _metrics_collector():
                 time.sleep(interval)
                 continue
 
-            metrics, statuses = get_system_metrics()
-            if metrics:
-                log_metrics_to_csv(metrics, source="daemon")
-                check_metric_alerts(metrics, statuses)
+            snapshot = _sampler.latest(get_snapshot_ttl(), source="daemon")
+            if snapshot:
+                check_metric_alerts(snapshot.sample, snapshot.statuses)
         except Exception as e:
             logger.error(f"Metrics daemon error: {e}")
         time.sleep(interval)
 
 
-def check_metric_alerts(metrics, statuses):
-    """Check metric values against alert thresholds and log alert events"""
-    try:
-        # Extract current metric values for alert checking
-        load_parts = metrics["load"].split()
-        load_1min = float(load_parts[0]) if load_parts else 0.0
-
-        # Parse memory usage
-        memory_parts = metrics["memory"].split("/")
-        memory_used_gb = (
-            float(memory_parts[0].replace("GB", "").strip()) if memory_parts else 0.0
-        )
-        memory_total_gb = (
-            float(memory_parts[1].replace("GB", "").strip())
-            if len(memory_parts) > 1
-            else 0.0
-        )
-        memory_percent = (
-            (memory_used_gb / memory_total_gb * 100) if memory_total_gb > 0 else 0.0
-        )
+_compaction_thread = None
 
-        # Parse temperature
-        temp_c = (
-            float(metrics["temp"].replace("°C", "").strip())
-            if "Unknown" not in metrics["temp"]
-            else 0.0
-        )
 
-        # Parse disk usage
-        disk_parts = metrics["disk"].split("(")
-        disk_percent = (
-            float(disk_parts[1].replace("%)", "").strip())
-            if len(disk_parts) > 1
-            else 0.0
-        )
+def start_compaction_daemon():
+    """Start background compaction of metrics retention tiers"""
+    global _compaction_thread
+    if _compaction_thread is None or not _compaction_thread.is_alive():
+        _compaction_thread = threading.Thread(target=_history_compactor, daemon=True)
+        _compaction_thread.start()
 
-        # Parse storage usage
-        if "Not mounted" not in metrics["storage"]:
-            storage_parts = metrics["storage"].split("(")
-            storage_percent = (
-                float(storage_parts[1].replace("%)", "").strip())
-                if len(storage_parts) > 1
-                else 0.0
-            )
-        else:
-            storage_percent = 0.0
+
+def _history_compactor():
+    """Background thread that rolls up and prunes aged metrics history"""
+    logger.info("Metrics compaction thread started")
+    while True:
+        time.sleep(get_compact_interval())
+        try:
+            tiers = get_retention_tiers()
+            if len(tiers) == 1 and tiers[0].keep is None:
+                continue
+            stores = get_tier_stores(tiers)
+            lock_path = get_metrics_store_path().with_suffix(".compact.lock")
+            compact(tiers, stores, datetime.now(), lock_path=lock_path)
+        except Exception as e:
+            logger.error(f"Metrics compaction error: {e}")
+
+
+def check_metric_alerts(sample, statuses):
+    """Check metric values against alert thresholds and log alert events"""
+    try:
+        load_1min = sample.load[0]
+        memory_percent = sample.memory_used_percent
+        temp_c = sample.temp_c or 0.0
+        disk_percent = sample.disk_percent
+        storage_percent = sample.storage_percent or 0.0
 
         # Define metric checks - maps alert names to values and thresholds
         metric_checks = {
@@ -425,36 +438,30 @@ def check_metric_alerts(metrics, statuses):
         logger.error(f"Alert check traceback: {traceback.format_exc()}")
 
 
-def filter_data_by_period(data, period_str):
-    """Filter data by natural time period (e.g., '1 hour', '30 days', '1 week')"""
-    cutoff = resolve_period_cutoff(period_str)
-    if cutoff is None:
-        return data
-
-    filtered_data = []
-    for row in data:
-        row_time = parse_iso_timestamp(row.get("timestamp"))
-        if row_time and row_time >= cutoff:
-            filtered_data.append(row)
-    return filtered_data
+def rows_between(rows, after=None, until=None):
+    """Keep history rows newer than ``after`` and not newer than ``until``"""
+    for row in rows:
+        moment = datetime.fromisoformat(row["timestamp"])
+        if after is not None and moment <= after:
+            continue
+        if until is not None and moment > until:
+            break
+        yield row
 
 
 def register_routes(app):
     """Register metrics API routes with Flask app"""
 
-    # Start background metrics collection
+    # Start background metrics collection and retention compaction
     start_metrics_daemon()
+    start_compaction_daemon()
 
     @app.route("/api/metrics", methods=["GET"])
     def api_metrics():
-        metrics, statuses = get_system_metrics()
-
-        # Log this refresh to CSV
-        if metrics:
-            try:
-                log_metrics_to_csv(metrics, source="refresh")
-            except Exception as e:
-                logger.error(f"Error logging metrics: {e}")
+        # Serve the shared snapshot; only a stale one triggers a new sample
+        snapshot = _sampler.latest(get_snapshot_ttl(), source="refresh")
+        metrics = snapshot.sample.display() if snapshot else {}
+        statuses = dict(snapshot.statuses) if snapshot else {}
 
         return app.response_class(
             response=json.dumps({"metrics": metrics, "metric_statuses": statuses}),
@@ -464,33 +471,100 @@ def register_routes(app):
 
     @app.route("/api/metrics/history", methods=["GET"])
     def api_metrics_history():
-        """Get historical metrics data from CSV with optional period filtering"""
+        """Get historical metrics data with optional period filtering"""
         try:
-            csv_path = get_metrics_csv_path()
-            if not csv_path.exists():
+            store = get_metrics_store()
+            if not store.exists():
                 return app.response_class(
                     response=json.dumps({"data": []}),
                     status=200,
                     mimetype="application/json",
                 )
 
-            data = []
-            with open(csv_path, "r") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    data.append(row)
+            now = datetime.now()
+            cutoff = resolve_period_cutoff(request.args.get("period"), now=now)
+            since = request.args.get("since")
+            try:
+                since_time = datetime.fromisoformat(since) if since else None
+            except ValueError:
+                return app.response_class(
+                    response=json.dumps({"error": f"Invalid cursor: {since}"}),
+                    status=400,
+                    mimetype="application/json",
+                )
+            # The period's start lets clients polling with since= drop aged rows
+            start = cutoff.isoformat() if cutoff else None
+            span = (now - cutoff).total_seconds() if cutoff else None
+            points = request.args.get("points", type=int)
+            bucket = request.args.get("bucket")
+            bucket_seconds = parse_duration(bucket) if bucket else None
+            after = since_time
+            if since_time is not None:
+                if bucket_seconds:
+                    # Buckets sit on a fixed grid; send the one holding the
+                    # cursor again in full so a partial last bucket fills in
+                    width = int(bucket_seconds)
+                    epoch = int(since_time.timestamp())
+                    since_time = datetime.fromtimestamp(epoch - epoch % width)
+                    after = None
+                cutoff = since_time if cutoff is None else max(cutoff, since_time)
+            mode = request.args.get("mode", default="avg")
+            if mode not in DOWNSAMPLE_MODES:
+                return app.response_class(
+                    response=json.dumps({"error": f"Unknown mode: {mode}"}),
+                    status=400,
+                    mimetype="application/json",
+                )
 
-            # Apply period filtering if specified
-            period = request.args.get("period")
-            if period and period.lower() != "all":
-                data = filter_data_by_period(data, period)
+            # Read from the coarsest retention tier that still resolves the
+            # period, including on since= requests, so refreshed rows match
+            max_rows = get_history_max_rows()
+            tiers = get_retention_tiers()
+            chosen = select_tier(tiers, span, max_rows)
+            stores = get_tier_stores(tiers)
+
+            # The cursor is the newest raw sample; rows appended while this
+            # response streams are left for the next since= request
+            cursor = store.last_timestamp()
+            history = rows_between(
+                chained_rows(tiers[chosen::-1], stores[chosen::-1], cutoff),
+                after=after,
+                until=datetime.fromisoformat(cursor) if cursor else None,
+            )
 
-            # Return all filtered data
-            return app.response_class(
-                response=json.dumps({"data": data}),
+            # Bucket server-side so the response never exceeds max_rows points
+            width, rows = downsample(
+                history,
+                start_epoch=int(cutoff.timestamp()) if cutoff else None,
+                end_epoch=int(now.timestamp()),
+                max_points=max_rows,
+                points=points if points and points > 0 else None,
+                bucket_seconds=int(bucket_seconds) if bucket_seconds else None,
+                mode=mode,
+                column=request.args.get("column", default="cpu_percent"),
+            )
+
+            # Stream rows as they are read and bucketed instead of building
+            # the whole document in memory; legacy rows without stored rates
+            # get them from the (bucketed) counters on the way out
+            response = app.response_class(
+                response=stream_json(
+                    "data",
+                    fill_rates(rows),
+                    {"bucket_seconds": width, "cursor": cursor, "start": start},
+                ),
                 status=200,
                 mimetype="application/json",
             )
+            return conditional_response(
+                response,
+                [tier_store.version() for tier_store in stores],
+                last_modified=max(
+                    tier_store.path.stat().st_mtime
+                    for tier_store in stores
+                    if tier_store.exists()
+                ),
+            )
         except Exception as e:
             return app.response_class(
                 response=json.dumps({"error": str(e)}),
@@ -500,21 +574,43 @@ def register_routes(app):
 
     @app.route("/api/metrics/csv", methods=["GET"])
     def api_metrics_csv():
-        """Download the raw metrics CSV file"""
+        """Download the metrics history as CSV"""
         try:
-            csv_path = get_metrics_csv_path()
-            if not csv_path.exists():
+            store = get_metrics_store()
+            if not store.exists():
                 return app.response_class(
                     response="No metrics data available",
                     status=404,
                     mimetype="text/plain",
                 )
 
-            return send_file(
-                csv_path,
-                as_attachment=True,
-                download_name="metrics.csv",
+            # ?limit=N previews the newest rows without reading the whole history
+            limit = request.args.get("limit", type=int)
+            if limit is not None and limit > 0:
+                if isinstance(store, CsvMetricsStore):
+                    with open(store.path, "r", newline="") as f:
+                        header = f.readline()
+                    lines = tail_lines(store.path, limit)
+                    body = header + "".join(line + "\n" for line in lines)
+                else:
+                    body = store.csv_chunks(store.tail(limit))
+                return app.response_class(
+                    response=body, status=200, mimetype="text/csv"
+                )
+
+            if isinstance(store, CsvMetricsStore):
+                return send_file(
+                    store.path,
+                    as_attachment=True,
+                    download_name="metrics.csv",
+                    mimetype="text/csv",
+                )
+
+            return app.response_class(
+                response=store.csv_chunks(),
+                status=200,
                 mimetype="text/csv",
+                headers={"Content-Disposition": "attachment; filename=metrics.csv"},
             )
         except Exception as e:
             return app.response_class(
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Non-blocking CPU utilisation from /proc/stat counter deltas."""
+
+import threading
+from typing import Dict, Sequence, Tuple
+
+import psutil
+
+PROC_STAT = "/proc/stat"
+
+# user nice system idle iowait irq softirq steal; guest time is already in user
+COUNTER_FIELDS = 8
+IDLE, IOWAIT, STEAL = 3, 4, 7
+ZERO = (0,) * COUNTER_FIELDS
+
+
+def read_cpu_counters(path: str = PROC_STAT) -> Dict[str, Tuple[int, ...]]:
+    """Return jiffy counters for the aggregate ``cpu`` line and each core."""
+    counters = {}
+    with open(path, "r") as f:
+        for line in f:
+            if not line.startswith("cpu"):
+                break
+            name, *fields = line.split()
+            values = tuple(int(value) for value in fields[:COUNTER_FIELDS])
+            counters[name] = values + ZERO[len(values) :]
+    return counters
+
+
+def utilisation(previous: Sequence[int], current: Sequence[int]) -> Dict[str, float]:
+    """Busy, iowait and steal percentages between two counter readings."""
+    deltas = [max(0, now - before) for before, now in zip(previous, current)]
+    total = sum(deltas)
+    if not total:
+        return {"busy": 0.0, "iowait": 0.0, "steal": 0.0}
+    idle = deltas[IDLE] + deltas[IOWAIT]
+    return {
+        "busy": 100.0 * (total - idle) / total,
+        "iowait": 100.0 * deltas[IOWAIT] / total,
+        "steal": 100.0 * deltas[STEAL] / total,
+    }
+
+
+class CpuSampler:
+    """Keep the previous /proc/stat reading so each call reports the delta.
+
+    Unlike ``psutil.cpu_percent(interval=...)`` this never sleeps. The first
+    call reports utilisation since boot.
+    """
+
+    def __init__(self, path: str = PROC_STAT) -> None:
+        self.path = path
+        self._previous: Dict[str, Tuple[int, ...]] = {}
+        self._lock = threading.Lock()
+
+    def sample(self) -> Dict:
+        try:
+            current = read_cpu_counters(self.path)
+        except (OSError, ValueError):
+            return self._psutil_sample()
+
+        with self._lock:
+            previous, self._previous = self._previous, current
+
+        overall = utilisation(previous.get("cpu", ZERO), current.get("cpu", ZERO))
+        cores = [
+            round(utilisation(previous.get(name, ZERO), counters)["busy"], 1)
+            for name, counters in current.items()
+            if name != "cpu"
+        ]
+        return {
+            "total": round(overall["busy"], 1),
+            "iowait": round(overall["iowait"], 1),
+            "steal": round(overall["steal"], 1),
+            "cores": cores,
+        }
+
+    def _psutil_sample(self) -> Dict:
+        """Fallback for systems without /proc/stat; also non-blocking."""
+        times = psutil.cpu_times_percent(interval=None)
+        iowait = getattr(times, "iowait", 0.0)
+        return {
+            "total": round(max(0.0, 100.0 - times.idle - iowait), 1),
+            "iowait": round(iowait, 1),
+            "steal": round(getattr(times, "steal", 0.0), 1),
+            "cores": psutil.cpu_percent(interval=None, percpu=True),
+        }
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Server-side reduction of metrics history into bounded time buckets."""
+
+import math
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from widgets.metrics.storage import COUNTER_COLUMNS, format_value, parse_float, to_epoch
+
+DOWNSAMPLE_MODES = ("avg", "lttb")
+
+Bucket = Tuple[int, List[Tuple[int, Dict[str, str]]]]
+
+
+def group_buckets(
+    rows: Iterable[Dict[str, str]], width: int, origin: int
+) -> Iterator[Bucket]:
+    """Group time-ordered rows into ``(index, [(epoch, row), ...])`` buckets."""
+    current_index = None
+    members = []
+    for row in rows:
+        epoch = to_epoch(row.get("timestamp"))
+        if epoch is None:
+            continue
+        index = (epoch - origin) // width
+        if index != current_index and members:
+            yield current_index, members
+            members = []
+        current_index = index
+        members.append((epoch, row))
+    if members:
+        yield current_index, members
+
+
+def aggregate_bucket(
+    index: int, members: List[Tuple[int, Dict[str, str]]], width: int, origin: int
+) -> Dict[str, str]:
+    """Collapse a bucket into one row: avg/min/max for gauges, last for counters.
+
+    Every bucket gets the same keys, including single-sample ones, so the
+    row shape does not depend on how dense the data is.
+    """
+    last_row = members[-1][1]
+    row = {"timestamp": datetime.fromtimestamp(origin + index * width).isoformat()}
+    for column in last_row:
+        if column in ("timestamp", "source"):
+            continue
+        if column in COUNTER_COLUMNS:
+            row[column] = last_row[column]
+            continue
+        values = [parse_float(member[column]) for _, member in members]
+        values = [value for value in values if not math.isnan(value)]
+        if not values:
+            row[column] = row[f"{column}_min"] = row[f"{column}_max"] = ""
+            continue
+        row[column] = format_value(column, sum(values) / len(values))
+        row[f"{column}_min"] = format_value(column, min(values))
+        row[f"{column}_max"] = format_value(column, max(values))
+    row["source"] = last_row.get("source", "")
+    row["samples"] = str(len(members))
+    return row
+
+
+def average_buckets(
+    rows: Iterable[Dict[str, str]], width: int, origin: int
+) -> Iterator[Dict[str, str]]:
+    """Aggregated buckets, stamped with their start unless they hold one sample.
+
+    A lone sample keeps its own time, so short periods with narrow buckets
+    are not shifted; rollups stamp every bucket with its start instead.
+    """
+    for index, members in group_buckets(rows, width, origin):
+        row = aggregate_bucket(index, members, width, origin)
+        if len(members) == 1:
+            row["timestamp"] = members[0][1]["timestamp"]
+        yield row
+
+
+def lttb_buckets(
+    rows: Iterable[Dict[str, str]], width: int, origin: int, column: str
+) -> Iterator[Dict[str, str]]:
+    """Largest-Triangle-Three-Buckets over time buckets of ``column``.
+
+    Keeps one real row per bucket, chosen to preserve the visual shape of the
+    series, while holding only two buckets in memory at a time.
+    """
+
+    def point(member):
+        epoch, row = member
+        return epoch, parse_float(row.get(column)), row
+
+    selected = None
+    pending = None
+    for _, members in group_buckets(rows, width, origin):
+        points = [point(member) for member in members]
+        if selected is None:
+            selected = points[0]
+            yield selected[2]
+            pending = points[1:] or None
+            continue
+        if pending is None:
+            pending = points
+            continue
+
+        valid = [p for p in points if not math.isnan(p[1])]
+        if valid:
+            next_x = sum(p[0] for p in valid) / len(valid)
+            next_y = sum(p[1] for p in valid) / len(valid)
+        else:
+            next_x, next_y = points[-1][0], selected[1]
+
+        best = pending[0]
+        best_area = -1.0
+        for candidate in pending:
+            if math.isnan(candidate[1]):
+                continue
+            area = abs(
+                (selected[0] - next_x) * (candidate[1] - selected[1])
+                - (selected[0] - candidate[0]) * (next_y - selected[1])
+            )
+            if area > best_area:
+                best, best_area = candidate, area
+        yield best[2]
+        selected = best
+        pending = points
+
+    if pending:
+        yield pending[-1][2]
+
+
+def resolve_bucket_width(
+    span_seconds: float,
+    max_points: int,
+    points: Optional[int] = None,
+    bucket_seconds: Optional[int] = None,
+) -> int:
+    """Pick a bucket width that honours the request but never exceeds max_points."""
+    floor = math.ceil(span_seconds / max_points) if max_points > 0 else 1
+    if bucket_seconds:
+        width = bucket_seconds
+    elif points:
+        width = math.ceil(span_seconds / min(points, max_points))
+    else:
+        width = floor
+    return max(1, floor, width)
+
+
+def downsample(
+    rows: Iterable[Dict[str, str]],
+    *,
+    start_epoch: Optional[int],
+    end_epoch: int,
+    max_points: int,
+    points: Optional[int] = None,
+    bucket_seconds: Optional[int] = None,
+    mode: str = "avg",
+    column: str = "cpu_percent",
+) -> Tuple[int, Iterator[Dict[str, str]]]:
+    """Reduce rows to at most ``max_points`` buckets (plus LTTB end points).
+
+    Returns the bucket width in seconds and a generator of reduced rows. When
+    the start of the range is unknown (period "all"), the first row sets it.
+    Buckets are aligned to multiples of the width since the epoch, like the
+    retention rollups, so requests made at different times share a grid.
+    """
+    iterator = iter(rows)
+    if start_epoch is None:
+        first = next(iterator, None)
+        if first is None:
+            return 0, iter(())
+        start_epoch = to_epoch(first.get("timestamp")) or end_epoch
+        iterator = _prepend(first, iterator)
+
+    width = resolve_bucket_width(
+        max(1, end_epoch - start_epoch), max_points, points, bucket_seconds
+    )
+    if mode == "lttb":
+        return width, lttb_buckets(iterator, width, 0, column)
+    return width, average_buckets(iterator, width, 0)
+
+
+def _prepend(first, iterator):
+    yield first
+    yield from iterator
@@ -16,7 +16,8 @@ class MetricsWidget {
         default_metric: 'cpu_memory',
         default_period: 'all',
         height: '400px',
-        days: 30
+        days: 30,
+        refresh_seconds: 60
       }
     }
     this.config = this.buildConfig()
@@ -24,6 +25,10 @@ class MetricsWidget {
     this.tableManager = null
     this.currentView = null
     this.entries = []
+    this.cursor = null
+    this.windowStart = null
+    this.bucketSeconds = 0
+    this.refreshTimer = null
     this.selectedMetric = 'cpu_memory'
     this.selectedPeriod = 'all'
   }
@@ -117,6 +122,19 @@ class MetricsWidget {
     await this.loadData()
     this.setView(this.config.default || this.defaults.default)
     await this.loadHistory()
+
+    const refreshSeconds = Number(this.config.chart.refresh_seconds)
+    if (refreshSeconds > 0) {
+      this.refreshTimer = setInterval(() => this.refreshHistory(), refreshSeconds * 1000)
+    }
+  }
+
+  historyParams () {
+    const params = {}
+    if (this.selectedPeriod && this.selectedPeriod !== 'all') {
+      params.period = this.selectedPeriod
+    }
+    return params
   }
 
   async loadData () {
@@ -256,24 +274,67 @@ class MetricsWidget {
 
     this.tableManager.setEntries([])
     this.tableManager.setStatus('Loading metrics history…')
+    this.cursor = null
 
     try {
-      const url = new URL('api/metrics/history', window.location)
-      if (this.selectedPeriod && this.selectedPeriod !== 'all') {
-        url.searchParams.set('period', this.selectedPeriod)
+      const url = ChartManager.historyUrl('api/metrics/history', this.historyParams())
+
+      // Revalidate with the ETag; unchanged history comes back as a 304
+      const response = await fetch(url, { cache: 'no-cache' })
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`)
       }
-      url.searchParams.set('ts', Date.now())
+      const payload = await response.json()
+      this.entries = payload.data || []
+      this.cursor = payload.cursor || null
+      this.windowStart = payload.start || null
+      this.bucketSeconds = payload.bucket_seconds || 0
+      this.renderHistory()
+    } catch (error) {
+      console.error('Metrics history API call failed:', error)
+      this.tableManager.setStatus(`Unable to load metrics history: ${error.message}`)
+    }
+  }
+
+  // Fetch only the rows recorded after the cursor and fold them in
+  async refreshHistory () {
+    if (!this.tableManager) return
+    // Nothing recorded yet (or the last load failed); that load is cheap
+    if (!this.cursor) return this.loadHistory()
 
-      const response = await fetch(url, { cache: 'no-store' })
+    const cursor = this.cursor
+    const period = this.selectedPeriod
+    try {
+      // Same bucket width as the loaded rows; buckets share a fixed grid
+      const params = this.historyParams()
+      if (this.bucketSeconds > 0) {
+        params.bucket = `${this.bucketSeconds}s`
+      }
+      const url = ChartManager.historyUrl('api/metrics/history', params, cursor)
+      const response = await fetch(url, { cache: 'no-cache' })
       if (!response.ok) {
         throw new Error(`HTTP ${response.status}`)
       }
       const payload = await response.json()
-      const data = payload.data || []
-      this.entries = data
+      // A reload or another refresh finished while this one was in flight
+      if (cursor !== this.cursor || period !== this.selectedPeriod) return
+
+      const rows = payload.data || []
+      this.cursor = payload.cursor || this.cursor
+      this.windowStart = payload.start || null
+      const entries = ChartManager.mergeHistory(this.entries, rows, this.windowStart)
+      if (entries === this.entries) return
+      this.entries = entries
+      this.renderHistory()
+    } catch (error) {
+      console.error('Metrics history refresh failed:', error)
+    }
+  }
 
-      // Calculate deltas for I/O metrics using shared utility
-      const transformedEntries = ChartManager.calculateTableDeltas(this.entries)
+  renderHistory () {
+    try {
+      // I/O columns already arrive as per-minute rates from the history API
+      const transformedEntries = ChartManager.calculateTableEntries(this.entries)
 
       // Table gets limited entries, chart gets all entries
       const tableLimit = Number.isFinite(this.config.table?.max) ? this.config.table.max : this.defaults.table.max
@@ -285,8 +346,7 @@ class MetricsWidget {
         this.updateChart()
       }
     } catch (error) {
-      console.error('Metrics history API call failed:', error)
-      this.tableManager.setStatus(`Unable to load metrics history: ${error.message}`)
+      console.error('Metrics history render failed:', error)
     }
   }
 
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Reset-aware rates from cumulative disk and network counters.
+
+Rates are in MB per minute, the unit the metrics chart and table display.
+A counter that goes backwards (reboot, driver reload, device re-plugged) is
+treated as having restarted from zero, so its rate is the new value over
+the interval rather than a negative number.
+"""
+
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from widgets.metrics.storage import format_value, parse_float
+
+MB = 1024**2
+
+# rate column -> cumulative MB column it is derived from
+RATE_COLUMNS = {
+    "disk_read_rate": "disk_read_mb",
+    "disk_write_rate": "disk_write_mb",
+    "net_rx_rate": "net_rx_mb",
+    "net_tx_rate": "net_tx_mb",
+}
+
+Counters = Dict[str, Tuple[int, ...]]
+
+
+def counter_delta(previous: float, current: float) -> float:
+    """Increase of a monotonic counter, assuming a reset when it went down."""
+    return current - previous if current >= previous else current
+
+
+def is_whole_disk(name: str) -> bool:
+    """Partitions are already counted in their disk's totals."""
+    if not os.path.isdir("/sys/block"):
+        return True
+    return os.path.exists(f"/sys/block/{name}")
+
+
+class CounterRates:
+    """Keep the previous per-device counters and report rates between calls."""
+
+    def __init__(self) -> None:
+        self._previous: Counters = {}
+        self._previous_time: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def update(self, counters: Counters, now: float) -> Optional[Dict[str, Tuple]]:
+        """Return per-device MB/min rates, or None on the first reading.
+
+        Devices that were not present in the previous reading are skipped.
+        """
+        with self._lock:
+            previous, self._previous = self._previous, counters
+            previous_time, self._previous_time = self._previous_time, now
+
+        if previous_time is None or now <= previous_time:
+            return None
+        minutes = (now - previous_time) / 60
+        rates = {}
+        for name, values in counters.items():
+            before = previous.get(name)
+            if before is None:
+                continue
+            rates[name] = tuple(
+                counter_delta(old, new) / MB / minutes
+                for old, new in zip(before, values)
+            )
+        return rates
+
+
+def fill_rates(rows: Iterable[Dict[str, str]]) -> Iterator[Dict[str, str]]:
+    """Derive missing rate columns from cumulative counters in history rows.
+
+    Rows recorded before the collector stored rates only carry the
+    cumulative ``*_mb`` columns; compute their rates from the previous row
+    so clients never have to walk the raw counters themselves.
+    """
+    previous = None
+    for row in rows:
+        if all(row.get(column) for column in RATE_COLUMNS):
+            previous = row
+            yield row
+            continue
+
+        row = dict(row)
+        minutes = 0.0
+        if previous is not None:
+            elapsed = datetime.fromisoformat(row["timestamp"]) - datetime.fromisoformat(
+                previous["timestamp"]
+            )
+            minutes = elapsed.total_seconds() / 60
+        for rate_column, counter_column in RATE_COLUMNS.items():
+            if row.get(rate_column):
+                continue
+            current = parse_float(row.get(counter_column))
+            before = parse_float(previous.get(counter_column)) if previous else None
+            if minutes <= 0 or before is None:
+                row[rate_column] = ""
+                continue
+            rate = counter_delta(before, current) / minutes
+            row[rate_column] = format_value(rate_column, rate)
+        previous = row
+        yield row
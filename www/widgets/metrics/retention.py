@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Tiered retention and compaction for metrics history.
+
+Tiers are configured finest first under ``widgets.metrics.history.retention``:
+
+    retention:
+      - resolution: raw
+        keep: 48 hours
+      - resolution: 1 minute
+        keep: 30 days
+      - resolution: 1 hour
+        keep: forever
+
+Samples that age out of a tier are rolled up into the next tier's buckets
+(average for gauges, last value for counters) and pruned from the source.
+Each tier lives in its own store next to the raw history, e.g.
+``metrics.1m.csv`` and ``metrics.1h.csv``.
+"""
+
+import fcntl
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from pytimeparse import parse as parse_duration
+
+from widgets.metrics.downsample import aggregate_bucket, group_buckets
+from widgets.metrics.storage import MetricsStore, parse_float
+
+logger = logging.getLogger(__name__)
+
+FOREVER = ("forever", "all", "")
+UNITS = (("d", 86400), ("h", 3600), ("m", 60), ("s", 1))
+
+
+class RetentionTier:
+    """A history tier: bucket resolution in seconds (0 for raw) and keep window."""
+
+    __slots__ = ("resolution", "keep")
+
+    def __init__(self, resolution: int, keep: Optional[int]) -> None:
+        self.resolution = resolution
+        self.keep = keep
+
+    @property
+    def label(self) -> str:
+        if not self.resolution:
+            return "raw"
+        for suffix, seconds in UNITS:
+            if self.resolution % seconds == 0:
+                return f"{self.resolution // seconds}{suffix}"
+        return f"{self.resolution}s"
+
+    def __repr__(self) -> str:
+        keep = f"{self.keep}s" if self.keep else "forever"
+        return f"RetentionTier({self.label}, keep={keep})"
+
+
+def parse_retention(entries: List[Dict]) -> List[RetentionTier]:
+    """Build tiers from config, always starting with the raw tier."""
+    if not entries:
+        return [RetentionTier(0, None)]
+
+    tiers = []
+    for position, entry in enumerate(entries):
+        resolution_text = str(entry.get("resolution", "raw")).strip().lower()
+        keep_text = str(entry.get("keep") or "").strip().lower()
+
+        if resolution_text == "raw":
+            if position != 0:
+                raise ValueError("Only the first retention tier may be raw")
+            resolution = 0
+        else:
+            resolution = int(parse_duration(resolution_text) or 0)
+            if resolution <= 0:
+                raise ValueError(f"Invalid retention resolution: {resolution_text}")
+            if tiers and resolution <= tiers[-1].resolution:
+                raise ValueError("Retention tiers must get coarser")
+
+        keep = None if keep_text in FOREVER else int(parse_duration(keep_text) or 0)
+        if keep is not None and keep <= 0:
+            raise ValueError(f"Invalid retention keep window: {keep_text}")
+        tiers.append(RetentionTier(resolution, keep))
+
+    if tiers[0].resolution:
+        tiers.insert(0, RetentionTier(0, None))
+    return tiers
+
+
+def tier_path(base: Path, tier: RetentionTier) -> Path:
+    if not tier.resolution:
+        return base
+    return base.with_name(f"{base.stem}.{tier.label}{base.suffix}")
+
+
+def rollup(
+    source: MetricsStore, target: MetricsStore, resolution: int, boundary: int
+) -> int:
+    """Aggregate complete source buckets older than ``boundary`` into target."""
+    watermark = target.last_epoch()
+    start = None
+    if watermark is not None:
+        start = datetime.fromtimestamp((watermark // resolution + 1) * resolution)
+
+    def samples():
+        rows = source.rows(cutoff=start)
+        for index, members in group_buckets(rows, resolution, 0):
+            if index * resolution >= boundary:
+                break
+            row = aggregate_bucket(index, members, resolution, 0)
+            values = {column: parse_float(row.get(column)) for column in target.columns}
+            yield index * resolution, values, "rollup"
+
+    return target.extend(samples())
+
+
+def compact(
+    tiers: List[RetentionTier],
+    stores: List[MetricsStore],
+    now: datetime,
+    lock_path: Optional[Path] = None,
+) -> bool:
+    """Roll aged samples into coarser tiers and prune them from finer ones.
+
+    Returns False when another process holds the compaction lock.
+    """
+    lock_handle = None
+    if lock_path is not None:
+        lock_handle = open(lock_path, "a")
+        try:
+            fcntl.flock(lock_handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_handle.close()
+            return False
+
+    try:
+        now_epoch = int(now.timestamp())
+        for position, tier in enumerate(tiers):
+            if tier.keep is None:
+                continue
+            store = stores[position]
+            boundary = now_epoch - tier.keep
+            if position + 1 < len(tiers):
+                resolution = tiers[position + 1].resolution
+                boundary = boundary // resolution * resolution
+                rolled = rollup(store, stores[position + 1], resolution, boundary)
+                if rolled:
+                    logger.info(
+                        f"Rolled {rolled} {tiers[position + 1].label} metrics "
+                        f"buckets out of {tier.label} history"
+                    )
+            freed = store.prune(datetime.fromtimestamp(boundary))
+            if freed:
+                logger.info(f"Pruned {freed} bytes from {tier.label} metrics history")
+        return True
+    finally:
+        if lock_handle is not None:
+            lock_handle.close()
+
+
+def select_tier(
+    tiers: List[RetentionTier], span_seconds: Optional[float], max_points: int
+) -> int:
+    """Pick the coarsest tier that still resolves ``max_points`` over the span."""
+    if span_seconds is None:
+        return len(tiers) - 1
+    limit = span_seconds / max(1, max_points)
+    chosen = 0
+    for position, tier in enumerate(tiers):
+        if tier.resolution <= limit:
+            chosen = position
+    return chosen
+
+
+def chained_rows(
+    tiers: List[RetentionTier],
+    stores: List[MetricsStore],
+    cutoff: Optional[datetime],
+) -> Iterator[Dict[str, str]]:
+    """Yield rows from the coarsest given tier, then newer rows from finer ones.
+
+    ``tiers`` and ``stores`` are ordered coarse to fine. Finer tiers only hold
+    data that has not been rolled up yet, so each one resumes after the end
+    of the previous tier's last bucket.
+    """
+    start = cutoff
+    for tier, store in zip(tiers, stores):
+        yield from store.rows(cutoff=start)
+        last = store.last_epoch()
+        if last is None:
+            continue
+        resume = datetime.fromtimestamp(last + max(1, tier.resolution))
+        start = resume if start is None else max(start, resume)
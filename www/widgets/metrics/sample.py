@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Typed metrics sample produced once per collection.
+
+Collection fills a ``MetricSample`` with raw numbers. History, alerting and
+the JSON API read those numbers directly; display strings such as
+``"3.2GB / 16.0GB"`` are only built in ``display()`` for the dashboard.
+"""
+
+import math
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+GB = 1024**3
+TB = 1024**4
+MB = 1024**2
+
+
+def format_uptime(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "Unknown"
+    days = int(seconds // 86400)
+    hours = int((seconds % 86400) // 3600)
+    minutes = int((seconds % 3600) // 60)
+    if days > 0:
+        return f"{days}d {hours}h {minutes}m"
+    if hours > 0:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
+
+
+def sum_rates(rates: Optional[Dict[str, Tuple]], position: int) -> float:
+    """Total one direction of per-device rates; NaN before the first delta."""
+    if rates is None:
+        return math.nan
+    return sum(values[position] for values in rates.values())
+
+
+class MetricSample:
+    """Numeric system metrics from a single collection.
+
+    Sizes are bytes, utilisation and usage are percentages, and I/O rates are
+    MB per minute keyed by disk or interface. Optional fields are None when
+    the source is unavailable (no sensor, storage not mounted, no previous
+    reading to take a rate from).
+    """
+
+    __slots__ = (
+        "timestamp",
+        "uptime_seconds",
+        "load",
+        "cpu_total",
+        "cpu_iowait",
+        "cpu_steal",
+        "cpu_cores",
+        "memory_used",
+        "memory_total",
+        "memory_percent",
+        "temp_c",
+        "disk_used",
+        "disk_total",
+        "disk_percent",
+        "storage_used",
+        "storage_total",
+        "storage_percent",
+        "disk_read_bytes",
+        "disk_write_bytes",
+        "net_rx_bytes",
+        "net_tx_bytes",
+        "disk_rates",
+        "net_rates",
+    )
+
+    def __init__(
+        self,
+        timestamp: datetime,
+        uptime_seconds: Optional[float],
+        load: Sequence[float],
+        cpu: Dict,
+        memory_used: int,
+        memory_total: int,
+        memory_percent: float,
+        temp_c: Optional[float],
+        disk_used: int,
+        disk_total: int,
+        disk_percent: float,
+        storage_used: Optional[int] = None,
+        storage_total: Optional[int] = None,
+        storage_percent: Optional[float] = None,
+        disk_read_bytes: int = 0,
+        disk_write_bytes: int = 0,
+        net_rx_bytes: int = 0,
+        net_tx_bytes: int = 0,
+        disk_rates: Optional[Dict[str, Tuple[float, float]]] = None,
+        net_rates: Optional[Dict[str, Tuple[float, float]]] = None,
+    ) -> None:
+        self.timestamp = timestamp
+        self.uptime_seconds = uptime_seconds
+        self.load = tuple(load)
+        self.cpu_total = cpu["total"]
+        self.cpu_iowait = cpu["iowait"]
+        self.cpu_steal = cpu["steal"]
+        self.cpu_cores = tuple(cpu["cores"])
+        self.memory_used = memory_used
+        self.memory_total = memory_total
+        self.memory_percent = memory_percent
+        self.temp_c = temp_c
+        self.disk_used = disk_used
+        self.disk_total = disk_total
+        self.disk_percent = disk_percent
+        self.storage_used = storage_used
+        self.storage_total = storage_total
+        self.storage_percent = storage_percent
+        self.disk_read_bytes = disk_read_bytes
+        self.disk_write_bytes = disk_write_bytes
+        self.net_rx_bytes = net_rx_bytes
+        self.net_tx_bytes = net_tx_bytes
+        self.disk_rates = disk_rates
+        self.net_rates = net_rates
+
+    @property
+    def memory_used_percent(self) -> float:
+        """Used over total memory, as charted in history."""
+        if not self.memory_total:
+            return 0.0
+        return self.memory_used / self.memory_total * 100
+
+    def history_values(self) -> Dict[str, float]:
+        """Values for the history store, keyed by metrics column."""
+        return {
+            "cpu_percent": self.cpu_total,
+            "memory_percent": self.memory_used_percent,
+            "disk_read_mb": self.disk_read_bytes / MB,
+            "disk_write_mb": self.disk_write_bytes / MB,
+            "net_rx_mb": self.net_rx_bytes / MB,
+            "net_tx_mb": self.net_tx_bytes / MB,
+            "load_1min": self.load[0],
+            "temp_c": self.temp_c or 0.0,
+            "cpu_iowait": self.cpu_iowait,
+            "cpu_steal": self.cpu_steal,
+            "disk_read_rate": sum_rates(self.disk_rates, 0),
+            "disk_write_rate": sum_rates(self.disk_rates, 1),
+            "net_rx_rate": sum_rates(self.net_rates, 0),
+            "net_tx_rate": sum_rates(self.net_rates, 1),
+        }
+
+    def display(self) -> Dict:
+        """Dashboard representation with human-readable strings."""
+        if self.storage_total is None:
+            storage = "Not mounted"
+        else:
+            storage = (
+                f"{self.storage_used / TB:.1f}TB / "
+                f"{self.storage_total / TB:.1f}TB ({self.storage_percent:.0f}%)"
+            )
+        return {
+            "uptime": format_uptime(self.uptime_seconds),
+            "load": " ".join(f"{value:.2f}" for value in self.load),
+            "memory": f"{self.memory_used / GB:.1f}GB / {self.memory_total / GB:.1f}GB",
+            "temp": "Unknown" if self.temp_c is None else f"{self.temp_c:.1f}°C",
+            "disk": (
+                f"{self.disk_used / GB:.1f}GB / {self.disk_total / GB:.1f}GB "
+                f"({self.disk_percent:.0f}%)"
+            ),
+            "storage": storage,
+            "cpu": {
+                "total": self.cpu_total,
+                "iowait": self.cpu_iowait,
+                "steal": self.cpu_steal,
+                "cores": list(self.cpu_cores),
+            },
+            "io": {
+                "disks": {
+                    name: {"read": round(read, 3), "write": round(write, 3)}
+                    for name, (read, write) in (self.disk_rates or {}).items()
+                },
+                "interfaces": {
+                    name: {"rx": round(rx, 3), "tx": round(tx, 3)}
+                    for name, (rx, tx) in (self.net_rates or {}).items()
+                },
+            },
+            "status": "Running",
+            "lastUpdated": self.timestamp.isoformat(),
+        }
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Shared metrics sampler that serves one snapshot to every reader."""
+
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import Callable, Mapping, Optional, Tuple
+
+from widgets.metrics.sample import MetricSample
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsSnapshot:
+    """Immutable result of one metrics collection."""
+
+    __slots__ = ("sample", "statuses", "collected_at")
+
+    def __init__(
+        self, sample: MetricSample, statuses: Mapping, collected_at: float
+    ) -> None:
+        object.__setattr__(self, "sample", sample)
+        object.__setattr__(self, "statuses", MappingProxyType(dict(statuses)))
+        object.__setattr__(self, "collected_at", collected_at)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MetricsSnapshot is immutable")
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.collected_at
+
+
+class MetricsSampler:
+    """Own metrics collection and publish the latest snapshot.
+
+    Readers get the current snapshot while it is younger than ``max_age``.
+    Otherwise one caller collects a new sample while concurrent callers wait
+    for it, and ``on_sample`` runs exactly once per new snapshot so history
+    writes are not duplicated across readers.
+    """
+
+    def __init__(
+        self,
+        collect: Callable[[], Tuple[Optional[MetricSample], dict]],
+        on_sample: Optional[Callable[[MetricsSnapshot, str], None]] = None,
+    ) -> None:
+        self._collect = collect
+        self._on_sample = on_sample
+        self._snapshot: Optional[MetricsSnapshot] = None
+        self._lock = threading.Lock()
+
+    def peek(self) -> Optional[MetricsSnapshot]:
+        """Return the latest snapshot without collecting."""
+        return self._snapshot
+
+    def latest(
+        self, max_age: float, source: str = "refresh"
+    ) -> Optional[MetricsSnapshot]:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.age < max_age:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age < max_age:
+                return snapshot
+
+            sample, statuses = self._collect()
+            if sample is None:
+                return snapshot
+            snapshot = MetricsSnapshot(sample, statuses, time.monotonic())
+            self._snapshot = snapshot
+
+        if self._on_sample:
+            try:
+                self._on_sample(snapshot, source)
+            except Exception as e:
+                logger.error(f"Error recording metrics sample: {e}")
+        return snapshot
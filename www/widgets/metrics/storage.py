@@ -0,0 +1,848 @@
+#!/usr/bin/env python3
+"""Storage engines for metrics history.
+
+Two engines share one interface:
+
+- ``csv``: the original append-only ``metrics.csv`` text file.
+- ``ring``: a preallocated, memory-mapped ring buffer of fixed-width binary
+  records (epoch-second timestamp, float32 columns, source code byte).
+
+The ring file is self-describing: its header records the capacity and the
+column names, so older files keep working when columns are added later.
+
+Convert an existing CSV history once with:
+
+    python -m widgets.metrics.storage convert data/metrics.csv
+"""
+
+import argparse
+import bisect
+import csv
+import fcntl
+import io
+import logging
+import math
+import mmap
+import os
+import shutil
+import struct
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+METRIC_COLUMNS = [
+    "cpu_percent",
+    "memory_percent",
+    "disk_read_mb",
+    "disk_write_mb",
+    "net_rx_mb",
+    "net_tx_mb",
+    "load_1min",
+    "temp_c",
+    "cpu_iowait",
+    "cpu_steal",
+    "disk_read_rate",
+    "disk_write_rate",
+    "net_rx_rate",
+    "net_tx_rate",
+]
+COUNTER_COLUMNS = {"disk_read_mb", "disk_write_mb", "net_rx_mb", "net_tx_mb"}
+COLUMN_DECIMALS = {
+    "load_1min": 2,
+    "disk_read_rate": 3,
+    "disk_write_rate": 3,
+    "net_rx_rate": 3,
+    "net_tx_rate": 3,
+}
+SOURCE_CODES = ["", "daemon", "refresh", "import", "rollup"]
+
+DEFAULT_RING_CAPACITY = 527040  # 366 days of 60s samples
+
+logger = logging.getLogger(__name__)
+
+
+def format_value(column: str, value: Optional[float]) -> str:
+    """Format a metric value the way the CSV history always has."""
+    if value is None or math.isnan(value):
+        return ""
+    return f"{value:.{COLUMN_DECIMALS.get(column, 1)}f}"
+
+
+def to_epoch(value: Optional[str]) -> Optional[int]:
+    """Convert a history timestamp (naive local ISO string) to epoch seconds."""
+    if not value:
+        return None
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except ValueError:
+        return None
+
+
+def parse_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class MetricsStore:
+    """Interface shared by the metrics history engines."""
+
+    engine = ""
+
+    def __init__(self, path: Path, columns: Optional[List[str]] = None) -> None:
+        self.path = Path(path)
+        self.columns = list(columns or METRIC_COLUMNS)
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def append(
+        self, timestamp: datetime, values: Dict[str, float], source: str
+    ) -> None:
+        """Store one sample."""
+        raise NotImplementedError
+
+    def extend(self, samples: Iterable[Tuple[int, Dict[str, float], str]]) -> int:
+        """Store ``(epoch, values, source)`` samples; returns the count written."""
+        raise NotImplementedError
+
+    def rows(self, cutoff: Optional[datetime] = None) -> Iterator[Dict[str, str]]:
+        """Yield samples oldest first as CSV-style string dicts."""
+        raise NotImplementedError
+
+    def last_epoch(self) -> Optional[int]:
+        """Epoch seconds of the newest sample, or None when empty."""
+        raise NotImplementedError
+
+    def last_timestamp(self) -> Optional[str]:
+        """Timestamp of the newest sample, formatted as ``rows`` reports it."""
+        epoch = self.last_epoch()
+        return None if epoch is None else datetime.fromtimestamp(epoch).isoformat()
+
+    def version(self) -> Tuple:
+        """Cheap token that changes whenever the stored history changes."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return (0, 0)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def prune(self, before: datetime) -> int:
+        """Drop samples older than ``before``; returns how many bytes were freed."""
+        raise NotImplementedError
+
+    def ensure_columns(self, columns: List[str]) -> None:
+        """Add missing columns to the stored history, keeping existing data."""
+        raise NotImplementedError
+
+    def tail(self, count: int) -> Iterator[Dict[str, str]]:
+        """Yield the newest ``count`` samples, oldest first."""
+        yield from deque(self.rows(), maxlen=count)
+
+    def csv_chunks(
+        self, rows: Optional[Iterable[Dict[str, str]]] = None
+    ) -> Iterator[str]:
+        """Yield the history (or the given rows) rendered as CSV text."""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(
+            buffer, fieldnames=["timestamp", *self.columns, "source"]
+        )
+        writer.writeheader()
+        for row in self.rows() if rows is None else rows:
+            writer.writerow(row)
+            if buffer.tell() > 65536:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+
+class SparseIndex:
+    """Sidecar index mapping timestamps to byte offsets in a CSV history.
+
+    One ``(epoch, offset)`` entry is kept for roughly every ``STRIDE`` bytes
+    of data. The header records the CSV inode and how far the index covers,
+    so a replaced or truncated CSV triggers a rebuild and rows appended by
+    other writers are picked up by scanning only the uncovered tail.
+    """
+
+    MAGIC = b"MONIDX01"
+    HEADER = struct.Struct("<8sQQ")
+    ENTRY = struct.Struct("<qQ")
+    STRIDE = 64 * 1024
+
+    def __init__(self, path: Path, data_path: Path) -> None:
+        self.path = Path(path)
+        self.data_path = Path(data_path)
+        self._cache_key = None
+        self._inode: Optional[int] = None
+        self._epochs: List[int] = []
+        self._offsets: List[int] = []
+        self._covered = 0
+
+    def _load(self, inode: int, size: int) -> bool:
+        """Load entries from disk, returning False when missing or stale."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return False
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if key == self._cache_key:
+            return self._inode == inode and self._covered <= size
+
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if len(data) < self.HEADER.size:
+            return False
+        magic, data_inode, covered = self.HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC or data_inode != inode or covered > size:
+            return False
+
+        body = memoryview(data)[self.HEADER.size :]
+        body = body[: len(body) - len(body) % self.ENTRY.size]
+        entries = list(self.ENTRY.iter_unpack(body))
+        self._epochs = [epoch for epoch, _ in entries]
+        self._offsets = [offset for _, offset in entries]
+        self._covered = covered
+        self._inode = inode
+        self._cache_key = key
+        return True
+
+    def _remember(self, inode: int) -> None:
+        """Mark the in-memory entries as matching the index file just written."""
+        stat = self.path.stat()
+        self._inode = inode
+        self._cache_key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _scan(self, start: int) -> Iterator[Tuple[int, int]]:
+        """Yield ``(epoch, offset)`` entries for data from ``start`` onward."""
+        last = self._offsets[-1] if self._offsets else None
+        with open(self.data_path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # row still being written
+                if last is None or offset - last >= self.STRIDE:
+                    epoch = to_epoch(line.split(b",", 1)[0].decode("ascii", "ignore"))
+                    if epoch is not None:
+                        last = offset
+                        yield epoch, offset
+                offset += len(line)
+            self._covered = offset
+
+    def _header_end(self) -> int:
+        with open(self.data_path, "rb") as f:
+            return len(f.readline())
+
+    def rebuild(self) -> None:
+        stat = self.data_path.stat()
+        self._epochs, self._offsets = [], []
+        for epoch, offset in self._scan(self._header_end()):
+            self._epochs.append(epoch)
+            self._offsets.append(offset)
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, stat.st_ino, self._covered))
+            for entry in zip(self._epochs, self._offsets):
+                f.write(self.ENTRY.pack(*entry))
+        os.replace(tmp_path, self.path)
+        self._remember(stat.st_ino)
+
+    def _extend(self, inode: int) -> None:
+        """Index rows appended beyond the covered offset."""
+        entries = list(self._scan(self._covered))
+        with open(self.path, "r+b") as f:
+            f.write(self.HEADER.pack(self.MAGIC, inode, self._covered))
+            f.seek(0, os.SEEK_END)
+            for epoch, offset in entries:
+                f.write(self.ENTRY.pack(epoch, offset))
+                self._epochs.append(epoch)
+                self._offsets.append(offset)
+        self._remember(inode)
+
+    def record(self, entries: List[Tuple[int, int]], end: int) -> None:
+        """Note ``(epoch, offset)`` rows appended up to ``end``.
+
+        The caller holds the data file lock.
+        """
+        stat = self.data_path.stat()
+        if not self._load(stat.st_ino, stat.st_size):
+            return  # rebuilt lazily on the next lookup
+        with open(self.path, "r+b") as f:
+            f.seek(0, os.SEEK_END)
+            for epoch, offset in entries:
+                if not self._offsets or offset - self._offsets[-1] >= self.STRIDE:
+                    f.write(self.ENTRY.pack(epoch, offset))
+                    self._epochs.append(epoch)
+                    self._offsets.append(offset)
+            f.seek(0)
+            f.write(self.HEADER.pack(self.MAGIC, stat.st_ino, end))
+        self._covered = end
+        self._remember(stat.st_ino)
+
+    def lookup(self, cutoff_epoch: int) -> int:
+        """Return a byte offset at or before the first row >= cutoff."""
+        stat = self.data_path.stat()
+        if not self._load(stat.st_ino, stat.st_size):
+            self.rebuild()
+        elif stat.st_size - self._covered > self.STRIDE:
+            self._extend(stat.st_ino)
+
+        # The last entry before the cutoff; rows() drops anything older, and
+        # a few rows written slightly out of order are still included
+        position = bisect.bisect_left(self._epochs, cutoff_epoch) - 1
+        if position < 0:
+            return self._header_end()
+        return self._offsets[position]
+
+
+class CsvMetricsStore(MetricsStore):
+    """Append-only CSV text history with a sparse timestamp index."""
+
+    engine = "csv"
+
+    def __init__(self, path: Path, columns: Optional[List[str]] = None) -> None:
+        super().__init__(path, columns)
+        self.columns = self._read_columns() or self.columns
+        self.index = SparseIndex(self.path.with_name(self.path.name + ".idx"), path)
+
+    def _read_columns(self) -> Optional[List[str]]:
+        if not self.path.exists():
+            return None
+        with open(self.path, "r", newline="") as f:
+            header = next(csv.reader(f), None)
+        if not header:
+            return None
+        return [name for name in header if name not in ("timestamp", "source")]
+
+    def _format_row(self, timestamp: str, values: Dict[str, float], source: str):
+        buffer = io.StringIO()
+        row = [timestamp]
+        row.extend(format_value(column, values.get(column)) for column in self.columns)
+        row.append(source)
+        csv.writer(buffer).writerow(row)
+        return buffer.getvalue().encode("utf-8")
+
+    def _open_locked(self):
+        """Open the live CSV for appending under an exclusive flock.
+
+        Compaction replaces the file, so retry until the locked handle still
+        refers to the path's current inode.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            handle = open(self.path, "ab")
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                if os.fstat(handle.fileno()).st_ino == self.path.stat().st_ino:
+                    return handle
+            except FileNotFoundError:
+                pass
+            handle.close()
+
+    def _write(self, lines: List[Tuple[int, bytes]]) -> int:
+        if not lines:
+            return 0
+        with self._lock:
+            handle = self._open_locked()
+            try:
+                offset = handle.seek(0, os.SEEK_END)
+                if offset == 0:
+                    header = io.StringIO()
+                    csv.writer(header).writerow(["timestamp", *self.columns, "source"])
+                    offset = handle.write(header.getvalue().encode("utf-8"))
+                entries = []
+                for epoch, line in lines:
+                    entries.append((epoch, offset))
+                    offset += len(line)
+                handle.write(b"".join(line for _, line in lines))
+                handle.flush()
+                try:
+                    self.index.record(entries, offset)
+                except OSError as exc:
+                    logger.warning(f"Metrics index update failed: {exc}")
+            finally:
+                handle.close()
+        return len(lines)
+
+    def append(
+        self, timestamp: datetime, values: Dict[str, float], source: str
+    ) -> None:
+        line = self._format_row(timestamp.isoformat(), values, source)
+        self._write([(int(timestamp.timestamp()), line)])
+
+    def extend(self, samples: Iterable[Tuple[int, Dict[str, float], str]]) -> int:
+        written = 0
+        batch = []
+        for epoch, values, source in samples:
+            timestamp = datetime.fromtimestamp(epoch).isoformat()
+            batch.append((epoch, self._format_row(timestamp, values, source)))
+            if len(batch) >= 4096:
+                written += self._write(batch)
+                batch = []
+        return written + self._write(batch)
+
+    def last_timestamp(self) -> Optional[str]:
+        try:
+            with open(self.path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - 4096))
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        for line in reversed(lines):
+            timestamp = line.split(b",", 1)[0].decode("ascii", "ignore")
+            if to_epoch(timestamp) is not None:
+                return timestamp
+        return None
+
+    def last_epoch(self) -> Optional[int]:
+        return to_epoch(self.last_timestamp())
+
+    def ensure_columns(self, columns: List[str]) -> None:
+        missing = [column for column in columns if column not in self.columns]
+        if not missing:
+            return
+        if not self.exists():
+            self.columns = self.columns + missing
+            return
+
+        with self._lock:
+            handle = self._open_locked()
+            try:
+                current = self._read_columns() or []
+                upgraded = current + [c for c in columns if c not in current]
+                if upgraded != current:
+                    tmp_path = self.path.with_name(self.path.name + ".tmp")
+                    fieldnames = ["timestamp", *upgraded, "source"]
+                    with open(self.path, "r", newline="") as source:
+                        with open(tmp_path, "w", newline="") as target:
+                            writer = csv.DictWriter(target, fieldnames=fieldnames)
+                            writer.writeheader()
+                            writer.writerows(csv.DictReader(source))
+                    os.replace(tmp_path, self.path)
+                    logger.info(f"Added columns {missing} to {self.path}")
+                self.columns = upgraded
+            finally:
+                handle.close()
+
+    def _lookup(self, cutoff_epoch: int) -> int:
+        with self._lock, open(self.path, "rb") as f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            try:
+                return self.index.lookup(cutoff_epoch)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def prune(self, before: datetime) -> int:
+        """Rewrite the CSV without rows older than ``before``.
+
+        The bulk copy runs without holding the writer lock; only the bytes
+        appended during the copy are moved across while writers wait.
+        """
+        if not self.path.exists():
+            return 0
+        before_epoch = int(before.timestamp())
+        offset = self._lookup(before_epoch)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+
+        with open(self.path, "rb") as source:
+            header = source.readline()
+            start = max(offset, len(header))
+            source.seek(start)
+            for line in source:
+                epoch = to_epoch(line.split(b",", 1)[0].decode("ascii", "ignore"))
+                if epoch is not None and epoch >= before_epoch:
+                    break
+                start += len(line)
+            if start <= len(header):
+                return 0
+            source.seek(start)
+            with open(tmp_path, "wb") as target:
+                target.write(header)
+                shutil.copyfileobj(source, target)
+                copied = source.tell()
+
+        with self._lock:
+            handle = self._open_locked()
+            try:
+                with open(self.path, "rb") as source, open(tmp_path, "ab") as target:
+                    source.seek(copied)
+                    shutil.copyfileobj(source, target)
+                os.replace(tmp_path, self.path)
+            finally:
+                handle.close()
+        return start - len(header)
+
+    def rows(self, cutoff: Optional[datetime] = None) -> Iterator[Dict[str, str]]:
+        if not self.path.exists():
+            return
+        if cutoff is None:
+            with open(self.path, "r", newline="") as f:
+                yield from csv.DictReader(f)
+            return
+
+        cutoff_epoch = int(cutoff.timestamp())
+        offset = self._lookup(cutoff_epoch)
+        with open(self.path, "rb") as raw:
+            header = next(csv.reader([raw.readline().decode("utf-8")]), [])
+            raw.seek(offset)
+            reached = False
+            for values in csv.reader(io.TextIOWrapper(raw, newline="")):
+                row = dict(zip(header, values))
+                if not reached:
+                    row_epoch = to_epoch(row.get("timestamp"))
+                    if row_epoch is None or row_epoch < cutoff_epoch:
+                        continue
+                    reached = True
+                yield row
+
+
+class RingMetricsStore(MetricsStore):
+    """Preallocated memory-mapped ring buffer of fixed-width samples.
+
+    Layout: a ``HEADER_SIZE`` byte header (magic, version, column count,
+    record size, capacity, next write slot, total samples written, column
+    names) followed by ``capacity`` records of ``<q{n}fB``.
+    """
+
+    engine = "ring"
+    MAGIC = b"MONRING1"
+    VERSION = 1
+    HEADER = struct.Struct("<8sHHIQQQ")
+    HEADER_SIZE = 512
+    STATE = struct.Struct("<QQ")
+    STATE_OFFSET = 24
+    TIMESTAMP = struct.Struct("<q")
+
+    def __init__(
+        self,
+        path: Path,
+        columns: Optional[List[str]] = None,
+        capacity: int = DEFAULT_RING_CAPACITY,
+    ) -> None:
+        super().__init__(path, columns)
+        self.capacity = capacity if capacity > 0 else DEFAULT_RING_CAPACITY
+        self._file = None
+        self._map = None
+        self._inode = None
+        self._record = None
+
+    # -- file management -------------------------------------------------
+
+    def _record_struct(self, column_count: int) -> struct.Struct:
+        return struct.Struct("<q" + "f" * column_count + "B")
+
+    def _create(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        names = "\0".join(self.columns).encode("utf-8")
+        if self.HEADER.size + len(names) > self.HEADER_SIZE:
+            raise ValueError("Too many metric columns for ring header")
+        record = self._record_struct(len(self.columns))
+        size = self.HEADER_SIZE + self.capacity * record.size
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            header = self.HEADER.pack(
+                self.MAGIC,
+                self.VERSION,
+                len(self.columns),
+                record.size,
+                self.capacity,
+                0,
+                0,
+            )
+            f.write(header + names)
+            f.truncate(size)
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(f.fileno(), 0, size)
+        os.replace(tmp_path, self.path)
+
+    def _close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._map = self._file = self._inode = None
+
+    def _open(self, create: bool) -> bool:
+        """Map the ring file, reopening it if it was replaced on disk."""
+        try:
+            inode = self.path.stat().st_ino
+        except FileNotFoundError:
+            if not create:
+                self._close()
+                return False
+            self._create()
+            inode = self.path.stat().st_ino
+
+        if self._map is not None and inode == self._inode:
+            return True
+
+        self._close()
+        handle = open(self.path, "r+b")
+        mapped = mmap.mmap(handle.fileno(), 0)
+        magic, version, column_count, record_size, capacity, _, _ = (
+            self.HEADER.unpack_from(mapped, 0)
+        )
+        if magic != self.MAGIC or version != self.VERSION:
+            mapped.close()
+            handle.close()
+            raise ValueError(f"{self.path} is not a metrics ring file")
+
+        names = bytes(mapped[self.HEADER.size : self.HEADER_SIZE]).rstrip(b"\0")
+        self.columns = names.decode("utf-8").split("\0")[:column_count]
+        self.capacity = capacity
+        self._record = self._record_struct(column_count)
+        if self._record.size != record_size:
+            mapped.close()
+            handle.close()
+            raise ValueError(f"{self.path} has an unexpected record size")
+
+        self._file, self._map, self._inode = handle, mapped, inode
+        return True
+
+    def _current(self) -> bool:
+        """Whether the open mapping is still the file at ``path``."""
+        try:
+            return self.path.stat().st_ino == self._inode
+        except FileNotFoundError:
+            return False
+
+    def _state(self) -> Tuple[int, int]:
+        return self.STATE.unpack_from(self._map, self.STATE_OFFSET)
+
+    def _offset(self, slot: int) -> int:
+        return self.HEADER_SIZE + slot * self._record.size
+
+    # -- writing ---------------------------------------------------------
+
+    def append(
+        self, timestamp: datetime, values: Dict[str, float], source: str
+    ) -> None:
+        self.extend([(int(timestamp.timestamp()), values, source)])
+
+    def extend(self, samples: Iterable[Tuple[int, Dict[str, float], str]]) -> int:
+        """Append ``(epoch, values, source)`` samples under a single lock."""
+        written = 0
+        with self._lock:
+            self._open(create=True)
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            # Another process may have replaced the file (a column
+            # migration) while we waited; write to the new one
+            while not self._current():
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+                self._open(create=True)
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                head, total = self._state()
+                for epoch, values, source in samples:
+                    packed = [epoch]
+                    for column in self.columns:
+                        value = values.get(column)
+                        packed.append(math.nan if value is None else value)
+                    code = SOURCE_CODES.index(source) if source in SOURCE_CODES else 0
+                    packed.append(code)
+                    self._record.pack_into(self._map, self._offset(head), *packed)
+                    head = (head + 1) % self.capacity
+                    total += 1
+                    written += 1
+                self.STATE.pack_into(self._map, self.STATE_OFFSET, head, total)
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+        return written
+
+    def ensure_columns(self, columns: List[str]) -> None:
+        with self._lock:
+            opened = self._open(create=False)
+            missing = [column for column in columns if column not in self.columns]
+            if not missing:
+                return
+            if not opened:
+                self.columns = self.columns + missing
+                return
+
+            # Hold both locks from the copy through the replace, so no
+            # append can land in the old file after it has been read
+            old_columns = list(self.columns)
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                samples = []
+                for record in self._record.iter_unpack(self._copy_records(None)):
+                    code = record[-1]
+                    source = SOURCE_CODES[code] if code < len(SOURCE_CODES) else ""
+                    values = dict(zip(old_columns, record[1:-1]))
+                    samples.append((record[0], values, source))
+                tmp_path = self.path.with_name(self.path.name + ".migrate")
+                upgraded = RingMetricsStore(
+                    tmp_path, columns=old_columns + missing, capacity=self.capacity
+                )
+                upgraded.extend(samples)
+                upgraded._close()
+                os.replace(tmp_path, self.path)
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._close()
+            self.columns = old_columns + missing
+        logger.info(f"Added columns {missing} to {self.path}")
+
+    def prune(self, before: datetime) -> int:
+        """The ring is bounded by its capacity; old slots are overwritten."""
+        return 0
+
+    # -- reading ---------------------------------------------------------
+
+    def last_epoch(self) -> Optional[int]:
+        with self._lock:
+            if not self._open(create=False):
+                return None
+            head, total = self._state()
+            if not total:
+                return None
+            return self._epoch_at((head - 1) % self.capacity, 0)
+
+    def version(self) -> Tuple:
+        """Samples are written in place, so use the write counter, not mtime."""
+        with self._lock:
+            if not self._open(create=False):
+                return (0, 0)
+            return (self._inode, self._state()[1])
+
+    def _epoch_at(self, first_slot: int, index: int) -> int:
+        slot = (first_slot + index) % self.capacity
+        return self.TIMESTAMP.unpack_from(self._map, self._offset(slot))[0]
+
+    def _snapshot(
+        self, cutoff_epoch: Optional[int], last: Optional[int] = None
+    ) -> bytes:
+        """Copy the live records (from the cutoff, or the newest ``last``) out."""
+        with self._lock:
+            if not self._open(create=False):
+                return b""
+            fcntl.flock(self._file, fcntl.LOCK_SH)
+            try:
+                return self._copy_records(cutoff_epoch, last)
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def _copy_records(
+        self, cutoff_epoch: Optional[int], last: Optional[int] = None
+    ) -> bytes:
+        """Record bytes oldest first; the caller holds the lock and a flock."""
+        head, total = self._state()
+        count = min(total, self.capacity)
+        first_slot = (head - count) % self.capacity
+
+        start = 0
+        if cutoff_epoch is not None:
+            low, high = 0, count
+            while low < high:
+                mid = (low + high) // 2
+                if self._epoch_at(first_slot, mid) < cutoff_epoch:
+                    low = mid + 1
+                else:
+                    high = mid
+            start = low
+        if last is not None:
+            start = max(start, count - last)
+
+        begin = (first_slot + start) % self.capacity
+        remaining = count - start
+        first_run = min(remaining, self.capacity - begin)
+        chunks = [self._map[self._offset(begin) : self._offset(begin + first_run)]]
+        if remaining > first_run:
+            chunks.append(
+                self._map[self._offset(0) : self._offset(remaining - first_run)]
+            )
+        return b"".join(chunks)
+
+    def samples(
+        self, cutoff: Optional[datetime] = None, last: Optional[int] = None
+    ) -> Iterator[Tuple[int, Tuple[float, ...], str]]:
+        """Yield raw ``(epoch, values, source)`` tuples oldest first."""
+        cutoff_epoch = int(cutoff.timestamp()) if cutoff else None
+        data = self._snapshot(cutoff_epoch, last)
+        if not data:
+            return
+        for record in self._record.iter_unpack(data):
+            code = record[-1]
+            source = SOURCE_CODES[code] if code < len(SOURCE_CODES) else ""
+            yield record[0], record[1:-1], source
+
+    def tail(self, count: int) -> Iterator[Dict[str, str]]:
+        return self.rows(last=count)
+
+    def rows(
+        self, cutoff: Optional[datetime] = None, last: Optional[int] = None
+    ) -> Iterator[Dict[str, str]]:
+        columns = self.columns
+        for epoch, values, source in self.samples(cutoff, last):
+            row = {"timestamp": datetime.fromtimestamp(epoch).isoformat()}
+            for column, value in zip(columns, values):
+                row[column] = format_value(column, value)
+            row["source"] = source
+            yield row
+
+
+STORE_ENGINES = {
+    CsvMetricsStore.engine: CsvMetricsStore,
+    RingMetricsStore.engine: RingMetricsStore,
+}
+
+
+def open_store(engine: str, path: Path, **options) -> MetricsStore:
+    """Build a metrics store for the configured engine name."""
+    store_class = STORE_ENGINES.get(engine)
+    if store_class is None:
+        raise ValueError(f"Unknown metrics storage engine: {engine}")
+    if store_class is CsvMetricsStore:
+        options.pop("capacity", None)
+    return store_class(path, **options)
+
+
+def convert_csv_to_ring(
+    csv_path: Path, ring_path: Path, capacity: int = DEFAULT_RING_CAPACITY
+) -> int:
+    """One-shot conversion of a metrics CSV into a new ring file."""
+    csv_store = CsvMetricsStore(csv_path)
+    if ring_path.exists():
+        raise FileExistsError(f"{ring_path} already exists")
+
+    ring = RingMetricsStore(ring_path, columns=csv_store.columns, capacity=capacity)
+
+    def parsed_rows():
+        for row in csv_store.rows():
+            epoch = to_epoch(row.get("timestamp"))
+            if epoch is None:
+                continue
+            values = {column: parse_float(row.get(column)) for column in ring.columns}
+            yield epoch, values, row.get("source") or "import"
+
+    return ring.extend(parsed_rows())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Metrics history storage tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="convert metrics.csv to a ring file")
+    convert.add_argument("csv", type=Path, help="existing metrics CSV")
+    convert.add_argument(
+        "-o", "--output", type=Path, help="ring file (default: CSV path with .ring)"
+    )
+    convert.add_argument("--capacity", type=int, default=DEFAULT_RING_CAPACITY)
+    args = parser.parse_args(argv)
+
+    output = args.output or args.csv.with_suffix(".ring")
+    count = convert_csv_to_ring(args.csv, output, capacity=args.capacity)
+    print(f"Wrote {count} samples to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""Uptime segments and gap list for the network widget, kept up to date.
+
+The log is checked every five minutes, so uptime is a matter of which
+five-minute slots have an entry. Slot numbers, closed outages and IP changes
+are extended as new entries arrive; each request only bisects the slot list
+for the configured ``uptime.periods`` segments and adds the open outage at
+the tail, so the dashboard downloads a few hundred numbers instead of the log.
+"""
+
+import bisect
+import math
+import re
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from widgets.network.entries import NetworkEntries
+
+INTERVAL = 5 * 60
+TOLERANCE = 90
+
+# Units accepted in uptime.periods labels; "m" is minutes, a month 30 days
+# and a year 365 days
+UNITS = {
+    **dict.fromkeys(("s", "sec", "second", "seconds"), 1),
+    **dict.fromkeys(("m", "min", "minute", "minutes"), 60),
+    **dict.fromkeys(("h", "hr", "hour", "hours"), 60 * 60),
+    **dict.fromkeys(("d", "day", "days"), 24 * 60 * 60),
+    **dict.fromkeys(("w", "week", "weeks"), 7 * 24 * 60 * 60),
+    **dict.fromkeys(("month", "months"), 30 * 24 * 60 * 60),
+    **dict.fromkeys(("y", "year", "years"), 365 * 24 * 60 * 60),
+}
+NATURAL_TIME = re.compile(r"^(\d+(?:\.\d+)?)\s*([a-z]+)$")
+
+
+def parse_natural_time(text) -> Optional[int]:
+    """Seconds in a label like ``5 minutes`` or ``1 month``."""
+    if not isinstance(text, str):
+        return None
+    match = NATURAL_TIME.match(text.strip().lower())
+    if not match or match.group(2) not in UNITS:
+        return None
+    amount = float(match.group(1))
+    if amount <= 0:
+        return None
+    return round(amount * UNITS[match.group(2)])
+
+
+def cadence_checks(cadence) -> int:
+    """Minimum missed checks for an outage to be listed, from minutes."""
+    try:
+        minutes = max(0.0, float(cadence))
+    except (TypeError, ValueError):
+        return 0
+    return math.ceil(minutes / (INTERVAL / 60))
+
+
+def round_half_up(value: float) -> int:
+    return math.floor(value + 0.5)
+
+
+class NetworkAnalysis:
+    """Slots, outages and IP changes derived from ``NetworkEntries``."""
+
+    def __init__(self, entries: NetworkEntries) -> None:
+        self._entries = entries
+        self._cursor: Optional[str] = None
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self.slots = array("q")
+        self.gaps: List[Tuple] = []
+        self.count = 0
+        self.missed = 0
+        self.first: Optional[int] = None
+        self.last: Optional[int] = None
+        self._last_ip: Optional[str] = None
+        self._offsets: Tuple[int, int] = (-1, 0)
+
+    @property
+    def cursor(self) -> Optional[str]:
+        return self._cursor
+
+    def update(self) -> Tuple[bool, List[Tuple[int, str]]]:
+        """Fold entries logged since the last update; returns ``(reset, new)``.
+
+        The new entries are only those since the previous call by anyone;
+        a caller tracking its own position should use ``since`` instead.
+        """
+        with self._lock:
+            return self._update()
+
+    def since(self, cursor: Optional[str]) -> Tuple[bool, List[Tuple[int, str]], str]:
+        """``NetworkEntries.since(cursor)``, with all of it already folded in."""
+        with self._lock:
+            result = self._entries.since(cursor)
+            self._update()
+            return result
+
+    def _update(self) -> Tuple[bool, List[Tuple[int, str]]]:
+        reset, entries, cursor = self._entries.since(self._cursor)
+        if reset:
+            self._clear()
+        for epoch, ip in entries:
+            self._add(epoch, ip)
+        self._cursor = cursor
+        return reset, entries
+
+    def _utc_offset(self, epoch: int) -> int:
+        # DST changes fall on hour boundaries, so one lookup per hour will do
+        hour, offset = self._offsets
+        if epoch // 3600 != hour:
+            offset = time.localtime(epoch).tm_gmtoff
+            self._offsets = (epoch // 3600, offset)
+        return offset
+
+    def _add(self, epoch: int, ip: str) -> None:
+        if self.last is not None:
+            previous = self.last
+            # Adjust for DST: if the UTC offset changed, the wall-clock gap
+            # isn't a real outage (the same rule analyzeEntries used)
+            shift = self._utc_offset(epoch) - self._utc_offset(previous)
+            missing = (epoch - previous + shift - TOLERANCE) // INTERVAL
+            if missing > 0:
+                self.missed += missing
+                self.gaps.append(("outage", previous + INTERVAL, epoch, missing))
+            if ip != self._last_ip:
+                self.gaps.append(("ipchange", epoch, self._last_ip, ip))
+        else:
+            self.first = epoch
+        self.last = epoch
+        self._last_ip = ip
+        self.count += 1
+
+        slot = round_half_up(epoch / INTERVAL)
+        if not self.slots or slot > self.slots[-1]:
+            self.slots.append(slot)
+        else:
+            # Out of order (e.g. the repeated hour when clocks go back)
+            index = bisect.bisect_left(self.slots, slot)
+            if index == len(self.slots) or self.slots[index] != slot:
+                self.slots.insert(index, slot)
+
+    def tail_missing(self, now: float) -> int:
+        if self.last is None:
+            return 0
+        return max(0, int((now - self.last - TOLERANCE) // INTERVAL))
+
+    def open_gap(self, now: float) -> Optional[Dict]:
+        """The outage since the last entry, if a check is already overdue."""
+        with self._lock:
+            tail = self.tail_missing(now)
+            if not tail:
+                return None
+            return self._gap(("outage", self.last + INTERVAL, now, tail, True))
+
+    def closed_gap(self, start: int) -> Optional[Dict]:
+        """The recorded outage that began at ``start`` (epoch seconds)."""
+        with self._lock:
+            for gap in reversed(self.gaps):
+                if gap[0] == "outage" and gap[1] == start:
+                    return self._gap(gap)
+                if gap[1] < start:
+                    break
+        return None
+
+    def summary(self, now: float, periods: Sequence[Dict], min_checks: int) -> Dict:
+        """Totals, per-period segments and listed gaps as of ``now``."""
+        with self._lock:
+            tail = self.tail_missing(now)
+            gaps = [
+                gap for gap in self.gaps if gap[0] != "outage" or gap[3] >= min_checks
+            ]
+            if tail and tail >= min_checks:
+                gaps.append(("outage", self.last + INTERVAL, now, tail, True))
+            gaps.sort(key=lambda gap: gap[1])
+            missed = self.missed + tail
+            expected = self.count + missed
+            return {
+                "cursor": self._cursor,
+                "interval_ms": INTERVAL * 1000,
+                "total": self.count,
+                "expected": expected,
+                "missed": missed,
+                "uptime": self.count / expected * 100 if expected else None,
+                "first": None if self.first is None else self.first * 1000,
+                "last": None if self.last is None else self.last * 1000,
+                "windows": [
+                    self._window(index, period, now)
+                    for index, period in enumerate(periods)
+                ],
+                "gaps": [self._gap(gap) for gap in gaps],
+            }
+
+    @staticmethod
+    def _gap(gap: Tuple) -> Dict:
+        if gap[0] == "ipchange":
+            _, at, old_ip, new_ip = gap
+            return {
+                "type": "ipchange",
+                "timestamp": at * 1000,
+                "old": old_ip,
+                "new": new_ip,
+            }
+        start, end, missing = gap[1:4]
+        return {
+            "type": "outage",
+            "start": start * 1000,
+            "end": round(end * 1000),
+            "missed": missing,
+            "open": len(gap) > 4,
+        }
+
+    def _window(self, index: int, period: Dict, now: float) -> Dict:
+        label = period.get("period")
+        period_seconds = parse_natural_time(label)
+        segment_seconds = parse_natural_time(period.get("segment_size"))
+        window = {"key": f"period-{index}", "label": f"Past {label}", "segments": []}
+        if not period_seconds or not segment_seconds:
+            window["label"] = label or "Invalid"
+            return {**window, **self._totals([])}
+
+        segment_slots = max(1, round_half_up(segment_seconds / INTERVAL))
+        count = math.ceil(period_seconds / segment_seconds)
+        now_slot = math.floor(now / INTERVAL)
+        first_slot = None if self.first is None else self.first // INTERVAL
+        start_slot = now_slot - count * segment_slots + 1
+        prefix = re.sub(r"\s+", "-", label)
+        for position in range(count):
+            low = start_slot + position * segment_slots
+            high = low + segment_slots - 1
+            segment = self._segment(low, high, first_slot, now_slot)
+            window["segments"].append({"key": f"{prefix}-{position}", **segment})
+        window["segment_ms"] = segment_seconds * 1000
+        return {**window, **self._totals(window["segments"])}
+
+    def _segment(
+        self, low: int, high: int, first_slot: Optional[int], now_slot: int
+    ) -> Dict:
+        clamped = min(high, now_slot)
+        future = low > now_slot
+        if first_slot is None:
+            available = expected = observed = 0
+        else:
+            available = 0 if future else max(0, clamped - low + 1)
+            start = max(low, first_slot)
+            expected = clamped - start + 1 if not future and clamped >= start else 0
+            observed = (
+                bisect.bisect_right(self.slots, clamped)
+                - bisect.bisect_left(self.slots, start)
+                if expected
+                else 0
+            )
+        start_ms = max(low * INTERVAL * 1000, 0)
+        end_ms = min(high + 1, clamped + 1) * INTERVAL * 1000
+        return {
+            "start": start_ms,
+            "end": max(end_ms, start_ms),
+            **self._counts(available, expected, observed),
+        }
+
+    @staticmethod
+    def _counts(available: int, expected: int, observed: int) -> Dict:
+        return {
+            "available": available,
+            "expected": expected,
+            "observed": observed,
+            "missed": max(0, expected - observed),
+            "uptime": observed / expected * 100 if expected > 0 else None,
+            "coverage": expected / available if available > 0 else 0,
+        }
+
+    def _totals(self, segments: List[Dict]) -> Dict:
+        return self._counts(
+            *(
+                sum(segment[field] for segment in segments)
+                for field in ("available", "expected", "observed")
+            )
+        )
@@ -1,12 +1,58 @@
 #!/usr/bin/env python3
-from flask import jsonify, Response
+from flask import jsonify, request, Response
 from pathlib import Path
-from monitor import config
+from monitor import conditional_response, config, get_data_path, stream_json
+from widgets.network.analysis import INTERVAL, NetworkAnalysis, cadence_checks
+from widgets.network.entries import NetworkEntries
+from widgets.network.tail import LogTail
+from pytimeparse import parse as parse_duration
 import logging
+import queue
+import time
 
 logger = logging.getLogger(__name__)
 
 
+def get_log_path():
+    log_file = config["widgets"]["network"].get(dict).get("log_file")
+    return Path(log_file) if log_file else None
+
+
+def get_entries_cache_path():
+    return get_data_path() / "network_entries.csv"
+
+
+# Parsed "detected IPv4 address" records, extended as the log grows
+network_entries = NetworkEntries(get_log_path, get_entries_cache_path)
+network_analysis = NetworkAnalysis(network_entries)
+
+
+def live_settings():
+    return config["widgets"]["network"]["live"]
+
+
+def live_keepalive():
+    return parse_duration(live_settings()["keepalive"].get(str)) or 20
+
+
+def live_max_clients():
+    return live_settings()["max_clients"].get(int)
+
+
+# Pushes new entries and outage changes to /api/network/stream clients
+log_tail = LogTail(network_analysis, get_log_path, live_max_clients)
+
+
+def start_log_tail():
+    """Follow the network log when the widget and live updates are enabled"""
+    network_config = config["widgets"]["network"]
+    if not network_config["enabled"].get(bool):
+        return None
+    if not live_settings()["enabled"].get(bool) or get_log_path() is None:
+        return None
+    return log_tail.start()
+
+
 def register_routes(app):
     """Register network widget API routes"""
 
@@ -51,3 +97,96 @@ def register_routes(app):
 
         except Exception as exc:
             return jsonify({"error": str(exc)}), 500
+
+    @app.route("/api/network/entries", methods=["GET"])
+    def network_entries_api():
+        """Parsed log entries as ``[epoch_ms, ip]`` pairs after a cursor"""
+        log_path = get_log_path()
+        if log_path is None:
+            return jsonify({"error": "No log file configured"}), 404
+        if not log_path.is_file():
+            return jsonify({"error": f"Log file not found: {log_path}"}), 404
+
+        try:
+            reset, entries, cursor = network_entries.since(request.args.get("cursor"))
+        except PermissionError:
+            return jsonify(
+                {"error": f"Permission denied reading log file: {log_path}"}
+            ), 403
+        except Exception as exc:
+            logger.error(f"Error parsing network log {log_path}: {exc}")
+            return jsonify({"error": str(exc)}), 500
+
+        response = app.response_class(
+            stream_json(
+                "entries",
+                ([epoch * 1000, ip] for epoch, ip in entries),
+                {"cursor": cursor, "reset": reset},
+            ),
+            mimetype="application/json",
+        )
+        return conditional_response(response, (cursor,))
+
+    @app.route("/api/network/summary", methods=["GET"])
+    def network_summary():
+        """Totals, uptime segments per configured period and the gap list"""
+        log_path = get_log_path()
+        if log_path is None:
+            return jsonify({"error": "No log file configured"}), 404
+        if not log_path.is_file():
+            return jsonify({"error": f"Log file not found: {log_path}"}), 404
+
+        network_config = config["widgets"]["network"]
+        periods = network_config["uptime"]["periods"].get(list)
+        min_checks = cadence_checks(network_config["gaps"]["cadence"].get())
+        try:
+            network_analysis.update()
+        except PermissionError:
+            return jsonify(
+                {"error": f"Permission denied reading log file: {log_path}"}
+            ), 403
+        except Exception as exc:
+            logger.error(f"Error parsing network log {log_path}: {exc}")
+            return jsonify({"error": str(exc)}), 500
+
+        now = time.time()
+        summary = network_analysis.summary(now, periods, min_checks)
+        # Segments only move once per check interval; an open outage's end
+        # is "now" and is left for the client to extend
+        version = (
+            network_analysis.cursor,
+            int(now // INTERVAL),
+            network_analysis.tail_missing(now),
+            repr(periods),
+            min_checks,
+        )
+        return conditional_response(jsonify(summary), version)
+
+    @app.route("/api/network/stream", methods=["GET"])
+    def network_stream():
+        """Server-sent events for new entries and outages opening or closing"""
+        if not log_tail.running:
+            return jsonify({"error": "Live network updates are disabled"}), 404
+        subscriber = log_tail.subscribe()
+        if subscriber is None:
+            return jsonify({"error": "Too many live network clients"}), 503
+        keepalive = live_keepalive()
+
+        def events():
+            try:
+                yield f"retry: {int(keepalive * 1000)}\n\n"
+                while True:
+                    try:
+                        yield subscriber.get(timeout=keepalive)
+                    except queue.Empty:
+                        if not log_tail.subscribed(subscriber):
+                            return
+                        # Also lets a closed connection surface as an error
+                        yield ": keepalive\n\n"
+            finally:
+                log_tail.unsubscribe(subscriber)
+
+        response = app.response_class(events(), mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Incremental parser for "detected IPv4 address" records in the network log.
+
+Only bytes appended since the last read are parsed. Entries are kept in
+memory as parallel (epoch, IP) columns and mirrored to a compact cache under
+the data directory, so a restart resumes from the remembered byte offset
+instead of re-reading a year of log.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Same record shape the dashboard used to match in parseLog
+DETECTED = re.compile(
+    r"^([A-Za-z]{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2})\s+\S+\s+\S+(?:\[\d+\])?:\s+"
+    r"[A-Z]+:\s+(?:\[[^\]]+\]>\s+)?detected IPv4 address\s+([0-9.]+)",
+    re.IGNORECASE,
+)
+MONTHS = {
+    name: index
+    for index, name in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun")
+        + ("Jul", "Aug", "Sep", "Oct", "Nov", "Dec"),
+        start=1,
+    )
+}
+HALF_YEAR = timedelta(days=182)
+
+
+def parse_syslog_time(label: str, now: datetime) -> Optional[datetime]:
+    """Resolve a year-less syslog stamp like ``Oct 16 12:00:01`` near ``now``."""
+    parts = label.split()
+    if len(parts) != 3 or parts[0].title() not in MONTHS:
+        return None
+    month = MONTHS[parts[0].title()]
+    try:
+        day = int(parts[1])
+        hour, minute, second = (int(value) for value in parts[2].split(":"))
+        candidate = datetime(now.year, month, day, hour, minute, second)
+        if candidate - now > HALF_YEAR:
+            candidate = candidate.replace(year=now.year - 1)
+        elif now - candidate > HALF_YEAR and month > now.month:
+            candidate = candidate.replace(year=now.year - 1)
+    except ValueError:
+        return None
+    return candidate
+
+
+def parse_line(line: str, now: datetime) -> Optional[Tuple[int, str]]:
+    if "detected IPv4 address" not in line:
+        return None
+    match = DETECTED.match(line)
+    if not match:
+        return None
+    moment = parse_syslog_time(match.group(1), now)
+    if moment is None:
+        return None
+    return int(moment.timestamp()), sys.intern(match.group(2).strip())
+
+
+class NetworkEntries:
+    """Parsed log entries with a resumable byte offset.
+
+    ``generation`` changes whenever the log is replaced or truncated and the
+    entries are rebuilt from scratch, so a ``generation:count`` cursor tells
+    a client whether it can append or must start over.
+    """
+
+    def __init__(
+        self, log_path: Callable[[], Optional[Path]], cache_path: Callable[[], Path]
+    ) -> None:
+        self._log_path = log_path
+        self._cache_path = cache_path
+        self.epochs = array("q")
+        self.ips: List[str] = []
+        self.generation = 0
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def cursor(self) -> str:
+        return f"{self.generation}:{len(self.epochs)}"
+
+    def since(self, cursor: Optional[str]) -> Tuple[bool, List[Tuple[int, str]], str]:
+        """Refresh and return ``(reset, entries, cursor)`` after ``cursor``."""
+        with self._lock:
+            self.refresh()
+            start = self._resume_index(cursor)
+            reset = start is None
+            start = start or 0
+            entries = list(zip(self.epochs[start:], self.ips[start:]))
+            return reset, entries, self.cursor
+
+    def refresh(self) -> int:
+        """Parse bytes appended since the last call; returns new entry count."""
+        path = self._log_path()
+        if path is None or not path.exists():
+            return 0
+        if not self._loaded:
+            self._load_cache()
+            self._loaded = True
+
+        stat = os.stat(path)
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            if self._inode is not None:
+                logger.info(f"Network log {path} was replaced or truncated")
+            self._reset(stat.st_ino)
+        if stat.st_size == self._offset:
+            return 0
+
+        with open(path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        # Leave a trailing partial line for the next read
+        end = data.rfind(b"\n") + 1
+        now = datetime.now()
+        added = []
+        for line in data[:end].decode("utf-8", "replace").splitlines():
+            parsed = parse_line(line, now)
+            if parsed is not None:
+                added.append(parsed)
+        self._offset += end
+
+        for epoch, ip in added:
+            self.epochs.append(epoch)
+            self.ips.append(ip)
+        self._save_cache(added)
+        return len(added)
+
+    def _resume_index(self, cursor: Optional[str]) -> Optional[int]:
+        if not cursor:
+            return None
+        generation, _, count = cursor.partition(":")
+        try:
+            generation, count = int(generation), int(count)
+        except ValueError:
+            return None
+        if generation != self.generation or count > len(self.epochs):
+            return None
+        return count
+
+    def _reset(self, inode: int) -> None:
+        self.epochs = array("q")
+        self.ips = []
+        # Unique per rebuild, so cursors from before a restart never match
+        self.generation = max(self.generation + 1, int(time.time()))
+        self._inode = inode
+        self._offset = 0
+        cache = self._cache_path()
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        cache.write_text("")
+        self._write_meta()
+
+    def _meta_path(self) -> Path:
+        return self._cache_path().with_suffix(".json")
+
+    def _write_meta(self) -> None:
+        meta = {
+            "inode": self._inode,
+            "offset": self._offset,
+            "count": len(self.epochs),
+            "generation": self.generation,
+        }
+        temp = self._meta_path().with_suffix(".json.tmp")
+        temp.write_text(json.dumps(meta))
+        os.replace(temp, self._meta_path())
+
+    def _save_cache(self, added: List[Tuple[int, str]]) -> None:
+        try:
+            if added:
+                with open(self._cache_path(), "a") as f:
+                    f.writelines(f"{epoch},{ip}\n" for epoch, ip in added)
+            self._write_meta()
+        except OSError as e:
+            logger.error(f"Unable to update network entry cache: {e}")
+
+    def _load_cache(self) -> None:
+        """Resume from the cache when it matches the current log file."""
+        try:
+            meta: Dict = json.loads(self._meta_path().read_text())
+            cache = self._cache_path()
+            epochs, ips = array("q"), []
+            with open(cache) as f:
+                # Lines past the recorded count were written without their
+                # offset; drop them and re-read those bytes from the log
+                for line in f:
+                    if len(epochs) == meta["count"]:
+                        break
+                    epoch, _, ip = line.rstrip("\n").partition(",")
+                    epochs.append(int(epoch))
+                    ips.append(ip)
+            if len(epochs) != meta["count"]:
+                raise ValueError("cache is shorter than recorded")
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug(f"Not resuming network entry cache: {e}")
+            return
+
+        self.epochs, self.ips = epochs, ips
+        self.generation = meta.get("generation", 0)
+        self._inode = meta["inode"]
+        self._offset = meta["offset"]
+        with open(cache, "r+") as f:
+            f.truncate(sum(len(f"{e},{ip}\n") for e, ip in zip(epochs, ips)))
+        logger.info(f"Resumed {len(epochs)} network log entries from cache")
@@ -1,68 +1,18 @@
 const NET_EXPECTED_INTERVAL_MS = 5 * 60 * 1000
-const NET_TOLERANCE_MS = 90 * 1000
 const NET_MINUTE_MS = 60 * 1000
 const NET_HOUR_MS = 60 * NET_MINUTE_MS
 const NET_DAY_MS = 24 * NET_HOUR_MS
-const NET_MINUTES_PER_CHECK = NET_EXPECTED_INTERVAL_MS / 60000
-const MONTH_INDEX = { Jan: 0, Feb: 1, Mar: 2, Apr: 3, May: 4, Jun: 5, Jul: 6, Aug: 7, Sep: 8, Oct: 9, Nov: 10, Dec: 11 }
-
-function parseNaturalTime (timeStr) {
-  if (!timeStr || typeof timeStr !== 'string') return null
-
-  const normalized = timeStr.trim().toLowerCase()
-  const timePattern = /^(\d+(?:\.\d+)?)\s*([a-z]+)$/
-  const match = normalized.match(timePattern)
-
-  if (!match) return null
-
-  const [, amountStr, unit] = match
-  const amount = parseFloat(amountStr)
-
-  if (isNaN(amount) || amount <= 0) return null
-
-  const multipliers = {
-    s: 1000,
-    sec: 1000,
-    second: 1000,
-    seconds: 1000,
-    m: 60 * 1000,
-    min: 60 * 1000,
-    minute: 60 * 1000,
-    minutes: 60 * 1000,
-    h: 60 * 60 * 1000,
-    hr: 60 * 60 * 1000,
-    hour: 60 * 60 * 1000,
-    hours: 60 * 60 * 1000,
-    d: 24 * 60 * 60 * 1000,
-    day: 24 * 60 * 60 * 1000,
-    days: 24 * 60 * 60 * 1000,
-    w: 7 * 24 * 60 * 60 * 1000,
-    week: 7 * 24 * 60 * 60 * 1000,
-    weeks: 7 * 24 * 60 * 60 * 1000,
-    month: 30 * 24 * 60 * 60 * 1000,
-    months: 30 * 24 * 60 * 60 * 1000,
-    y: 365 * 24 * 60 * 60 * 1000,
-    year: 365 * 24 * 60 * 60 * 1000,
-    years: 365 * 24 * 60 * 60 * 1000
-  }
-
-  const multiplier = multipliers[unit]
-  if (!multiplier) return null
-
-  return Math.round(amount * multiplier)
-}
 
 class NetworkWidget {
   constructor (config = {}) {
     this.container = null
-    this.config = mergeNetworkConfig(config)
-    this.periodsConfig = this.config.uptime.periods
+    this.config = config
     this.state = {
-      entries: [],
       analysis: null,
       gapsExpanded: false,
-      logFingerprint: null
+      refreshTimer: null
     }
+    this.stream = null
     this.elements = {}
     this.uptimeCache = {
       rows: new Map()
@@ -89,6 +39,35 @@ class NetworkWidget {
     this.applySectionVisibility()
     this.attachEvents()
     await this.loadLog()
+    this.connectStream()
+  }
+
+  connectStream () {
+    if (!this.config.log_file || this.config.live?.enabled === false || !window.EventSource) {
+      return
+    }
+
+    // One summary reload per burst of pushed entries and outage changes
+    const refresh = () => {
+      clearTimeout(this.state.refreshTimer)
+      this.state.refreshTimer = setTimeout(() => this.loadLog(), 500)
+    }
+
+    let connected = false
+    const source = new EventSource('api/network/stream')
+    source.addEventListener('entries', refresh)
+    source.addEventListener('gap', refresh)
+    source.addEventListener('open', () => {
+      // Anything pushed while reconnecting was missed
+      if (connected) refresh()
+      connected = true
+    })
+    source.addEventListener('error', () => {
+      if (source.readyState === EventSource.CLOSED) {
+        console.warn('Live network updates unavailable')
+      }
+    })
+    this.stream = source
   }
 
   cacheElements () {
@@ -147,9 +126,7 @@ class NetworkWidget {
     if (!this.config.log_file) {
       this.state.gapsExpanded = false
       setText(this.elements.logStatus, 'No log file configured.')
-      this.state.entries = []
-      this.state.analysis = analyzeEntries([], this.periodsConfig)
-      this.state.logFingerprint = null
+      this.state.analysis = null
       this.updateSummary()
       this.renderUptime()
       this.renderGaps()
@@ -157,43 +134,35 @@ class NetworkWidget {
     }
 
     try {
-      const response = await fetch(`api/network/log?${Date.now()}`, { cache: 'no-store' })
+      // The server keeps the uptime segments and gaps up to date
+      const response = await fetch('api/network/summary', { cache: 'no-cache' })
 
       if (!response.ok) {
         throw new Error(`HTTP ${response.status}`)
       }
 
-      const text = await response.text()
-      const fingerprint = computeLogFingerprint(text)
-
-      if (fingerprint === this.state.logFingerprint) {
-        const label = this.state.entries.length
-          ? `${this.state.entries.length.toLocaleString()} log entries (no changes).`
-          : 'No log entries found yet.'
-        setText(this.elements.logStatus, label)
-        return
+      const data = await response.json()
+      const changed = this.state.analysis?.cursor !== data.cursor
+      this.state.analysis = buildAnalysis(data)
+      if (changed) {
+        this.state.gapsExpanded = false
       }
-
-      this.state.logFingerprint = fingerprint
-      this.state.entries = parseLog(text)
-      this.state.analysis = analyzeEntries(this.state.entries, this.periodsConfig)
-      this.state.gapsExpanded = false
       this.updateSummary()
       this.renderUptime()
       this.renderGaps()
 
-      if (this.state.entries.length) {
-        setText(this.elements.logStatus, `Loaded ${this.state.entries.length.toLocaleString()} log entries.`)
-      } else {
+      if (!data.total) {
         setText(this.elements.logStatus, 'No log entries found.')
+      } else if (changed) {
+        setText(this.elements.logStatus, `Loaded ${data.total.toLocaleString()} log entries.`)
+      } else {
+        setText(this.elements.logStatus, `${data.total.toLocaleString()} log entries (no changes).`)
       }
     } catch (error) {
       console.error('Network log API call failed:', error)
       setText(this.elements.logStatus, `Unable to load log: ${error.message}`)
       this.state.gapsExpanded = false
-      this.state.entries = []
-      this.state.analysis = analyzeEntries([], this.periodsConfig)
-      this.state.logFingerprint = null
+      this.state.analysis = null
       this.updateSummary()
       this.renderUptime()
       this.renderGaps()
@@ -219,7 +188,7 @@ class NetworkWidget {
     }
     const summary = this.elements.summary
     const analysis = this.state.analysis
-    if (!analysis || !analysis.entries.length) {
+    if (!analysis || !analysis.total) {
       summary.uptime.textContent = '–'
       summary.total.textContent = '–'
       summary.expected.textContent = '–'
@@ -230,7 +199,7 @@ class NetworkWidget {
     }
 
     summary.uptime.textContent = analysis.uptimeText
-    summary.total.textContent = formatNumber(analysis.entries.length)
+    summary.total.textContent = formatNumber(analysis.total)
     summary.expected.textContent = formatNumber(analysis.expectedChecks)
     summary.missed.textContent = formatNumber(analysis.missedChecks)
     summary.first.textContent = formatDateTime(analysis.firstEntry)
@@ -405,7 +374,7 @@ class NetworkWidget {
     const toggle = this.elements.gapToggle
 
     const analysis = this.state.analysis
-    if (!analysis || !analysis.entries.length) {
+    if (!analysis || !analysis.total) {
       const info = document.createElement('p')
       info.className = 'muted'
       info.textContent = 'No log entries to inspect yet.'
@@ -414,13 +383,8 @@ class NetworkWidget {
       return
     }
 
-    const filtered = analysis.gaps.filter((gap) => {
-      if (gap.type !== 'outage') {
-        return true
-      }
-      const threshold = this.config.gaps.cadenceChecks || 0
-      return gap.missedChecks >= threshold
-    })
+    // Outages shorter than gaps.cadence are already left out by the server
+    const filtered = analysis.gaps
 
     if (!filtered.length) {
       const info = document.createElement('p')
@@ -464,345 +428,51 @@ class NetworkWidget {
   }
 }
 
-function mergeNetworkConfig (config) {
-  // Trust that confuse provides complete merged config
-  // Just add computed values that depend on config values
-  const cfg = config || {}
-  const cadenceRaw = Number(cfg.gaps?.cadence)
-  const cadenceMinutes = Number.isFinite(cadenceRaw) ? Math.max(0, cadenceRaw) : 0
-  const cadenceChecks = Math.max(0, Math.ceil(cadenceMinutes / NET_MINUTES_PER_CHECK))
-
-  return {
-    ...cfg,
-    gaps: {
-      ...cfg.gaps,
-      cadenceChecks
-    }
-  }
-}
-
-function parseLog (text) {
-  const entries = []
-  const lines = text.split(/\r?\n/)
-  const detectedPattern = /^([A-Za-z]{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2})\s+[^\s]+\s+[^\s]+(?:\[\d+\])?:\s+[A-Z]+:\s+(?:\[[^\]]+\]>\s+)?detected IPv4 address\s+([0-9.]+)/i
-
-  for (const line of lines) {
-    if (!line.includes('detected IPv4 address')) continue
-    const match = line.match(detectedPattern)
-    if (!match) continue
-    const timestamp = parseTimestamp(match[1])
-    if (!timestamp) continue
-    entries.push({ timestamp, ip: match[2].trim() })
-  }
-
-  entries.sort((a, b) => a.timestamp - b.timestamp)
-  return entries
-}
-
-function computeLogFingerprint (text) {
-  let hash = 0
-  for (let index = 0; index < text.length; index += 1) {
-    hash = ((hash << 5) - hash + text.charCodeAt(index)) | 0
-  }
-  return `${text.length}:${hash}`
-}
-
-function parseTimestamp (label) {
-  if (!label) return null
-  const normalized = label.replace(/\s+/g, ' ').trim()
-  const match = normalized.match(/^([A-Za-z]{3})\s+(\d{1,2})\s+(\d{2}):(\d{2}):(\d{2})$/)
-  if (!match) return null
-
-  const [, monthName, dayStr, hourStr, minuteStr, secondStr] = match
-  const monthIndex = MONTH_INDEX[monthName]
-  if (monthIndex === undefined) return null
-
-  const day = parseInt(dayStr, 10)
-  const hour = parseInt(hourStr, 10)
-  const minute = parseInt(minuteStr, 10)
-  const second = parseInt(secondStr, 10)
-  if ([day, hour, minute, second].some(Number.isNaN)) return null
-
-  const now = new Date()
-  const halfYearMs = 182 * NET_DAY_MS
-  let candidate = new Date(now.getFullYear(), monthIndex, day, hour, minute, second)
-
-  if (candidate.getTime() - now.getTime() > halfYearMs) {
-    candidate = new Date(now.getFullYear() - 1, monthIndex, day, hour, minute, second)
-  } else if (now.getTime() - candidate.getTime() > halfYearMs && monthIndex > now.getMonth()) {
-    candidate = new Date(now.getFullYear() - 1, monthIndex, day, hour, minute, second)
-  }
-
-  return Number.isNaN(candidate.getTime()) ? null : candidate
-}
-
-function analyzeEntries (entries, periodsConfig) {
-  if (!entries.length) {
-    const now = new Date()
-    return {
-      entries: [],
-      gaps: [],
-      missedChecks: 0,
-      expectedChecks: 0,
-      uptimeValue: null,
-      uptimeText: '–',
-      firstEntry: null,
-      lastEntry: null,
-      windowStats: computeWindowStats([], [], now, periodsConfig)
-    }
-  }
+function buildAnalysis (data) {
+  const windowStats = data.windows.map((window) => ({
+    ...window,
+    segments: window.segments.map((segment) => ({
+      ...segment,
+      label: formatCustomSegmentLabel(window.segment_ms, segment.start, segment.end),
+      start: new Date(segment.start),
+      end: new Date(segment.end)
+    }))
+  }))
 
-  const gaps = []
-  let missed = 0
-  const slotNumbers = buildSlotNumbers(entries)
-
-  for (let index = 0; index < entries.length - 1; index += 1) {
-    const current = entries[index]
-    const next = entries[index + 1]
-    const diff = next.timestamp - current.timestamp
-
-    // Adjust for DST: if timezone offset changed, the wall-clock gap isn't a real outage
-    const dstShiftMs = (current.timestamp.getTimezoneOffset() - next.timestamp.getTimezoneOffset()) * 60000
-    const missing = Math.floor((diff + dstShiftMs - NET_TOLERANCE_MS) / NET_EXPECTED_INTERVAL_MS)
-
-    if (missing > 0) {
-      missed += missing
-      gaps.push({
-        type: 'outage',
-        start: new Date(current.timestamp.getTime() + NET_EXPECTED_INTERVAL_MS),
-        end: new Date(next.timestamp.getTime()),
-        missedChecks: missing,
-        open: false
-      })
-    }
-    if (current.ip !== next.ip) {
-      gaps.push({
+  const gaps = data.gaps.map((gap) => {
+    if (gap.type === 'ipchange') {
+      return {
         type: 'ipchange',
-        timestamp: next.timestamp,
-        oldIp: current.ip,
-        newIp: next.ip
-      })
+        timestamp: new Date(gap.timestamp),
+        oldIp: gap.old,
+        newIp: gap.new
+      }
     }
-  }
-
-  const lastEntry = entries[entries.length - 1]
-  const now = new Date()
-  const tailMissing = Math.floor((now.getTime() - lastEntry.timestamp.getTime() - NET_TOLERANCE_MS) / NET_EXPECTED_INTERVAL_MS)
-  if (tailMissing > 0) {
-    missed += tailMissing
-    gaps.push({
+    return {
       type: 'outage',
-      start: new Date(lastEntry.timestamp.getTime() + NET_EXPECTED_INTERVAL_MS),
-      end: now,
-      missedChecks: tailMissing,
-      open: true
-    })
-  }
-
-  gaps.sort((a, b) => {
-    const aTime = a.type === 'ipchange' ? a.timestamp : a.start
-    const bTime = b.type === 'ipchange' ? b.timestamp : b.start
-    return aTime - bTime
+      start: new Date(gap.start),
+      // An open outage lasts until now, not until the server last looked
+      end: gap.open ? new Date() : new Date(gap.end),
+      missedChecks: gap.missed,
+      open: gap.open
+    }
   })
 
-  const expectedChecks = entries.length + missed
-  const uptimeValue = expectedChecks ? (entries.length / expectedChecks) * 100 : 100
-  const uptimeText = expectedChecks ? `${uptimeValue.toFixed(2)}%` : '100%'
-  const windowStats = computeWindowStats(entries, slotNumbers, now, periodsConfig)
-
   return {
-    entries,
+    cursor: data.cursor,
+    total: data.total,
     gaps,
-    missedChecks: missed,
-    expectedChecks,
-    uptimeValue,
-    uptimeText,
-    firstEntry: entries[0].timestamp,
-    lastEntry: lastEntry.timestamp,
+    missedChecks: data.missed,
+    expectedChecks: data.expected,
+    uptimeValue: data.uptime,
+    uptimeText: data.uptime === null ? '–' : `${data.uptime.toFixed(2)}%`,
+    firstEntry: data.first === null ? null : new Date(data.first),
+    lastEntry: data.last === null ? null : new Date(data.last),
     windowStats
   }
 }
 
-function buildSlotNumbers (entries) {
-  const slots = []
-  let previous = null
-  entries.forEach((entry) => {
-    const slot = Math.round(entry.timestamp.getTime() / NET_EXPECTED_INTERVAL_MS)
-    if (slot !== previous) {
-      slots.push(slot)
-      previous = slot
-    }
-  })
-  return slots
-}
-
-function computeWindowStats (entries, slotNumbers, now, periodsConfig) {
-  const definitions = buildPeriodsDefinitions(now, periodsConfig)
-  if (!entries.length) {
-    return definitions.map((definition) => ({
-      key: definition.key,
-      label: definition.label,
-      segments: definition.segments.map((segment) => ({
-        ...segment,
-        available: 0,
-        expected: 0,
-        observed: 0,
-        missed: 0,
-        uptime: null,
-        coverage: 0,
-        start: new Date(segment.startMs),
-        end: new Date(segment.endMs)
-      })),
-      observed: 0,
-      expected: 0,
-      missed: 0,
-      uptime: null,
-      coverage: 0
-    }))
-  }
-
-  const nowMs = now.getTime()
-  const nowSlot = Math.floor(nowMs / NET_EXPECTED_INTERVAL_MS)
-  const firstSlot = Math.floor(entries[0].timestamp.getTime() / NET_EXPECTED_INTERVAL_MS)
-
-  return definitions.map((definition) => {
-    const segments = definition.segments.map((segment) => analyzeSegment(segment, slotNumbers, firstSlot, nowSlot))
-    const observed = segments.reduce((sum, item) => sum + item.observed, 0)
-    const expected = segments.reduce((sum, item) => sum + item.expected, 0)
-    const available = segments.reduce((sum, item) => sum + item.available, 0)
-    const missed = Math.max(0, expected - observed)
-    const uptime = expected > 0 ? (observed / expected) * 100 : null
-    const coverage = available > 0 ? expected / available : 0
-
-    return {
-      key: definition.key,
-      label: definition.label,
-      segments,
-      observed,
-      expected,
-      missed,
-      uptime,
-      coverage
-    }
-  })
-}
-
-function buildPeriodsDefinitions (now, periodsConfig) {
-  const nowMs = now.getTime()
-
-  return periodsConfig.map((periodConfig, index) => {
-    const periodMs = parseNaturalTime(periodConfig.period)
-    const segmentMs = parseNaturalTime(periodConfig.segment_size)
-
-    if (!periodMs || !segmentMs) {
-      console.warn('Invalid period configuration:', periodConfig)
-      return { key: `period-${index}`, label: periodConfig.period || 'Invalid', segments: [] }
-    }
-
-    const segmentCount = Math.ceil(periodMs / segmentMs)
-    const segments = buildCustomPeriodSegments(periodConfig.period, periodMs, segmentMs, segmentCount, nowMs)
-
-    return {
-      key: `period-${index}`,
-      label: `Past ${periodConfig.period}`,
-      segments
-    }
-  })
-}
-
-function buildCustomPeriodSegments (periodLabel, periodMs, segmentMs, segmentCount, nowMs) {
-  const segmentSlots = Math.max(1, Math.round(segmentMs / NET_EXPECTED_INTERVAL_MS))
-  const endSlot = Math.floor(nowMs / NET_EXPECTED_INTERVAL_MS)
-  const firstStartSlot = endSlot - (segmentCount * segmentSlots) + 1
-  const segments = []
-
-  for (let index = 0; index < segmentCount; index += 1) {
-    const startSlot = firstStartSlot + index * segmentSlots
-    const endSlotForSegment = startSlot + segmentSlots - 1
-    const startMs = startSlot * NET_EXPECTED_INTERVAL_MS
-    const endMs = (endSlotForSegment + 1) * NET_EXPECTED_INTERVAL_MS
-
-    segments.push({
-      key: `${periodLabel.replace(/\s+/g, '-')}-${index}`,
-      label: formatCustomSegmentLabel(periodLabel, segmentMs, startMs, endMs),
-      startSlot,
-      endSlot: endSlotForSegment,
-      startMs,
-      endMs
-    })
-  }
-
-  return segments
-}
-
-function analyzeSegment (segment, slotNumbers, firstSlot, nowSlot) {
-  const startSlot = segment.startSlot
-  const endSlot = segment.endSlot
-  const startMs = segment.startMs
-  const endMs = segment.endMs
-
-  const clampedEndSlot = Math.min(endSlot, nowSlot)
-  const isFuture = startSlot > nowSlot
-  const available = isFuture ? 0 : Math.max(0, clampedEndSlot - startSlot + 1)
-  const effectiveStart = Math.max(startSlot, firstSlot)
-  const expected = (!isFuture && clampedEndSlot >= effectiveStart) ? (clampedEndSlot - effectiveStart + 1) : 0
-  const observed = expected > 0 ? countSlotsInRange(slotNumbers, effectiveStart, clampedEndSlot) : 0
-  const missed = Math.max(0, expected - observed)
-  const uptime = expected > 0 ? (observed / expected) * 100 : null
-  const coverage = available > 0 ? expected / available : 0
-  const endMsClamped = Math.min(endMs, (clampedEndSlot + 1) * NET_EXPECTED_INTERVAL_MS)
-
-  return {
-    ...segment,
-    available,
-    expected,
-    observed,
-    missed,
-    uptime,
-    coverage,
-    start: new Date(Math.max(startMs, 0)),
-    end: new Date(Math.max(endMsClamped, Math.max(startMs, 0)))
-  }
-}
-
-function countSlotsInRange (slots, startSlot, endSlot) {
-  if (startSlot > endSlot) {
-    return 0
-  }
-  const startIndex = lowerBound(slots, startSlot)
-  const endIndex = upperBound(slots, endSlot)
-  return Math.max(0, endIndex - startIndex)
-}
-
-function lowerBound (array, value) {
-  let low = 0
-  let high = array.length
-  while (low < high) {
-    const mid = Math.floor((low + high) / 2)
-    if (array[mid] < value) {
-      low = mid + 1
-    } else {
-      high = mid
-    }
-  }
-  return low
-}
-
-function upperBound (array, value) {
-  let low = 0
-  let high = array.length
-  while (low < high) {
-    const mid = Math.floor((low + high) / 2)
-    if (array[mid] <= value) {
-      low = mid + 1
-    } else {
-      high = mid
-    }
-  }
-  return low
-}
-
-function formatCustomSegmentLabel (periodLabel, segmentMs, startMs, endMs) {
+function formatCustomSegmentLabel (segmentMs, startMs, endMs) {
   const startDate = new Date(startMs)
   const endDate = new Date(endMs)
 
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Live tail of the network log, pushed to dashboards as server-sent events.
+
+The log's directory is watched with inotify, so appends, truncation and
+rotation (a new file moved or created under the same name) are all noticed
+as they happen; ``NetworkEntries`` already rebuilds when the inode changes
+or the file shrinks. Where inotify is unavailable the file is checked on a
+short interval instead. Outages open without any write to the log, so the
+watcher also wakes when the next check becomes overdue.
+"""
+
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import queue
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from widgets.network.analysis import INTERVAL, TOLERANCE, NetworkAnalysis
+
+logger = logging.getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """Just enough of the Linux inotify API to watch one directory."""
+
+    def __init__(self) -> None:
+        name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    def watch(self, directory: Path) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), str(directory))
+        return wd
+
+    def read(self, timeout: float) -> List[tuple]:
+        """``(mask, name)`` for each event, or ``[]`` after ``timeout``."""
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events, offset = [], 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            events.append((mask, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class LogTail:
+    """Watch the log, fold new entries in and broadcast what changed.
+
+    Each subscriber gets a bounded queue of preformatted SSE messages; a
+    client that falls that far behind is dropped and reconnects. Events:
+
+    - ``entries``: ``{cursor, reset, entries: [[epoch_ms, ip], ...]}``,
+      with no entries when ``reset`` (the client should reload)
+    - ``gap``: ``{state: "open" | "close", gap: {...}}`` shaped like the
+      summary's outage gaps
+    """
+
+    def __init__(
+        self,
+        analysis: NetworkAnalysis,
+        log_path: Callable[[], Optional[Path]],
+        max_clients: Callable[[], int],
+        poll: float = 5.0,
+        backlog: int = 100,
+    ) -> None:
+        self.analysis = analysis
+        self._log_path = log_path
+        self._max_clients = max_clients
+        self.poll = poll
+        self.backlog = backlog
+        self._subscribers: List[queue.Queue] = []
+        self._sequence = 0
+        self._cursor: Optional[str] = None
+        self._open: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def subscribe(self) -> Optional[queue.Queue]:
+        """A new client queue, or None when ``max_clients`` are connected."""
+        with self._lock:
+            if len(self._subscribers) >= self._max_clients():
+                return None
+            subscriber: queue.Queue = queue.Queue(self.backlog)
+            self._subscribers.append(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def subscribed(self, subscriber: queue.Queue) -> bool:
+        with self._lock:
+            return subscriber in self._subscribers
+
+    def publish(self, event: str, data: Dict) -> None:
+        with self._lock:
+            self._sequence += 1
+            message = (
+                f"id: {self._sequence}\nevent: {event}\n"
+                f"data: {json.dumps(data)}\n\n"
+            )
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    logger.info("Dropping a network stream client that fell behind")
+                    self._subscribers.remove(subscriber)
+
+    def check(self, now: Optional[float] = None) -> None:
+        """Pick up new entries and announce outages opening or closing."""
+        # Summary requests update the shared analysis too, so go by the
+        # cursor this tail last published rather than what is still unread
+        reset, entries, cursor = self.analysis.since(self._cursor)
+        self._cursor = cursor
+        now = time.time() if now is None else now
+        if reset or entries:
+            self.publish(
+                "entries",
+                {
+                    "cursor": cursor,
+                    "reset": reset,
+                    "entries": [] if reset else [[e * 1000, ip] for e, ip in entries],
+                },
+            )
+        if self._open is not None and (reset or entries):
+            closed = self.analysis.closed_gap(self._open["start"] // 1000)
+            if closed is None:
+                closed = {**self._open, "end": round(now * 1000), "open": False}
+            self.publish("gap", {"state": "close", "gap": closed})
+            self._open = None
+
+        gap = self.analysis.open_gap(now)
+        if gap is not None and self._open is None:
+            self.publish("gap", {"state": "open", "gap": gap})
+        if gap is not None:
+            self._open = gap
+
+    def wait(self, now: float) -> float:
+        """Seconds until the next check becomes overdue, at most a minute."""
+        last = self.analysis.last
+        if last is None or self._open is not None:
+            return 60.0
+        return min(60.0, max(1.0, last + INTERVAL + TOLERANCE - now + 1))
+
+    def start(self) -> threading.Thread:
+        if self.running:
+            return self._thread
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _run(self) -> None:
+        try:
+            notifier = Inotify()
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable ({e}); polling the network log")
+            notifier = None
+        logger.info("Network log tail started")
+
+        watched: Optional[Path] = None
+        while True:
+            try:
+                path = self._log_path()
+                if notifier is not None and path is not None and path != watched:
+                    notifier.watch(path.parent)
+                    watched = path
+                    logger.info(f"Watching {path} for changes")
+                self.check()
+                if notifier is None or watched is None:
+                    time.sleep(min(self.poll, self.wait(time.time())))
+                    continue
+                deadline = time.time() + self.wait(time.time())
+                # Other files in the directory change too; only the log, a
+                # queue overflow or losing the watch is worth a check
+                while time.time() < deadline:
+                    events = notifier.read(deadline - time.time())
+                    if any(mask & IN_IGNORED for mask, _ in events):
+                        # The directory itself went away; watch it again
+                        watched = None
+                    if watched is None or any(
+                        name == watched.name or mask & IN_Q_OVERFLOW
+                        for mask, name in events
+                    ):
+                        break
+            except Exception as e:
+                logger.error(f"Network log tail error: {e}")
+                watched = None
+                time.sleep(self.poll)
@@ -1,24 +1,48 @@
 #!/usr/bin/env python3
 
 import json
+import os
 import shutil
 import subprocess
+import time
+from datetime import datetime
 from pathlib import Path
 import logging
 
-from monitor import config
+from confuse import ConfigError
+from pytimeparse import parse as parse_duration
+
+from monitor import config, get_data_path
+from widgets.services.docker import DockerClient, DockerWatcher
+from widgets.services.health import HealthChecker
+from widgets.services.history import StatusHistory
+from widgets.services.poller import ServicePoller, ServiceSnapshot
+from widgets.services.probes import ProbePool
 
 logger = logging.getLogger(__name__)
 
 BASE = Path(__file__).parent.parent.parent.parent
 SYSTEMCTL = shutil.which("systemctl")
 
+# Shared by every request; created on first use with the configured size
+_probe_pool = None
+_docker_watcher = None
+_health_checker = None
+_status_history = None
+
+
+def services_enabled() -> bool:
+    try:
+        return config["widgets"]["services"]["enabled"].get(bool)
+    except ConfigError:
+        return False
+
 
 def services_items():
     return config["widgets"]["services"]["items"].get(dict)
 
 
-def get_docker_status():
+def get_docker_status(timeout=10):
     """Get status of Docker containers"""
     container_statuses = {}
 
@@ -34,7 +58,7 @@ def get_docker_status():
             ["docker", "ps", "-a", "--format", "{{.Names}}\t{{.State}}"],
             capture_output=True,
             text=True,
-            timeout=10,
+            timeout=timeout,
         )
 
         if result.returncode == 0:
@@ -51,71 +75,375 @@ def get_docker_status():
     return container_statuses
 
 
-def get_systemd_status():
-    """Get status of systemd services and timers"""
-    service_statuses = {}
+SHOW_PROPERTIES = (
+    "Id",
+    "Names",
+    "LoadState",
+    "ActiveState",
+    "SubState",
+    "StateChangeTimestampMonotonic",
+)
+
+
+def systemd_units():
+    """Configured systemd units as ``{status key: unit name}``"""
+    units = {}
+    for service_info in (services_items() or {}).values():
+        for service in service_info.get("services", []):
+            units[service] = service
+        for timer in service_info.get("timers", []):
+            units[timer] = f"{timer}.timer"
+    return units
+
+
+def parse_systemctl_show(output):
+    """Split ``systemctl show`` output into one property dict per unit"""
+    blocks = []
+    current = {}
+    for line in output.splitlines():
+        if not line.strip():
+            if current:
+                blocks.append(current)
+                current = {}
+            continue
+        key, _, value = line.partition("=")
+        current[key] = value
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def monotonic_to_iso(usec):
+    """Convert a systemd monotonic timestamp (µs) to local ISO time"""
+    try:
+        usec = int(usec)
+    except (TypeError, ValueError):
+        return None
+    if usec <= 0:
+        return None
+    # systemd and time.monotonic() share CLOCK_MONOTONIC
+    wall = time.time() - (time.monotonic() - usec / 1_000_000)
+    return datetime.fromtimestamp(wall).isoformat(timespec="seconds")
+
+
+UNIT_SUFFIXES = (
+    ".service",
+    ".timer",
+    ".socket",
+    ".target",
+    ".path",
+    ".mount",
+    ".automount",
+    ".swap",
+    ".slice",
+    ".scope",
+    ".device",
+)
+
+
+def unit_name(name):
+    """Full unit name as systemd reports it (``nginx`` -> ``nginx.service``)"""
+    return name if name.endswith(UNIT_SUFFIXES) else f"{name}.service"
+
+
+def show_units(names, timeout):
+    """Run ``systemctl show`` for ``names``; None if it could not run"""
+    try:
+        result = subprocess.run(
+            [SYSTEMCTL, "show", f"--property={','.join(SHOW_PROPERTIES)}", *names],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except Exception as e:
+        logger.error(f"Error querying systemd units: {e}")
+        return None
+    if result.returncode:
+        logger.warning(f"systemctl show {' '.join(names)}: {result.stderr.strip()}")
+    return parse_systemctl_show(result.stdout)
+
 
-    services_config = services_items()
-    if not services_config:
-        return service_statuses
+def unit_details(block, name):
+    return {
+        "unit": block.get("Id") or name,
+        "load": block.get("LoadState"),
+        "active": block.get("ActiveState"),
+        "sub": block.get("SubState"),
+        "since": monotonic_to_iso(block.get("StateChangeTimestampMonotonic")),
+    }
 
-    # Collect all unique services and timers from YAML
-    all_services = set()
-    all_timers = set()
 
-    for service_info in services_config.values():
-        if "services" in service_info:
-            all_services.update(service_info["services"])
+def get_systemd_details(units, timeout=10):
+    """Query every unit in ``units`` with one ``systemctl show`` call
 
-        if "timers" in service_info:
-            all_timers.update(service_info["timers"])
+    Returns ``{status key: {unit, load, active, sub, since}}``; units that
+    could not be queried are missing.
+    """
+    if not units:
+        return {}
 
     if not SYSTEMCTL:
         logger.debug("systemctl not found in PATH; skipping systemd checks")
-        return service_statuses
-
-    # Check services
-    for service in all_services:
-        try:
-            result = subprocess.run(
-                [SYSTEMCTL, "is-active", service],
-                capture_output=True,
-                text=True,
-                timeout=5,
-            )
-            status = result.stdout.strip()
-            service_statuses[service] = "ok" if status == "active" else "down"
-        except Exception as e:
-            logger.error(f"Error checking service {service}: {e}")
-            service_statuses[service] = "unknown"
-
-    # Check timers
-    for timer in all_timers:
-        try:
-            result = subprocess.run(
-                [SYSTEMCTL, "is-active", f"{timer}.timer"],
-                capture_output=True,
-                text=True,
-                timeout=5,
-            )
-            status = result.stdout.strip()
-            service_statuses[timer] = "ok" if status == "active" else "down"
-        except Exception as e:
-            logger.error(f"Error checking timer {timer}: {e}")
-            service_statuses[timer] = "unknown"
+        return {}
+
+    blocks = show_units(list(units.values()), timeout)
+    if blocks is None:
+        return {}
+
+    # Match blocks back by name rather than position: an invalid unit name
+    # can make systemctl skip its block or stop early
+    by_name = {}
+    for block in blocks:
+        for name in [block.get("Id"), *block.get("Names", "").split()]:
+            by_name[name] = block
+
+    details = {}
+    for key, name in units.items():
+        block = by_name.get(unit_name(name))
+        if block is None:
+            # Ask for the leftovers one at a time so one bad name only
+            # affects itself
+            single = show_units([name], timeout)
+            block = single[0] if single and len(single) == 1 else None
+        if block is not None:
+            details[key] = unit_details(block, name)
+    return details
+
 
-    return service_statuses
+def systemd_status_from(units, details):
+    statuses = {}
+    for key in units:
+        detail = details.get(key)
+        if detail is None:
+            statuses[key] = "unknown"
+        else:
+            statuses[key] = "ok" if detail["active"] == "active" else "down"
+    return statuses
+
+
+def get_systemd_status():
+    """Get status of systemd services and timers"""
+    units = systemd_units()
+    if not units or not SYSTEMCTL:
+        return {}
+    return systemd_status_from(units, get_systemd_details(units))
 
 
 def get_service_status():
     """Get combined status of all services"""
-    docker_status = get_docker_status()
-    systemd_status = get_systemd_status()
+    return get_service_report()["status"]
+
+
+def probe_settings():
+    """Pool size, per-probe timeout and response deadline in seconds"""
+    settings = config["widgets"]["services"]["probes"]
+    return (
+        settings["workers"].get(int),
+        parse_duration(settings["timeout"].get(str)) or 5,
+        parse_duration(settings["deadline"].get(str)) or 3,
+    )
+
+
+def get_probe_pool():
+    global _probe_pool
+    if _probe_pool is None:
+        _probe_pool = ProbePool(probe_settings()[0])
+    return _probe_pool
+
+
+def configured_containers():
+    containers = []
+    for service_info in (services_items() or {}).values():
+        containers.extend(service_info.get("containers", []))
+    return containers
+
+
+def docker_settings():
+    return config["widgets"]["services"]["docker"]
+
+
+def start_docker_watcher():
+    """Follow the Docker Engine event stream when the socket is available"""
+    global _docker_watcher
+    settings = docker_settings()
+    if not services_enabled() or not settings["events"].get(bool):
+        return None
+    socket_path = settings["socket"].as_filename()
+    if not os.path.exists(socket_path):
+        logger.info(f"No Docker socket at {socket_path}; using the docker CLI")
+        return None
+    if _docker_watcher is None:
+        _docker_watcher = DockerWatcher(DockerClient(socket_path))
+    logger.info(f"Watching Docker events on {socket_path}")
+    return _docker_watcher.start()
+
+
+def health_settings():
+    return config["widgets"]["services"]["health"]
+
+
+def health_targets():
+    """HTTP endpoints to probe as ``{"<service>:<field>": url}``"""
+    settings = health_settings()
+    if not settings["enabled"].get(bool):
+        return {}
+    fields = settings["fields"].as_str_seq()
+    targets = {}
+    for key, service_info in (services_items() or {}).items():
+        if service_info.get("health") is False:
+            continue
+        for field in fields:
+            url = service_info.get(field)
+            if url:
+                targets[f"{key}:{field}"] = url
+    return targets
+
+
+def get_health_checker():
+    global _health_checker
+    if _health_checker is None:
+        settings = health_settings()
+        _health_checker = HealthChecker(
+            verify_tls=settings["verify_tls"].get(bool),
+            window=settings["window"].get(int),
+        )
+    return _health_checker
+
+
+def get_service_report():
+    """Combined status plus per-unit systemd and container detail
+
+    Containers come from the Docker event watcher when it is live. Other
+    checks are probed concurrently; a probe that misses the response
+    deadline marks its services ``unknown`` and is listed under ``stale``
+    with its last known result.
+    """
+    _workers, timeout, deadline = probe_settings()
+    units = systemd_units()
+    watcher = _docker_watcher if _docker_watcher and _docker_watcher.live else None
+
+    probes = {}
+    if watcher is None and shutil.which("docker"):
+        probes["docker"] = lambda: get_docker_status(timeout)
+    if units and SYSTEMCTL:
+        probes["systemd"] = lambda: get_systemd_details(units, timeout)
+
+    targets = health_targets()
+    if targets:
+        checker = get_health_checker()
+        http_timeout = parse_duration(health_settings()["timeout"].get(str)) or 5
+        for target, url in targets.items():
+            probes[f"http:{target}"] = lambda target=target, url=url: checker.check(
+                target, url, http_timeout
+            )
+
+    results, stale = get_probe_pool().run(probes, deadline)
+
+    if watcher is not None:
+        docker_status = watcher.statuses()
+    else:
+        docker_status = results.get("docker", {})
+    if "docker" in stale:
+        docker_status = {name: "unknown" for name in configured_containers()}
+
+    systemd_details = results.get("systemd", {})
+    systemd_status = systemd_status_from(units, systemd_details) if SYSTEMCTL else {}
+
+    http_details = {
+        target: results[f"http:{target}"]
+        for target in targets
+        if f"http:{target}" in results
+    }
+    http_status = {
+        target: http_details[target]["status"] if target in http_details else "unknown"
+        for target in targets
+    }
+
+    # Combine all status dictionaries
+    all_status = {**docker_status, **systemd_status, **http_status}
+
+    return {
+        "status": all_status,
+        "systemd": systemd_details,
+        "docker": watcher.containers() if watcher is not None else {},
+        "http": http_details,
+        "stale": stale,
+    }
+
+
+def poll_settings():
+    return config["widgets"]["services"]["poll"]
+
+
+def poll_enabled():
+    return poll_settings()["enabled"].get(bool)
+
+
+def poll_interval():
+    return parse_duration(poll_settings()["interval"].get(str)) or 30
+
+
+def history_settings():
+    return config["widgets"]["services"]["history"]
+
+
+def get_history_path():
+    filename = history_settings()["file"].get(str)
+    path = Path(filename)
+    if not path.is_absolute():
+        path = get_data_path() / path
+    return path
+
+
+def get_status_history():
+    global _status_history
+    if _status_history is None:
+        _status_history = StatusHistory(get_history_path())
+    return _status_history
+
+
+def _record_snapshot(snapshot):
+    """Log state changes from each poller snapshot"""
+    if history_settings()["enabled"].get(bool):
+        get_status_history().observe(snapshot.status, snapshot.collected)
+
+
+def get_uptime(start, end, service=None):
+    """Uptime and outages per service between ``start`` and ``end``"""
+    history = get_status_history()
+    names = [service] if service else history.services()
+    report = {}
+    for name in names:
+        uptime = history.uptime(name, start, end)
+        if uptime is not None:
+            report[name] = uptime
+    return report
+
+
+# One probe cycle per interval, shared by every dashboard
+_poller = ServicePoller(get_service_report, poll_interval, on_snapshot=_record_snapshot)
+
+
+def start_status_poller():
+    """Start background service polling when enabled"""
+    if not services_enabled():
+        return None
+    if not poll_enabled():
+        logger.info("Service status polling disabled; probing per request")
+        return None
+    logger.info(f"Starting service status poller (interval={poll_interval()}s)")
+    return _poller.start()
+
+
+def get_status_snapshot():
+    """Latest polled snapshot, or a fresh probe when the poller is not running"""
+    if _poller.running:
+        return _poller.latest()
+    return ServiceSnapshot(get_service_report(), time.monotonic())
 
-    # Combine both status dictionaries
-    all_status = {**docker_status, **systemd_status}
 
-    return all_status
+def get_transitions(limit=50):
+    return _poller.transitions(limit)
 
 
 def register_routes(app):
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Docker Engine API client over the unix socket, kept current by /events.
+
+``DockerWatcher`` loads every container once, then follows the engine's
+event stream and re-inspects only the containers an event mentions. Status
+lookups read the in-memory table and never touch the daemon.
+"""
+
+import json
+import logging
+import socket
+import threading
+import time
+from datetime import datetime
+from http.client import HTTPConnection, HTTPException
+from typing import Dict, Iterator, Optional
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+CONTAINER_EVENTS = json.dumps({"type": ["container"]})
+
+
+class UnixHTTPConnection(HTTPConnection):
+    """HTTP/1.1 over a unix domain socket."""
+
+    def __init__(self, path: str, timeout: Optional[float] = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class DockerClient:
+    """Minimal Engine API client reusing one keep-alive connection."""
+
+    def __init__(self, socket_path: str, timeout: float = 5.0) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._connection: Optional[UnixHTTPConnection] = None
+        self._lock = threading.Lock()
+
+    def get(self, path: str):
+        """GET ``path`` and decode the JSON body; retries once on a dead socket."""
+        with self._lock:
+            for attempt in range(2):
+                if self._connection is None:
+                    self._connection = UnixHTTPConnection(
+                        self.socket_path, self.timeout
+                    )
+                try:
+                    self._connection.request("GET", path)
+                    response = self._connection.getresponse()
+                    body = response.read()
+                except (OSError, HTTPException):
+                    self.close_locked()
+                    if attempt:
+                        raise
+                    continue
+                if response.status == 404:
+                    return None
+                if response.status >= 400:
+                    raise RuntimeError(
+                        f"Docker API {path} returned HTTP {response.status}"
+                    )
+                return json.loads(body)
+
+    def containers(self):
+        return self.get("/containers/json?all=1")
+
+    def inspect(self, container_id: str):
+        return self.get(f"/containers/{quote(container_id)}/json")
+
+    def events(self, since: float) -> Iterator[Dict]:
+        """Yield container events from ``since`` until the stream closes."""
+        connection = UnixHTTPConnection(self.socket_path, timeout=None)
+        try:
+            connection.request(
+                "GET",
+                f"/events?since={int(since)}&filters={quote(CONTAINER_EVENTS)}",
+            )
+            response = connection.getresponse()
+            if response.status >= 400:
+                raise RuntimeError(f"Docker events returned HTTP {response.status}")
+            while True:
+                line = response.readline()
+                if not line:
+                    return
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            connection.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self.close_locked()
+
+    def close_locked(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def container_state(inspected: Dict) -> Dict:
+    """Reduce ``/containers/{id}/json`` to what the dashboard shows."""
+    state = inspected.get("State") or {}
+    health = state.get("Health") or {}
+    return {
+        "id": inspected.get("Id", "")[:12],
+        "name": inspected.get("Name", "").lstrip("/"),
+        "state": state.get("Status"),
+        "health": health.get("Status"),
+        "restarts": inspected.get("RestartCount", 0),
+        "started": state.get("StartedAt"),
+        "exit_code": state.get("ExitCode"),
+    }
+
+
+def container_status(entry: Dict) -> str:
+    if entry["state"] != "running" or entry["health"] == "unhealthy":
+        return "down"
+    return "ok"
+
+
+class DockerWatcher:
+    """In-memory container table fed by the Engine API event stream.
+
+    ``live`` is False until the first full load succeeds and again whenever
+    the stream drops; callers should fall back to another probe then.
+    """
+
+    def __init__(self, client: DockerClient, retry: float = 10.0) -> None:
+        self.client = client
+        self.retry = retry
+        self.live = False
+        self.updated: Optional[datetime] = None
+        self._table: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def containers(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._table.items()}
+
+    def statuses(self) -> Dict[str, str]:
+        with self._lock:
+            return {
+                name: container_status(entry) for name, entry in self._table.items()
+            }
+
+    def sync(self) -> None:
+        """Reload every container."""
+        table = {}
+        for summary in self.client.containers() or []:
+            inspected = self.client.inspect(summary["Id"])
+            if inspected:
+                entry = container_state(inspected)
+                table[entry["name"]] = entry
+        with self._lock:
+            self._table = table
+            self.updated = datetime.now()
+
+    def apply(self, event: Dict) -> None:
+        """Update the table for one container event."""
+        actor = event.get("Actor") or {}
+        container_id = actor.get("ID") or event.get("id")
+        name = (actor.get("Attributes") or {}).get("name")
+        action = event.get("Action") or event.get("status") or ""
+        if not container_id:
+            return
+
+        if action == "destroy":
+            with self._lock:
+                self._table = {
+                    key: entry
+                    for key, entry in self._table.items()
+                    if not container_id.startswith(entry["id"])
+                }
+                self.updated = datetime.now()
+            return
+
+        inspected = self.client.inspect(container_id)
+        if not inspected:
+            return
+        entry = container_state(inspected)
+        with self._lock:
+            # Drop the old key if the container was renamed
+            for key in [
+                key
+                for key, existing in self._table.items()
+                if existing["id"] == entry["id"] and key != entry["name"]
+            ]:
+                del self._table[key]
+            self._table[entry["name"]] = entry
+            self.updated = datetime.now()
+        logger.debug(f"Docker {action} for {name or entry['name']}")
+
+    def start(self) -> threading.Thread:
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _run(self) -> None:
+        while True:
+            try:
+                # Ask for events from before the load so none fall in the gap
+                since = time.time() - 1
+                self.sync()
+                self.live = True
+                logger.info(f"Docker watcher loaded {len(self._table)} containers")
+                for event in self.client.events(since):
+                    self.apply(event)
+                logger.warning("Docker event stream closed; reloading")
+            except Exception as e:
+                logger.warning(f"Docker watcher error: {e}")
+            self.live = False
+            self.client.close()
+            time.sleep(self.retry)
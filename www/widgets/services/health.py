@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""HTTP(S) health probes for service ``url``/``local`` endpoints.
+
+Connections are kept alive in a small per-host pool so repeated probes skip
+TCP and TLS setup, and each target keeps a rolling window of latencies for
+p50/p95/p99.
+"""
+
+import logging
+import ssl
+import threading
+import time
+from collections import deque
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from monitor import percentile
+
+logger = logging.getLogger(__name__)
+
+MAX_IDLE_PER_HOST = 4
+MAX_BODY = 1024 * 1024
+
+
+class ConnectionPool:
+    """Idle keep-alive connections keyed by scheme, host and port."""
+
+    def __init__(self, verify_tls: bool = True) -> None:
+        self.verify_tls = verify_tls
+        self._idle: Dict[Tuple[str, str, Optional[int]], List[HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(
+        self, scheme: str, host: str, port: Optional[int], timeout: float
+    ) -> HTTPConnection:
+        with self._lock:
+            idle = self._idle.get((scheme, host, port))
+            connection = idle.pop() if idle else None
+        if connection is not None:
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            return connection
+        if scheme == "https":
+            context = ssl.create_default_context()
+            if not self.verify_tls:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            return HTTPSConnection(host, port, timeout=timeout, context=context)
+        return HTTPConnection(host, port, timeout=timeout)
+
+    def release(self, scheme: str, host: str, port: Optional[int], connection):
+        with self._lock:
+            idle = self._idle.setdefault((scheme, host, port), [])
+            if len(idle) < MAX_IDLE_PER_HOST:
+                idle.append(connection)
+                return
+        connection.close()
+
+
+class LatencyWindow:
+    """Last ``size`` successful response times in milliseconds."""
+
+    def __init__(self, size: int) -> None:
+        self._samples: deque = deque(maxlen=max(1, size))
+        self._lock = threading.Lock()
+
+    def add(self, milliseconds: float) -> None:
+        with self._lock:
+            self._samples.append(milliseconds)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            ordered = sorted(self._samples)
+        result = {"samples": len(ordered)}
+        for q in (50, 95, 99):
+            value = percentile(ordered, q)
+            result[f"p{q}"] = None if value is None else round(value, 1)
+        return result
+
+
+class HealthChecker:
+    """Probe HTTP endpoints and keep per-target latency history.
+
+    Responses below 500 count as ``ok`` (a login page or redirect still
+    means the service answers); 5xx responses, timeouts and connection
+    errors count as ``down``.
+    """
+
+    def __init__(self, verify_tls: bool = True, window: int = 100) -> None:
+        self.pool = ConnectionPool(verify_tls)
+        self.window = window
+        self._latency: Dict[str, LatencyWindow] = {}
+        self._lock = threading.Lock()
+
+    def check(self, target: str, url: str, timeout: float) -> Dict:
+        """GET ``url`` and return ``{url, status, code, latency_ms, error, ...}``."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            return self._result(target, url, "down", error=f"Invalid URL: {url}")
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        key = (parts.scheme, parts.hostname, parts.port)
+
+        # A pooled connection the server already closed fails on first use;
+        # retry once on a fresh one before calling the target down
+        for attempt in range(2):
+            connection = self.pool.acquire(*key, timeout)
+            reused = connection.sock is not None
+            started = time.perf_counter()
+            try:
+                connection.request(
+                    "GET", path, headers={"User-Agent": "monitor@ health"}
+                )
+                response = connection.getresponse()
+                response.read(MAX_BODY)
+                elapsed = (time.perf_counter() - started) * 1000
+            except (OSError, HTTPException) as e:
+                connection.close()
+                if reused and not attempt:
+                    continue
+                return self._result(
+                    target, url, "down", error=str(e) or type(e).__name__
+                )
+
+            if response.will_close or not response.isclosed():
+                connection.close()
+            else:
+                self.pool.release(*key, connection)
+            status = "down" if response.status >= 500 else "ok"
+            self._window(target).add(elapsed)
+            return self._result(
+                target, url, status, code=response.status, latency_ms=elapsed
+            )
+
+    def _window(self, target: str) -> LatencyWindow:
+        with self._lock:
+            window = self._latency.get(target)
+            if window is None:
+                window = self._latency[target] = LatencyWindow(self.window)
+            return window
+
+    def _result(
+        self,
+        target: str,
+        url: str,
+        status: str,
+        code: Optional[int] = None,
+        latency_ms: Optional[float] = None,
+        error: Optional[str] = None,
+    ) -> Dict:
+        return {
+            "url": url,
+            "status": status,
+            "code": code,
+            "latency_ms": None if latency_ms is None else round(latency_ms, 1),
+            "error": error,
+            **self._window(target).summary(),
+        }
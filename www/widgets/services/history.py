@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Transition-only service status log with per-day uptime aggregates.
+
+The log is append-only text, one ``epoch,state,service`` line per change.
+On load each service's transitions are replayed into time-in-state totals
+per local day, and every new transition extends them, so uptime queries
+sum day totals and only walk transitions on the partial days at either end
+of the window.
+"""
+
+import bisect
+import logging
+import threading
+from array import array
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+UP, DOWN = "ok", "down"
+
+
+def day_start(day: date) -> float:
+    return datetime.combine(day, time()).timestamp()
+
+
+class ServiceTimeline:
+    """Transitions of one service and its closed per-day time in each state."""
+
+    def __init__(self) -> None:
+        self.times = array("d")
+        self.states: List[str] = []
+        self.days: Dict[date, Dict[str, float]] = {}
+
+    @property
+    def state(self) -> Optional[str]:
+        return self.states[-1] if self.states else None
+
+    def append(self, epoch: float, state: str) -> None:
+        if self.times:
+            self._close(self.times[-1], epoch, self.states[-1])
+        self.times.append(epoch)
+        self.states.append(state)
+
+    def _close(self, start: float, end: float, state: str) -> None:
+        """Add the interval ``[start, end)`` to the day totals."""
+        while start < end:
+            day = datetime.fromtimestamp(start).date()
+            boundary = min(end, day_start(day + timedelta(days=1)))
+            totals = self.days.setdefault(day, {})
+            totals[state] = totals.get(state, 0.0) + boundary - start
+            start = boundary
+
+    def intervals(self, start: float, end: float, now: float):
+        """Yield ``(state, lo, hi)`` pieces of the timeline within the window."""
+        if not self.times:
+            return
+        index = max(0, bisect.bisect_right(self.times, start) - 1)
+        for position in range(index, len(self.times)):
+            lo = self.times[position]
+            if lo >= end:
+                break
+            hi = self.times[position + 1] if position + 1 < len(self.times) else now
+            lo, hi = max(lo, start), min(hi, end)
+            if hi > lo:
+                yield self.states[position], lo, hi
+
+    def seconds(self, start: float, end: float, now: float) -> Dict[str, float]:
+        """Time in each state between ``start`` and ``end``."""
+        totals: Dict[str, float] = {}
+
+        def add(state, amount):
+            totals[state] = totals.get(state, 0.0) + amount
+
+        first_day = datetime.fromtimestamp(start).date() + timedelta(days=1)
+        last_day = datetime.fromtimestamp(end).date()
+        # Whole days come from the aggregates, but only while every
+        # interval in them is closed (before the latest transition)
+        settled = self.times[-1] if self.times else start
+        full_end = min(day_start(last_day), settled)
+        full_days = []
+        day = first_day
+        while day < last_day and day_start(day + timedelta(days=1)) <= full_end:
+            full_days.append(day)
+            day += timedelta(days=1)
+
+        if not full_days:
+            for state, lo, hi in self.intervals(start, end, now):
+                add(state, hi - lo)
+            return totals
+
+        for day in full_days:
+            for state, amount in self.days.get(day, {}).items():
+                add(state, amount)
+        middle_start = day_start(full_days[0])
+        middle_end = day_start(full_days[-1] + timedelta(days=1))
+        for state, lo, hi in self.intervals(start, middle_start, now):
+            add(state, hi - lo)
+        for state, lo, hi in self.intervals(middle_end, end, now):
+            add(state, hi - lo)
+        return totals
+
+    def outages(self, start: float, end: float, now: float) -> List[Tuple]:
+        """``(start, end, ongoing)`` for each down interval in the window."""
+        found = []
+        for state, lo, hi in self.intervals(start, end, now):
+            if state != DOWN:
+                continue
+            # Still down when the window ends inside the open last interval
+            ongoing = self.state == DOWN and hi >= end and hi > self.times[-1]
+            if found and found[-1][1] == lo:
+                found[-1] = (found[-1][0], hi, ongoing)
+            else:
+                found.append((lo, hi, ongoing))
+        return found
+
+
+class StatusHistory:
+    """Append-only status log plus in-memory timelines built from it."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._timelines: Dict[str, ServiceTimeline] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def observe(self, statuses: Dict[str, str], when: datetime) -> List[str]:
+        """Log services whose state differs from their last logged state."""
+        epoch = int(when.timestamp())
+        lines = []
+        with self._lock:
+            self._load()
+            for service, state in statuses.items():
+                timeline = self._timelines.setdefault(service, ServiceTimeline())
+                if timeline.state == state:
+                    continue
+                if timeline.times and epoch < timeline.times[-1]:
+                    continue
+                timeline.append(epoch, state)
+                lines.append(f"{epoch},{state},{service}\n")
+            if lines:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.writelines(lines)
+        return lines
+
+    def services(self) -> List[str]:
+        with self._lock:
+            self._load()
+            return sorted(self._timelines)
+
+    def uptime(self, service: str, start: datetime, end: datetime) -> Optional[Dict]:
+        """Uptime percentage, time in each state and outages for the window."""
+        now = datetime.now().timestamp()
+        lo, hi = start.timestamp(), min(end.timestamp(), now)
+        with self._lock:
+            self._load()
+            timeline = self._timelines.get(service)
+            if timeline is None:
+                return None
+            seconds = timeline.seconds(lo, hi, now)
+            outages = timeline.outages(lo, hi, now)
+            current = timeline.state
+
+        up, down = seconds.get(UP, 0.0), seconds.get(DOWN, 0.0)
+        return {
+            "uptime": round(up / (up + down) * 100, 3) if up + down else None,
+            "seconds": {state: round(amount) for state, amount in seconds.items()},
+            "current": current,
+            "outages": [
+                {
+                    "start": datetime.fromtimestamp(begin).isoformat(
+                        timespec="seconds"
+                    ),
+                    "end": None
+                    if ongoing
+                    else datetime.fromtimestamp(finish).isoformat(timespec="seconds"),
+                    "seconds": round(finish - begin),
+                }
+                for begin, finish, ongoing in outages
+            ],
+        }
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path.exists():
+            return
+        count = 0
+        with open(self.path) as f:
+            for line in f:
+                parts = line.rstrip("\n").split(",", 2)
+                if len(parts) < 3:
+                    continue
+                try:
+                    epoch = float(parts[0])
+                except ValueError:
+                    continue
+                timeline = self._timelines.setdefault(parts[2], ServiceTimeline())
+                if timeline.times and epoch < timeline.times[-1]:
+                    continue
+                timeline.append(epoch, parts[1])
+                count += 1
+        logger.info(f"Loaded {count} service status transitions from {self.path}")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Background service status poller that serves one snapshot to every reader."""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_TRANSITIONS = 200
+
+
+class ServiceSnapshot:
+    """Result of one probe cycle."""
+
+    __slots__ = ("report", "collected_at", "collected")
+
+    def __init__(self, report: Dict, collected_at: float) -> None:
+        self.report = report
+        self.collected_at = collected_at
+        self.collected = datetime.now()
+
+    @property
+    def status(self) -> Dict[str, str]:
+        return self.report["status"]
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.collected_at
+
+
+class ServicePoller:
+    """Probe services on an interval and keep the latest snapshot.
+
+    Readers get the current snapshot immediately, however many dashboards
+    are polling. Each cycle compares statuses with the previous one and
+    records any changes as transitions.
+    """
+
+    def __init__(
+        self,
+        collect: Callable[[], Dict],
+        interval: Callable[[], float],
+        on_snapshot: Optional[Callable[[ServiceSnapshot], None]] = None,
+    ) -> None:
+        self._collect = collect
+        self._interval = interval
+        self._on_snapshot = on_snapshot
+        self._snapshot: Optional[ServiceSnapshot] = None
+        self._transitions: deque = deque(maxlen=MAX_TRANSITIONS)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def latest(self) -> ServiceSnapshot:
+        """Return the current snapshot, probing once if there is none yet."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        return self.poll()
+
+    def poll(self) -> ServiceSnapshot:
+        """Run one probe cycle, publish it and record transitions."""
+        with self._lock:
+            previous = self._snapshot
+            snapshot = ServiceSnapshot(self._collect(), time.monotonic())
+            self._snapshot = snapshot
+            changes = self._diff(previous, snapshot)
+            self._transitions.extend(changes)
+
+        if self._on_snapshot:
+            try:
+                self._on_snapshot(snapshot)
+            except Exception as e:
+                logger.error(f"Error recording service snapshot: {e}")
+
+        for change in changes:
+            logger.info(
+                f"Service {change['service']} changed "
+                f"{change['from']} -> {change['to']}"
+            )
+        return snapshot
+
+    def transitions(self, limit: int = 50) -> List[Dict]:
+        """Most recent transitions, newest first."""
+        with self._lock:
+            recent = list(self._transitions)
+        return list(reversed(recent))[:limit]
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> threading.Thread:
+        if self.running:
+            return self._thread
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _run(self) -> None:
+        logger.info("Service status poller started")
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Service status poller error: {e}")
+            time.sleep(self._interval())
+
+    @staticmethod
+    def _diff(
+        previous: Optional[ServiceSnapshot], current: ServiceSnapshot
+    ) -> List[Dict]:
+        # The first snapshot is the baseline, not a set of changes
+        if previous is None:
+            return []
+        at = current.collected.isoformat(timespec="seconds")
+        changes = []
+        for service, state in current.status.items():
+            before = previous.status.get(service)
+            if before is not None and before != state:
+                changes.append(
+                    {"service": service, "from": before, "to": state, "at": at}
+                )
+        return changes
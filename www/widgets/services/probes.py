@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Run service status probes concurrently under a response deadline."""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ProbePool:
+    """Bounded pool that runs named probes and remembers their last results.
+
+    ``run`` waits at most ``deadline`` seconds. A probe still running then is
+    left to finish in the background and reported as stale, together with
+    its last successful result; the next ``run`` reuses the in-flight probe
+    instead of starting another copy.
+    """
+
+    def __init__(self, workers: int = 4) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="service-probe"
+        )
+        self._inflight: Dict[str, Future] = {}
+        self._last: Dict[str, Tuple[Any, datetime]] = {}
+        self._lock = threading.Lock()
+
+    def run(
+        self, probes: Dict[str, Callable[[], Any]], deadline: float
+    ) -> Tuple[Dict[str, Any], Dict[str, Dict]]:
+        """Return ``(results, stale)`` keyed by probe name."""
+        with self._lock:
+            futures = {}
+            for name, probe in probes.items():
+                future = self._inflight.get(name)
+                if future is None or future.done():
+                    future = self._executor.submit(self._call, name, probe)
+                    self._inflight[name] = future
+                futures[name] = future
+
+        wait(list(futures.values()), timeout=max(0.0, deadline))
+
+        results: Dict[str, Any] = {}
+        stale: Dict[str, Dict] = {}
+        for name, future in futures.items():
+            if future.done() and future.exception() is None:
+                results[name] = future.result()
+                continue
+            if future.done():
+                reason = f"failed: {future.exception()}"
+            else:
+                reason = f"no result within {deadline:g}s"
+            logger.warning(f"Service probe {name} {reason}")
+            stale[name] = {"reason": reason, **self.last(name)}
+        return results, stale
+
+    def last(self, name: str) -> Dict[str, Optional[Any]]:
+        with self._lock:
+            entry = self._last.get(name)
+        if entry is None:
+            return {"last": None, "checked": None}
+        value, checked = entry
+        return {"last": value, "checked": checked.isoformat(timespec="seconds")}
+
+    def _call(self, name: str, probe: Callable[[], Any]) -> Any:
+        value = probe()
+        with self._lock:
+            self._last[name] = (value, datetime.now())
+        return value
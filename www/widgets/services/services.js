@@ -156,6 +156,15 @@ class ServicesWidget {
         })
       }
 
+      // Check HTTP endpoints (only present when health probes are enabled)
+      for (const field of ['url', 'local']) {
+        const status = statusData[`${key}:${field}`]
+        if (status === undefined) continue
+        if (status === 'down') overallStatus = 'down'
+        else if (status === 'unknown' && overallStatus === 'ok') overallStatus = 'unknown'
+        statusParts.push(`${field}: ${status}`)
+      }
+
       // Update card status
       const card = statusElement.closest('.service-card')
       card.className = `service-card status-${overallStatus}`
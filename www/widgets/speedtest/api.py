@@ -1,6 +1,5 @@
 from flask import Blueprint, request, jsonify, send_file
-from subprocess import run, PIPE, TimeoutExpired
-from json import loads
+from pytimeparse import parse as parse_duration
 from datetime import datetime
 from pathlib import Path
 import logging
@@ -9,7 +8,19 @@ import logging
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from monitor import get_csv_path, parse_iso_timestamp, resolve_period_cutoff
+from monitor import (
+    conditional_response,
+    config,
+    get_csv_path,
+    get_data_path,
+    parse_iso_timestamp,
+    resolve_period_cutoff,
+    tail_lines,
+)
+from widgets.speedtest.backends import SpeedtestBackend, get_backend
+from widgets.speedtest.cache import SpeedtestCache
+from widgets.speedtest.jobs import SpeedtestJob, SpeedtestRunner
+from widgets.speedtest.stats import BUCKETS, METRICS, compute_stats
 
 SPEEDTEST = "speedtest-cli"
 
@@ -17,60 +28,80 @@ api = Blueprint("speedtest", __name__)
 logger = logging.getLogger(__name__)
 
 
-@api.route("/run", methods=["POST"])
-def speedtest_run():
-    logger.info("Starting speedtest run")
+def get_speedtest_backend() -> SpeedtestBackend:
+    """Build the configured speedtest backend"""
+    settings = config["widgets"]["speedtest"]["backend"]
+    engine = settings["engine"].get(str)
+    if engine == "cli":
+        return get_backend("cli", command=SPEEDTEST)
+    return get_backend(
+        engine,
+        download_url=settings["download_url"].get(str),
+        upload_url=settings["upload_url"].get(str) or None,
+        streams=settings["streams"].get(int),
+        duration=parse_duration(settings["duration"].get(str)) or 10,
+        latency_samples=settings["latency_samples"].get(int),
+        timeout=parse_duration(settings["timeout"].get(str)) or 10,
+    )
+
+
+def run_speedtest(job: SpeedtestJob):
+    """Run the configured backend, append the result to the CSV and return it"""
+    backend = get_speedtest_backend()
+    logger.info(f"Starting speedtest run ({job.trigger}, {backend.name})")
     csv_path = get_csv_path()
     if not csv_path.exists():
         csv_path.write_text("timestamp,download,upload,ping,server\n")
 
-    try:
-        proc = run(
-            [SPEEDTEST, "--json"], stdout=PIPE, stderr=PIPE, text=True, timeout=100
-        )
-    except TimeoutExpired:
-        logger.error("Speedtest timed out after 100 seconds")
-        return jsonify(
-            success=False, error="Speedtest timed out after 100 seconds"
-        ), 500
-
-    if proc.returncode:
-        error_msg = proc.stderr.strip() or "speedtest-cli failed"
-        logger.error(f"Speedtest failed: {error_msg}")
-        return jsonify(success=False, error=error_msg), 500
-
-    data = proc.stdout.strip()
-    if data:
-        try:
-            parsed = loads(data)
-            line = "{},{},{},{},{}\n".format(
-                parsed["timestamp"],
-                parsed["download"],
-                parsed["upload"],
-                parsed["ping"],
-                parsed["server"]["sponsor"].replace(",", " "),
-            )
-            with csv_path.open("a") as f:
-                f.write(line)
-            download_mbps = parsed["download"] / 1_000_000
-            upload_mbps = parsed["upload"] / 1_000_000
-            logger.info(
-                f"Speedtest completed: ↓{download_mbps:.1f} Mbps ↑{upload_mbps:.1f} Mbps {parsed['ping']:.1f}ms"
-            )
-            return jsonify(
-                success=True,
-                timestamp=parsed["timestamp"],
-                download=parsed["download"],
-                upload=parsed["upload"],
-                ping=parsed["ping"],
-                server=parsed["server"].get("sponsor"),
-            )
-        except Exception as e:
-            logger.error(f"Error parsing speedtest results: {e}")
-            return jsonify(success=False, error=str(e)), 500
+    result = backend.run(job.report)
+    line = "{},{},{},{},{}\n".format(
+        result["timestamp"],
+        result["download"],
+        result["upload"],
+        result["ping"],
+        (result["server"] or "").replace(",", " "),
+    )
+    with csv_path.open("a") as f:
+        f.write(line)
+    download_mbps = result["download"] / 1_000_000
+    upload_mbps = result["upload"] / 1_000_000
+    logger.info(
+        f"Speedtest completed: ↓{download_mbps:.1f} Mbps ↑{upload_mbps:.1f} Mbps {result['ping']:.1f}ms"
+    )
+    return result
+
+
+def get_lock_path():
+    return get_data_path() / "speedtest.lock"
+
+
+# One test at a time; requests only submit jobs and poll their status
+runner = SpeedtestRunner(run_speedtest, get_lock_path)
+
+
+@api.route("/run", methods=["POST"])
+def speedtest_run():
+    job, created = runner.submit("manual")
+    if not created:
+        logger.info(f"Speedtest {job.id} already running; merging request")
+    return jsonify(success=True, merged=not created, job=job.to_dict()), 202
 
-    logger.error("Speedtest completed but returned no data")
-    return jsonify(success=False, error="No data returned"), 500
+
+@api.route("/jobs", methods=["GET"])
+def speedtest_jobs():
+    active = runner.active()
+    return jsonify(
+        active=active.to_dict() if active else None,
+        jobs=[job.to_dict() for job in runner.recent()],
+    )
+
+
+@api.route("/jobs/<job_id>", methods=["GET"])
+def speedtest_job(job_id):
+    job = runner.get(job_id)
+    if job is None:
+        return jsonify(error=f"Unknown speedtest job: {job_id}"), 404
+    return jsonify(job.to_dict())
 
 
 @api.route("/history", methods=["GET"])
@@ -78,21 +109,30 @@ def speedtest_history():
     limit = request.args.get("limit", default=200, type=int)
     limit = max(1, min(limit or 200, 1000))
 
+    since = request.args.get("since")
+    since_time = parse_iso_timestamp(since) if since else None
+    if since and since_time is None:
+        return jsonify(error=f"Invalid cursor: {since}"), 400
+
     csv_path = get_csv_path()
     if not csv_path.exists():
-        return jsonify(entries=[])
+        return jsonify(entries=[], cursor=None)
 
     try:
-        with csv_path.open("r") as f:
-            lines = [line.strip() for line in f.readlines()[1:] if line.strip()]
-
-        recent = lines[-limit:]
+        stat = csv_path.stat()
+        recent = tail_lines(csv_path, limit)
         entries = []
         for row in reversed(recent):
             parts = row.split(",", 4)
             if len(parts) < 5:
                 continue
             timestamp, download, upload, ping, server = parts
+            if since_time is not None:
+                moment = parse_iso_timestamp(timestamp)
+                if moment is None:
+                    continue
+                if moment <= since_time:
+                    break
             entries.append(
                 {
                     "timestamp": timestamp,
@@ -103,11 +143,47 @@ def speedtest_history():
                 }
             )
 
-        return jsonify(entries=entries)
+        # Newest first, so the first entry is the cursor for the next poll
+        cursor = entries[0]["timestamp"] if entries else since
+        response = jsonify(entries=entries, cursor=cursor)
+        return conditional_response(
+            response, (stat.st_size, stat.st_mtime_ns), last_modified=stat.st_mtime
+        )
     except Exception as exc:
         return jsonify(error=str(exc)), 500
 
 
+def parse_chart_row(row):
+    """Parse one CSV line into chart values, or None when it is malformed"""
+    parts = row.strip().split(",", 4)
+    if len(parts) < 5:
+        return None
+    timestamp, download, upload, ping, _server = parts
+
+    dt = parse_iso_timestamp(timestamp)
+    if not dt:
+        return None
+
+    try:
+        download_mbps = float(download) / 1_000_000
+        upload_mbps = float(upload) / 1_000_000
+        ping_ms = float(ping)
+    except (ValueError, TypeError):
+        return None
+
+    return (
+        dt.timestamp(),
+        dt.strftime("%m/%d %H:%M"),
+        round(download_mbps, 2),
+        round(upload_mbps, 2),
+        round(ping_ms, 1),
+    )
+
+
+# Parsed chart columns; only bytes appended since the last request are parsed
+chart_cache = SpeedtestCache(parse_chart_row)
+
+
 @api.route("/chart", methods=["GET"])
 def speedtest_chart():
     now = datetime.now()
@@ -120,42 +196,16 @@ def speedtest_chart():
         return jsonify(labels=[], datasets=[])
 
     try:
-        with csv_path.open("r") as f:
-            lines = [line.strip() for line in f.readlines()[1:] if line.strip()]
-
-        effective_cutoff = period_cutoff
-
-        labels = []
-        download_data = []
-        upload_data = []
-        ping_data = []
-
-        for row in lines:
-            parts = row.split(",", 4)
-            if len(parts) < 5:
-                continue
-            timestamp, download, upload, ping, server = parts
-
-            dt = parse_iso_timestamp(timestamp)
-            if not dt:
-                continue
-
-            if effective_cutoff is not None and dt < effective_cutoff:
-                continue
-
-            try:
-                download_mbps = float(download) / 1_000_000
-                upload_mbps = float(upload) / 1_000_000
-                ping_ms = float(ping)
-            except (ValueError, TypeError):
-                continue
-
-            labels.append(dt.strftime("%m/%d %H:%M"))
-            download_data.append(round(download_mbps, 2))
-            upload_data.append(round(upload_mbps, 2))
-            ping_data.append(round(ping_ms, 1))
+        stat = csv_path.stat()
+        series = chart_cache.since(
+            csv_path, period_cutoff.timestamp() if period_cutoff is not None else None
+        )
+        labels = series["labels"]
+        download_data = series["download"]
+        upload_data = series["upload"]
+        ping_data = series["ping"]
 
-        return jsonify(
+        response = jsonify(
             {
                 "labels": labels,
                 "datasets": [
@@ -186,6 +236,46 @@ def speedtest_chart():
                 ],
             }
         )
+        # Old points leave a period's window without the file changing
+        return conditional_response(
+            response,
+            (stat.st_size, stat.st_mtime_ns, len(labels)),
+            last_modified=stat.st_mtime,
+        )
+    except Exception as exc:
+        return jsonify(error=str(exc)), 500
+
+
+@api.route("/stats", methods=["GET"])
+def speedtest_stats():
+    """Per-bucket p5/p50/p95 and SLA fractions over a period"""
+    period = request.args.get("period", default="all", type=str)
+    bucket = request.args.get("bucket", default="day", type=str)
+    if bucket not in BUCKETS:
+        return jsonify(error=f"Invalid bucket: {bucket}"), 400
+
+    settings = config["widgets"]["speedtest"]["sla"]
+    sla = {}
+    for metric in METRICS:
+        # An explicit 0 turns the threshold off, so only fall back when absent
+        value = request.args.get(f"sla_{metric}", type=float)
+        sla[metric] = settings[metric].as_number() if value is None else value
+
+    csv_path = get_csv_path()
+    if not csv_path.exists():
+        return jsonify(period=period, bucket=bucket, sla=sla, buckets=[], overall=None)
+
+    try:
+        stat = csv_path.stat()
+        period_cutoff = resolve_period_cutoff(period)
+        columns = chart_cache.since(
+            csv_path, period_cutoff.timestamp() if period_cutoff is not None else None
+        )
+        stats = compute_stats(columns, bucket, sla)
+        response = jsonify(period=period, bucket=bucket, sla=sla, **stats)
+        return conditional_response(
+            response, (stat.st_size, stat.st_mtime_ns), last_modified=stat.st_mtime
+        )
     except Exception as exc:
         return jsonify(error=str(exc)), 500
 
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""Speedtest backends.
+
+``cli`` runs ``speedtest-cli --json`` as before. ``http`` measures in-process
+against any HTTP(S) endpoint: latency and jitter from HEAD round trips, then
+download and upload throughput over several parallel keep-alive streams.
+
+A stand-in endpoint for testing on a LAN or locally:
+
+    python -m widgets.speedtest.backends serve --port 8099
+"""
+
+import argparse
+import logging
+import statistics
+import threading
+import time
+from datetime import datetime, timezone
+from http.client import HTTPConnection, HTTPSConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import loads
+from subprocess import PIPE, TimeoutExpired, run
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+Report = Callable[[str, Optional[float]], None]
+
+CHUNK = 64 * 1024
+
+
+class SpeedtestBackend:
+    """Interface for speedtest engines.
+
+    ``run`` returns a result dict with ``timestamp`` (UTC ISO), ``download``
+    and ``upload`` in bits per second, ``ping`` and ``jitter`` in
+    milliseconds, a ``server`` label and optional per-stream ``streams``.
+    """
+
+    name = ""
+
+    def run(self, report: Report) -> Dict:
+        raise NotImplementedError
+
+
+class CliBackend(SpeedtestBackend):
+    """Spawn ``speedtest-cli --json``."""
+
+    name = "cli"
+
+    def __init__(self, command: str = "speedtest-cli", timeout: int = 100) -> None:
+        self.command = command
+        self.timeout = timeout
+
+    def run(self, report: Report) -> Dict:
+        report("measuring", None)
+        try:
+            proc = run(
+                [self.command, "--json"],
+                stdout=PIPE,
+                stderr=PIPE,
+                text=True,
+                timeout=self.timeout,
+            )
+        except TimeoutExpired:
+            raise RuntimeError(f"Speedtest timed out after {self.timeout} seconds")
+
+        if proc.returncode:
+            raise RuntimeError(proc.stderr.strip() or "speedtest-cli failed")
+
+        data = proc.stdout.strip()
+        if not data:
+            raise RuntimeError("No data returned")
+
+        parsed = loads(data)
+        return {
+            "timestamp": parsed["timestamp"],
+            "download": parsed["download"],
+            "upload": parsed["upload"],
+            "ping": parsed["ping"],
+            "jitter": None,
+            "server": parsed["server"].get("sponsor"),
+            "streams": [],
+        }
+
+
+def open_connection(url: str, timeout: float) -> Tuple[HTTPConnection, str]:
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise ValueError(f"Unsupported speedtest URL: {url}")
+    connection_class = HTTPSConnection if parts.scheme == "https" else HTTPConnection
+    connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    return connection, path
+
+
+class HttpBackend(SpeedtestBackend):
+    """Multi-stream HTTP throughput test against a configurable endpoint.
+
+    Each stream keeps one connection open and repeats GET (download) or POST
+    (upload) requests until ``duration`` has elapsed. Throughput is total
+    bytes over wall time across all streams.
+    """
+
+    name = "http"
+
+    def __init__(
+        self,
+        download_url: str,
+        upload_url: Optional[str] = None,
+        streams: int = 4,
+        duration: float = 10.0,
+        latency_samples: int = 10,
+        upload_size: int = 1024 * 1024,
+        timeout: float = 10.0,
+    ) -> None:
+        if not download_url:
+            raise ValueError("The http speedtest backend needs a download_url")
+        self.download_url = download_url
+        self.upload_url = upload_url or download_url
+        self.streams = max(1, streams)
+        self.duration = max(1.0, duration)
+        self.latency_samples = max(2, latency_samples)
+        self.upload_size = max(CHUNK, upload_size)
+        self.timeout = timeout
+
+    def run(self, report: Report) -> Dict:
+        report("latency", 0.0)
+        ping, jitter = self.measure_latency()
+
+        report("download", 0.1)
+        download, download_streams = self.measure(
+            self._download_stream, lambda p: report("download", 0.1 + 0.45 * p)
+        )
+
+        report("upload", 0.55)
+        upload, upload_streams = self.measure(
+            self._upload_stream, lambda p: report("upload", 0.55 + 0.45 * p)
+        )
+
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "download": download,
+            "upload": upload,
+            "ping": ping,
+            "jitter": jitter,
+            "server": urlsplit(self.download_url).hostname,
+            "streams": [
+                {"direction": "download", **stream} for stream in download_streams
+            ]
+            + [{"direction": "upload", **stream} for stream in upload_streams],
+        }
+
+    def measure_latency(self) -> Tuple[float, float]:
+        """Median HEAD round trip and mean successive difference, in ms."""
+        connection, path = open_connection(self.download_url, self.timeout)
+        try:
+            # The first request also pays for TCP/TLS setup; leave it out
+            samples = []
+            for attempt in range(self.latency_samples + 1):
+                started = time.perf_counter()
+                connection.request("HEAD", path)
+                connection.getresponse().read()
+                if attempt:
+                    samples.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+        jitter = statistics.mean(
+            abs(later - earlier) for earlier, later in zip(samples, samples[1:])
+        )
+        return round(statistics.median(samples), 2), round(jitter, 2)
+
+    def measure(
+        self, stream: Callable[[float, List[int]], None], progress: Callable
+    ) -> Tuple[float, List[Dict]]:
+        """Run ``streams`` copies of ``stream`` in parallel until the deadline."""
+        counters = [[0] for _ in range(self.streams)]
+        errors: List[Optional[str]] = [None] * self.streams
+        finished: List[Optional[float]] = [None] * self.streams
+        started = time.perf_counter()
+        deadline = started + self.duration
+
+        def worker(position):
+            try:
+                stream(deadline, counters[position])
+            except Exception as e:
+                errors[position] = str(e)
+            finished[position] = time.perf_counter()
+
+        threads = [
+            threading.Thread(target=worker, args=(position,), daemon=True)
+            for position in range(self.streams)
+        ]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            progress(min(1.0, (time.perf_counter() - started) / self.duration))
+            for thread in threads:
+                thread.join(timeout=0.25)
+
+        total = sum(counter[0] for counter in counters)
+        if not total:
+            raise RuntimeError(next((e for e in errors if e), "No data transferred"))
+
+        elapsed = max(end for end in finished if end is not None) - started
+        details = []
+        for position, counter in enumerate(counters):
+            seconds = (finished[position] or started) - started
+            details.append(
+                {
+                    "stream": position,
+                    "bytes": counter[0],
+                    "seconds": round(seconds, 3),
+                    "bps": round(counter[0] * 8 / seconds, 1) if seconds > 0 else 0.0,
+                    "error": errors[position],
+                }
+            )
+        return round(total * 8 / elapsed, 1), details
+
+    def _download_stream(self, deadline: float, counter: List[int]) -> None:
+        connection, path = open_connection(self.download_url, self.timeout)
+        try:
+            while time.perf_counter() < deadline:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                if response.status >= 400:
+                    raise RuntimeError(f"Download failed: HTTP {response.status}")
+                while True:
+                    chunk = response.read(CHUNK)
+                    if not chunk:
+                        break
+                    counter[0] += len(chunk)
+                    if time.perf_counter() >= deadline:
+                        # Abandon the rest of the body; the connection closes
+                        return
+        finally:
+            connection.close()
+
+    def _upload_stream(self, deadline: float, counter: List[int]) -> None:
+        connection, path = open_connection(self.upload_url, self.timeout)
+        payload = memoryview(bytes(CHUNK))
+        try:
+            while time.perf_counter() < deadline:
+                connection.putrequest("POST", path)
+                connection.putheader("Content-Type", "application/octet-stream")
+                connection.putheader("Content-Length", str(self.upload_size))
+                connection.endheaders()
+                remaining = self.upload_size
+                while remaining:
+                    piece = payload[: min(CHUNK, remaining)]
+                    connection.send(piece)
+                    counter[0] += len(piece)
+                    remaining -= len(piece)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    raise RuntimeError(f"Upload failed: HTTP {response.status}")
+        finally:
+            connection.close()
+
+
+BACKENDS = {backend.name: backend for backend in (CliBackend, HttpBackend)}
+
+
+def get_backend(name: str, **options) -> SpeedtestBackend:
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown speedtest backend: {name}") from None
+    return backend_class(**options)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serve zeros on GET, swallow POST bodies; enough for the http backend."""
+
+    protocol_version = "HTTP/1.1"
+    size = 25 * 1024 * 1024
+
+    def handle(self):
+        # Download streams drop the connection mid-body at their deadline
+        try:
+            super().handle()
+        except ConnectionResetError:
+            pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(self.size))
+        self.send_header("Content-Type", "application/octet-stream")
+        self.end_headers()
+
+    def do_GET(self):
+        self.do_HEAD()
+        block = bytes(CHUNK)
+        remaining = self.size
+        try:
+            while remaining:
+                piece = block[: min(CHUNK, remaining)]
+                self.wfile.write(piece)
+                remaining -= len(piece)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def do_POST(self):
+        remaining = int(self.headers.get("Content-Length") or 0)
+        while remaining:
+            chunk = self.rfile.read(min(CHUNK, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Speedtest backend tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="run a stand-in speedtest endpoint")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=8099)
+    serve.add_argument("--size-mb", type=int, default=25, help="GET body size")
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        StandInHandler.size = args.size_mb * 1024 * 1024
+        server = ThreadingHTTPServer((args.host, args.port), StandInHandler)
+        print(f"Speedtest stand-in listening on http://{args.host}:{args.port}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
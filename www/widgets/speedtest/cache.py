@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""In-process cache of parsed speedtest history for the chart endpoint."""
+
+import bisect
+import os
+import threading
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class SpeedtestSeries:
+    """Parsed speedtest rows as parallel columns, oldest first."""
+
+    def __init__(self) -> None:
+        self.epochs = array("d")
+        self.labels: List[str] = []
+        self.download = array("d")
+        self.upload = array("d")
+        self.ping = array("d")
+        self.ordered = True
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def append(
+        self, epoch: float, label: str, download: float, upload: float, ping: float
+    ) -> None:
+        if self.epochs and epoch < self.epochs[-1]:
+            self.ordered = False
+        self.epochs.append(epoch)
+        self.labels.append(label)
+        self.download.append(download)
+        self.upload.append(upload)
+        self.ping.append(ping)
+
+    def since(self, cutoff_epoch: Optional[float]) -> Dict[str, list]:
+        """Columns for rows at or after ``cutoff_epoch`` (all rows for None)."""
+        if cutoff_epoch is None:
+            indexes = range(len(self))
+        elif self.ordered:
+            indexes = range(bisect.bisect_left(self.epochs, cutoff_epoch), len(self))
+        else:
+            indexes = [
+                i for i, epoch in enumerate(self.epochs) if epoch >= cutoff_epoch
+            ]
+
+        if isinstance(indexes, range):
+            window = slice(indexes.start, indexes.stop)
+            return {
+                "epochs": self.epochs[window].tolist(),
+                "labels": self.labels[window],
+                "download": self.download[window].tolist(),
+                "upload": self.upload[window].tolist(),
+                "ping": self.ping[window].tolist(),
+            }
+        return {
+            "epochs": [self.epochs[i] for i in indexes],
+            "labels": [self.labels[i] for i in indexes],
+            "download": [self.download[i] for i in indexes],
+            "upload": [self.upload[i] for i in indexes],
+            "ping": [self.ping[i] for i in indexes],
+        }
+
+
+class SpeedtestCache:
+    """Keep parsed speedtest history keyed by file identity.
+
+    The cache remembers the inode, size, mtime and how many bytes were
+    parsed. When the file has only grown, just the appended bytes are read;
+    a replaced, truncated or rewritten file is parsed again from the start.
+    """
+
+    def __init__(
+        self,
+        parse_row: Callable[[str], Optional[Tuple[float, str, float, float, float]]],
+    ) -> None:
+        self._parse_row = parse_row
+        self._series = SpeedtestSeries()
+        self._identity: Optional[Tuple[int, int, int]] = None
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def since(self, path: Path, cutoff_epoch: Optional[float]) -> Dict[str, list]:
+        """Refresh from ``path`` if it changed and slice rows from the cutoff."""
+        with self._lock:
+            self._refresh(path)
+            return self._series.since(cutoff_epoch)
+
+    def _refresh(self, path: Path) -> None:
+        stat = os.stat(path)
+        identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if identity == self._identity:
+            return
+
+        grown = (
+            self._identity is not None
+            and stat.st_ino == self._identity[0]
+            and stat.st_size > self._offset
+        )
+        if not grown:
+            self._series = SpeedtestSeries()
+            self._offset = 0
+
+        self._read_from(path)
+        self._identity = identity
+
+    def _read_from(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+
+        # Leave a trailing partial line for the next read
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].decode("utf-8", "replace").splitlines():
+            if not line.strip() or line.startswith("timestamp,"):
+                continue
+            parsed = self._parse_row(line)
+            if parsed is not None:
+                self._series.append(*parsed)
+        self._offset += end
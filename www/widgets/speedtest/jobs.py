@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Background speedtest jobs so the web worker never blocks on a test."""
+
+import fcntl
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+FINISHED = (SUCCEEDED, FAILED)
+MAX_JOBS = 20
+
+
+class SpeedtestBusy(Exception):
+    """Another process is already running a speedtest."""
+
+
+class SpeedtestJob:
+    """State of one speedtest run, shared between the worker and pollers."""
+
+    def __init__(self, trigger: str) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.trigger = trigger
+        self.state = QUEUED
+        self.phase = "queued"
+        self.progress = 0.0
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created = datetime.now()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in FINISHED
+
+    def report(self, phase: str, progress: Optional[float] = None) -> None:
+        """Progress callback handed to the speedtest function."""
+        self.phase = phase
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+
+    def to_dict(self) -> Dict:
+        elapsed = None
+        if self.started is not None:
+            elapsed = round((self.finished or time.monotonic()) - self.started, 1)
+        return {
+            "id": self.id,
+            "trigger": self.trigger,
+            "state": self.state,
+            "phase": self.phase,
+            "progress": round(self.progress, 2),
+            "elapsed": elapsed,
+            "created": self.created.isoformat(),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class SpeedtestRunner:
+    """Run speedtests one at a time on a background thread.
+
+    ``submit`` returns the active job when one is already queued or running,
+    so repeated clicks from several browsers share a single test. A file lock
+    keeps separate worker processes from testing at the same time.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[SpeedtestJob], Dict],
+        lock_path: Callable[[], Path],
+    ) -> None:
+        self._execute = execute
+        self._lock_path = lock_path
+        self._jobs: "OrderedDict[str, SpeedtestJob]" = OrderedDict()
+        self._active: Optional[SpeedtestJob] = None
+        self._lock = threading.Lock()
+
+    def submit(self, trigger: str = "manual") -> Tuple[SpeedtestJob, bool]:
+        """Start a job unless one is active; returns ``(job, created)``."""
+        with self._lock:
+            if self._active is not None and not self._active.done:
+                return self._active, False
+            job = SpeedtestJob(trigger)
+            self._active = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > MAX_JOBS:
+                self._jobs.popitem(last=False)
+
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        return job, True
+
+    def get(self, job_id: str) -> Optional[SpeedtestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active(self) -> Optional[SpeedtestJob]:
+        with self._lock:
+            job = self._active
+        return job if job is not None and not job.done else None
+
+    def recent(self):
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def _run(self, job: SpeedtestJob) -> None:
+        lock_path = self._lock_path()
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        job.started = time.monotonic()
+        try:
+            with open(lock_path, "a") as handle:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise SpeedtestBusy("A speedtest is already running")
+                job.state = RUNNING
+                job.report("starting")
+                job.result = self._execute(job)
+            job.state = SUCCEEDED
+            job.report("done", 1.0)
+        except Exception as e:
+            logger.error(f"Speedtest job {job.id} failed: {e}")
+            job.error = str(e)
+            job.state = FAILED
+            job.report("failed")
+        finally:
+            job.finished = time.monotonic()
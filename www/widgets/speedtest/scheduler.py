@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Scheduled speedtests with jitter, quiet hours and load checks."""
+
+import logging
+import os
+import threading
+import time as time_module
+from datetime import datetime, time
+from typing import Optional, Tuple
+
+import schedule
+from confuse import ConfigError
+from pytimeparse import parse as parse_duration
+
+from monitor import config
+from widgets.speedtest.api import runner
+
+logger = logging.getLogger(__name__)
+
+# A scheduler of our own, so the reminders thread never runs speedtest jobs
+_scheduler = schedule.Scheduler()
+_scheduler_thread = None
+
+
+def schedule_config():
+    return config["widgets"]["speedtest"]["schedule"]
+
+
+def speedtest_enabled() -> bool:
+    try:
+        return config["widgets"]["speedtest"]["enabled"].get(bool)
+    except ConfigError:
+        return False
+
+
+def schedule_enabled() -> bool:
+    if not speedtest_enabled():
+        return False
+    try:
+        return schedule_config()["enabled"].get(bool)
+    except ConfigError:
+        return False
+
+
+def parse_seconds(text: Optional[str], default: int) -> int:
+    seconds = parse_duration(text) if text else None
+    return int(seconds) if seconds is not None else default
+
+
+def parse_quiet_hours(text: Optional[str]) -> Optional[Tuple[time, time]]:
+    """Parse ``"23:00-07:00"`` into a (start, end) window; empty means none."""
+    if not text or not text.strip():
+        return None
+    start, separator, end = text.partition("-")
+    if not separator:
+        raise ValueError(f"Invalid quiet hours: {text}")
+    return (
+        datetime.strptime(start.strip(), "%H:%M").time(),
+        datetime.strptime(end.strip(), "%H:%M").time(),
+    )
+
+
+def in_quiet_hours(now: datetime, window: Tuple[time, time]) -> bool:
+    start, end = window
+    current = now.time()
+    if start <= end:
+        return start <= current < end
+    # Window wraps past midnight
+    return current >= start or current < end
+
+
+def system_busy(max_load: float) -> bool:
+    """True when the 1-minute load per CPU is above ``max_load``."""
+    if max_load <= 0:
+        return False
+    try:
+        load = os.getloadavg()[0]
+    except OSError:
+        return False
+    return load / (os.cpu_count() or 1) > max_load
+
+
+def scheduled_speedtest():
+    """Function called by the scheduler"""
+    if not schedule_enabled():
+        return
+
+    settings = schedule_config()
+    try:
+        window = parse_quiet_hours(settings["quiet_hours"].get(str))
+    except ValueError as e:
+        logger.error(f"Ignoring speedtest quiet hours: {e}")
+        window = None
+    if window and in_quiet_hours(datetime.now(), window):
+        logger.info("Skipping scheduled speedtest during quiet hours")
+        return
+
+    if runner.active():
+        logger.info("Skipping scheduled speedtest; a test is already running")
+        return
+
+    if system_busy(settings["max_load"].as_number()):
+        logger.info("Skipping scheduled speedtest; system load is high")
+        return
+
+    job, _ = runner.submit("schedule")
+    logger.info(f"Started scheduled speedtest {job.id}")
+
+
+def _refresh_speedtest_schedule(log_prefix="[schedule] refreshed") -> None:
+    """Rebuild the speedtest schedule using the latest config."""
+    _scheduler.clear("speedtest")
+
+    if not schedule_enabled():
+        logger.info(f"{log_prefix} - scheduled speedtests disabled")
+        return
+
+    settings = schedule_config()
+    interval = parse_seconds(settings["interval"].get(str), 6 * 3600)
+    jitter = parse_seconds(settings["jitter"].get(str), 0)
+    if interval <= 0:
+        logger.error(f"{log_prefix} - invalid speedtest interval; not scheduling")
+        return
+
+    # schedule picks a random delay in [earliest, latest] after every run
+    earliest = max(60, interval - jitter)
+    latest = max(earliest, interval + jitter)
+    job = _scheduler.every(earliest)
+    if latest > earliest:
+        job = job.to(latest)
+    job.seconds.do(scheduled_speedtest).tag("speedtest")
+    logger.info(
+        f"{log_prefix} - speedtest every {interval}s (jitter ±{jitter}s), "
+        f"next run at {_scheduler.next_run}"
+    )
+
+
+def on_config_reloaded(_new_config):
+    """Callback invoked when the global config reloads."""
+    _refresh_speedtest_schedule("Updated speedtest schedule")
+
+
+def start_schedule_daemon():
+    """Start the background speedtest scheduler when the widget is enabled"""
+    if not speedtest_enabled():
+        return None
+
+    def run_scheduler():
+        while True:
+            _scheduler.run_pending()
+            time_module.sleep(30)
+
+    global _scheduler_thread
+
+    _refresh_speedtest_schedule("Starting speedtest scheduler")
+
+    if _scheduler_thread and _scheduler_thread.is_alive():
+        return _scheduler_thread
+
+    _scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
+    _scheduler_thread.start()
+
+    return _scheduler_thread
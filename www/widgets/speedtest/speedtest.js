@@ -1,4 +1,6 @@
 /* global ChartManager */
+const SPEEDTEST_POLL_MS = 2000
+
 class SpeedtestWidget {
   constructor (widgetConfig = {}) {
     this.container = null
@@ -16,6 +18,7 @@ class SpeedtestWidget {
     }
     this.elements = {}
     this.entries = []
+    this.cursor = null
     this.chartManager = null
     this.tableManager = null
     this.currentView = null
@@ -100,6 +103,7 @@ class SpeedtestWidget {
     this.initManagers()
     this.setView(this.config.default)
     await this.loadHistory()
+    this.resumeActiveJob()
   }
 
   initManagers () {
@@ -167,27 +171,69 @@ class SpeedtestWidget {
     const button = this.elements.run
     const status = this.elements.status
     if (button) button.disabled = true
-    if (status) status.textContent = 'Running speedtest…'
+    if (status) status.textContent = 'Starting speedtest…'
 
     try {
       const response = await fetch('api/speedtest/run', { method: 'POST' })
       if (!response.ok) {
         throw new Error(`HTTP ${response.status}`)
       }
-      const result = await response.json()
-      if (!result.success) {
-        throw new Error(result.error || 'Speedtest failed')
+      const payload = await response.json()
+      await this.followJob(payload.job)
+    } catch (error) {
+      console.error('Speedtest run API call failed:', error)
+      if (status) status.textContent = `Speedtest error: ${error.message}`
+      if (button) button.disabled = false
+    }
+  }
+
+  async resumeActiveJob () {
+    try {
+      const response = await fetch('api/speedtest/jobs', { cache: 'no-store' })
+      if (!response.ok) return
+      const payload = await response.json()
+      if (payload.active) {
+        if (this.elements.run) this.elements.run.disabled = true
+        await this.followJob(payload.active)
+      }
+    } catch (error) {
+      console.error('Speedtest jobs API call failed:', error)
+    }
+  }
+
+  // Poll a background speedtest job until it finishes
+  async followJob (job) {
+    const button = this.elements.run
+    const status = this.elements.status
+
+    try {
+      while (job.state === 'queued' || job.state === 'running') {
+        if (status) {
+          const elapsed = job.elapsed ? ` (${Math.round(job.elapsed)}s)` : ''
+          status.textContent = `Running speedtest: ${job.phase}${elapsed}…`
+        }
+        await new Promise(resolve => setTimeout(resolve, SPEEDTEST_POLL_MS))
+        const response = await fetch(`api/speedtest/jobs/${job.id}`, { cache: 'no-store' })
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`)
+        }
+        job = await response.json()
+      }
+
+      if (job.state !== 'succeeded') {
+        throw new Error(job.error || 'Speedtest failed')
       }
+      const result = job.result
       if (status) {
         const DataFormatter = window.monitorShared.DataFormatter
         status.textContent = `${DataFormatter.formatTimestamp(result.timestamp)} — ↓ ${DataFormatter.formatMbps(result.download)} Mbps, ↑ ${DataFormatter.formatMbps(result.upload)} Mbps, ${DataFormatter.formatPing(result.ping)} ms (${result.server || 'unknown server'})`
       }
     } catch (error) {
-      console.error('Speedtest run API call failed:', error)
+      console.error('Speedtest job failed:', error)
       if (status) status.textContent = `Speedtest error: ${error.message}`
     } finally {
       if (button) button.disabled = false
-      await this.loadHistory()
+      await this.refreshHistory()
     }
   }
 
@@ -198,29 +244,59 @@ class SpeedtestWidget {
 
     this.tableManager.setEntries([])
     this.tableManager.setStatus('Loading speedtest history…')
+    this.cursor = null
 
     try {
-      const params = new URLSearchParams()
-      params.set('limit', this.config.table.max)
-      params.set('ts', Date.now())
+      const url = ChartManager.historyUrl('api/speedtest/history', { limit: this.config.table.max })
 
-      const response = await fetch(`api/speedtest/history?${params.toString()}`, { cache: 'no-store' })
+      // Revalidate with the ETag; unchanged history comes back as a 304
+      const response = await fetch(url, { cache: 'no-cache' })
       if (!response.ok) {
         throw new Error(`HTTP ${response.status}`)
       }
       const payload = await response.json()
       this.entries = payload.entries || []
-      this.tableManager.setEntries(this.entries)
-      this.updateViewToggle()
-      if (this.chartManager && this.chartManager.hasChart()) {
-        await this.chartManager.loadData()
-      }
+      this.cursor = payload.cursor || null
+      await this.renderHistory()
     } catch (error) {
       console.error('Speedtest history API call failed:', error)
       this.tableManager.setStatus(`Unable to load speedtests: ${error.message}`)
     }
   }
 
+  // Fetch only the runs logged after the cursor and put them on top
+  async refreshHistory () {
+    if (!this.tableManager) return
+    if (!this.cursor) return this.loadHistory()
+
+    const cursor = this.cursor
+    try {
+      const url = ChartManager.historyUrl('api/speedtest/history', { limit: this.config.table.max }, cursor)
+      const response = await fetch(url, { cache: 'no-cache' })
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`)
+      }
+      const payload = await response.json()
+      const entries = payload.entries || []
+      if (cursor !== this.cursor || !entries.length) return
+
+      // History is newest first
+      this.entries = entries.concat(this.entries).slice(0, this.config.table.max)
+      this.cursor = payload.cursor || this.cursor
+      await this.renderHistory()
+    } catch (error) {
+      console.error('Speedtest history refresh failed:', error)
+    }
+  }
+
+  async renderHistory () {
+    this.tableManager.setEntries(this.entries)
+    this.updateViewToggle()
+    if (this.chartManager && this.chartManager.hasChart()) {
+      await this.chartManager.loadData()
+    }
+  }
+
   setView (view) {
     const targetView = view === 'table' ? 'table' : view === 'none' ? 'none' : 'chart'
 
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Per-day and per-week speedtest percentiles and SLA fractions."""
+
+import bisect
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+from monitor import percentile
+
+BUCKETS = ("day", "week")
+PERCENTILES = (5, 50, 95)
+METRICS = ("download", "upload", "ping")
+
+
+def bucket_start(epoch: float, bucket: str) -> date:
+    """First day of the day or Monday-based week holding ``epoch``.
+
+    Chart epochs come from naive UTC datetimes, so converting back with
+    ``fromtimestamp`` recovers the UTC date the test was recorded on.
+    """
+    day = datetime.fromtimestamp(epoch).date()
+    if bucket == "week":
+        day -= timedelta(days=day.weekday())
+    return day
+
+
+def below_sla(
+    columns: Dict[str, Sequence[float]], sla: Dict[str, float]
+) -> Dict[str, Optional[float]]:
+    """Fraction of tests under the download/upload floor or over the ping ceiling.
+
+    A threshold of 0 disables that metric; ``any`` counts tests failing at
+    least one enabled threshold.
+    """
+    count = len(columns["download"])
+    if not count:
+        return {metric: None for metric in (*METRICS, "any")}
+
+    fractions: Dict[str, Optional[float]] = {}
+    missed = []
+    for metric in METRICS:
+        threshold = sla.get(metric) or 0
+        if threshold <= 0:
+            fractions[metric] = None
+            continue
+        if metric == "ping":
+            misses = [value > threshold for value in columns[metric]]
+        else:
+            misses = [value < threshold for value in columns[metric]]
+        fractions[metric] = round(sum(misses) / count, 4)
+        missed.append(misses)
+
+    fractions["any"] = round(sum(map(any, zip(*missed))) / count, 4) if missed else None
+    return fractions
+
+
+def summarize(columns: Dict[str, Sequence[float]], sla: Dict[str, float]) -> Dict:
+    summary = {"count": len(columns["download"])}
+    for metric in METRICS:
+        ordered = sorted(columns[metric])
+        summary[metric] = {f"p{q}": _round(percentile(ordered, q)) for q in PERCENTILES}
+    summary["below_sla"] = below_sla(columns, sla)
+    return summary
+
+
+def bucket_slices(
+    epochs: Sequence[float], bucket: str
+) -> Iterator[Tuple[date, int, int]]:
+    """Yield ``(start, lo, hi)`` index ranges of sorted ``epochs`` per bucket.
+
+    Boundaries are found by bisection, so the cost grows with the number of
+    buckets rather than the number of tests.
+    """
+    step = timedelta(days=7 if bucket == "week" else 1)
+    lo = 0
+    while lo < len(epochs):
+        start = bucket_start(epochs[lo], bucket)
+        # Same naive-UTC-as-local conversion the chart epochs went through
+        boundary = datetime.combine(start + step, time()).timestamp()
+        hi = max(lo + 1, bisect.bisect_left(epochs, boundary, lo))
+        yield start, lo, hi
+        lo = hi
+
+
+def compute_stats(
+    columns: Dict[str, Sequence[float]], bucket: str, sla: Dict[str, float]
+) -> Dict:
+    """Aggregate parsed speedtest columns into buckets plus an overall summary.
+
+    ``columns`` holds parallel ``epochs``, ``download``, ``upload`` and
+    ``ping`` sequences as returned by ``SpeedtestSeries.since``.
+    """
+    epochs = columns["epochs"]
+    if any(later < earlier for earlier, later in zip(epochs, epochs[1:])):
+        order = sorted(range(len(epochs)), key=epochs.__getitem__)
+        columns = {
+            key: [columns[key][i] for i in order] for key in ("epochs", *METRICS)
+        }
+        epochs = columns["epochs"]
+
+    buckets = []
+    for start, lo, hi in bucket_slices(epochs, bucket):
+        entry = {"start": start.isoformat()}
+        entry.update(
+            summarize({metric: columns[metric][lo:hi] for metric in METRICS}, sla)
+        )
+        buckets.append(entry)
+
+    return {
+        "buckets": buckets,
+        "overall": summarize({metric: columns[metric] for metric in METRICS}, sla),
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 2)